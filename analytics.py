@@ -0,0 +1,115 @@
+"""Read-only connections for reporting queries, kept off the write path.
+
+Admin dashboards and exports read through ``AnalyticsPool``, whose
+connections are opened with a ``mode=ro`` URI and their own cache settings,
+so a long aggregate never holds a write lock or shares page cache with
+report submission. With a snapshot path configured they read a copy of the
+database made with the SQLite backup API instead; each refresh is written
+beside the snapshot and renamed over it, so the file a connection opened
+never changes and can be opened ``immutable=1`` (no locking at all).
+"""
+import os
+import sqlite3
+import tempfile
+import time
+from urllib.parse import quote
+
+from db_pool import ConnectionPool
+
+ANALYTICS_PRAGMAS = {
+    "cache_size": -65536,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+def read_only_uri(path, immutable=False):
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    return uri + "&immutable=1" if immutable else uri
+
+
+class AnalyticsPool(ConnectionPool):
+    """Read-only pool over the live database, or over a snapshot when given one"""
+
+    def __init__(self, path, snapshot_path=None, size=4, pragmas=None, on_connect=None):
+        super().__init__(
+            read_only_uri(snapshot_path or path, immutable=bool(snapshot_path)),
+            size, ANALYTICS_PRAGMAS if pragmas is None else pragmas, on_connect, uri=True
+        )
+        self.snapshot_path = snapshot_path
+        self._generation = self._snapshot_identity()
+        self._opened = {}  # id(conn) -> generation it was opened on
+
+    def _snapshot_identity(self):
+        if not self.snapshot_path:
+            return None
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _connect(self):
+        conn = super()._connect()
+        self._opened[id(conn)] = self._generation
+        return conn
+
+    def acquire(self):
+        generation = self._snapshot_identity()
+        if generation != self._generation:
+            # A refresh replaced the file: idle connections still read the old one
+            self._generation = generation
+            self.close_all()
+        conn = super().acquire()
+        if self._opened.get(id(conn)) != self._generation:
+            self._discard(conn)
+            return self.acquire()
+        return conn
+
+    def release(self, conn):
+        if self._opened.get(id(conn)) != self._generation:
+            self._discard(conn)
+            return
+        super().release(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._stats["in_use"] -= 1
+            self._stats["discarded"] += 1
+        self._opened.pop(id(conn), None)
+        conn.close()
+
+    def stats(self):
+        stats = super().stats()
+        stats["snapshot"] = self.snapshot_path
+        return stats
+
+
+def take_snapshot(source, path):
+    """Copy ``source`` to ``path`` with the backup API; returns (bytes, seconds)
+
+    Copies every page in one step, inside a single read transaction. A
+    stepped backup restarts whenever another connection writes between
+    steps, so under steady report traffic it might never finish; in WAL
+    mode the single step does not hold writers up. The copy is switched to
+    rollback journaling (a WAL file could not be read with immutable=1)
+    before it replaces the previous snapshot in one rename.
+    """
+    started = time.perf_counter()
+    # A file of its own, so workers refreshing at once never share one
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".snapshot-")
+    os.close(fd)
+    try:
+        target = sqlite3.connect(partial)
+        try:
+            source.backup(target)
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return os.path.getsize(path), time.perf_counter() - started
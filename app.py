@@ -1,9 +1,57 @@
-from flask import Flask, render_template, request, redirect, session, flash, jsonify
+from flask import (
+    Flask, Response, render_template, request, redirect, session, flash, jsonify, g, url_for,
+    abort, has_request_context, make_response, send_file, stream_with_context,
+    before_render_template, template_rendered
+)
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import wraps
+import click
+import json
+import gzip
+import mimetypes
+import hashlib
+import hmac
 import re
-import sqlite3
 import random
 import os
-from werkzeug.utils import secure_filename
+import time
+from db_pool import ConnectionPool, DEFAULT_PRAGMAS
+from migrations import run_migrations, schema_version
+from query_plans import check_query_plans
+from queries import (
+    ACTIVE_JOB_SQL, CITIZENS_SQL, COMPLAINT_STATUS_SQL, FEED_PAGE_SQL, LINKED_REPORTS_SQL, MAX_ROWID,
+    MY_ISSUES_SQL, NEWEST_COMPLAINT_SQL, OFFICERS_SQL, USER_BY_EMAIL_SQL, USER_BY_ID_SQL, USER_BY_LOGIN_SQL,
+    USER_BY_MOBILE_SQL, complaint_statuses_query, department_page_query, issue_list_query, status_update_query
+)
+from uploads import UploadStore
+from assets import AssetPipeline
+from jobs import JOB_STATUSES, JobQueue, job, job_counts, recent_jobs
+from search import search_complaints
+from areas import area_filter, area_tree, backfill_batch, resolve_area
+from listings import LISTINGS, ListingError, fetch_listing
+from cache import ResponseCache, bump_version, table_versions
+from metrics import COUNT_BUCKETS, MetricsRegistry, SQLRecorder
+from analytics import ANALYTICS_PRAGMAS, AnalyticsPool, take_snapshot
+from archive import archive_batch, archive_cutoff, archive_stats, attach_archive
+from history import rebuild_rollups, trend
+from assignment import (
+    DEFAULT_DEPARTMENT, DEPARTMENT_BY_CODE, least_loaded_officer, officer_loads, rebalance_departments,
+    recount_loads
+)
+from duplicates import duplicate_scope, find_duplicate, index_batch, index_complaint, signature
+from batcher import WriteBatcher, WriterUnavailable
+from events import EventBroker, citizen_channel, department_channel, format_event, publish
+from benchmark import compare as compare_benchmarks, run_benchmark, run_writes
+from datagen import generate
+from bulk import (
+    COMPLAINT_EXPORT_COLUMNS, COMPLAINT_IMPORT_COLUMNS, USER_EXPORT_COLUMNS, USER_IMPORT_COLUMNS,
+    bulk_insert, complaint_export_query, complaint_row, detect_format, iter_export, read_records,
+    user_export_query, user_row
+)
+from counters import (
+    PRIORITY_ORDER, read_counter, read_counter_groups, rebuild_counters, verify_counters
+)
 
 app = Flask(__name__)
 app.secret_key = "civicfix_secret_key"
@@ -14,15 +62,62 @@ if __name__ == "__main__":
     
 #  CONFIG 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "database", "civicfix.db")
+DB_PATH = os.environ.get("DATABASE_PATH", os.path.join(BASE_DIR, "database", "civicfix.db"))
+ARCHIVE_PATH = os.environ.get("ARCHIVE_PATH", os.path.splitext(DB_PATH)[0] + "-archive.db")
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
 
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", 8))
+app.config["DB_PRAGMAS"] = {
+    **DEFAULT_PRAGMAS,
+    "synchronous": os.environ.get("DB_SYNCHRONOUS", DEFAULT_PRAGMAS["synchronous"]),
+    "cache_size": int(os.environ.get("DB_CACHE_SIZE", DEFAULT_PRAGMAS["cache_size"])),
+    "mmap_size": int(os.environ.get("DB_MMAP_SIZE", DEFAULT_PRAGMAS["mmap_size"])),
+    "busy_timeout": int(os.environ.get("DB_BUSY_TIMEOUT", DEFAULT_PRAGMAS["busy_timeout"])),
+}
+app.config["FEED_PAGE_SIZE"] = int(os.environ.get("FEED_PAGE_SIZE", 24))
+app.config["GOV_PAGE_SIZE"] = int(os.environ.get("GOV_PAGE_SIZE", 50))
+app.config["SEARCH_PAGE_SIZE"] = int(os.environ.get("SEARCH_PAGE_SIZE", 50))
+app.config["CACHE_MAX_ENTRIES"] = int(os.environ.get("CACHE_MAX_ENTRIES", 512))
+app.config["CACHE_MAX_BYTES"] = int(os.environ.get("CACHE_MAX_BYTES", 32 * 1024 * 1024))
+app.config["CACHE_TTL"] = float(os.environ.get("CACHE_TTL", 60))
+app.config["GZIP_MIN_SIZE"] = int(os.environ.get("GZIP_MIN_SIZE", 1024))
+app.config["GZIP_LEVEL"] = int(os.environ.get("GZIP_LEVEL", 6))
+app.config["SLOW_QUERY_MS"] = float(os.environ.get("SLOW_QUERY_MS", 100))
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+app.config["SSE_HEARTBEAT"] = float(os.environ.get("SSE_HEARTBEAT", 15))
+app.config["BULK_UPDATE_MAX"] = int(os.environ.get("BULK_UPDATE_MAX", 500))
+app.config["ARCHIVE_AFTER_DAYS"] = int(os.environ.get("ARCHIVE_AFTER_DAYS", 0))
+app.config["ARCHIVE_BATCH_SIZE"] = int(os.environ.get("ARCHIVE_BATCH_SIZE", 500))
+app.config["ARCHIVE_INTERVAL"] = float(os.environ.get("ARCHIVE_INTERVAL", 86400))
+app.config["ANALYTICS_POOL_SIZE"] = int(os.environ.get("ANALYTICS_POOL_SIZE", 4))
+app.config["ANALYTICS_PRAGMAS"] = {
+    **ANALYTICS_PRAGMAS,
+    "cache_size": int(os.environ.get("ANALYTICS_CACHE_SIZE", ANALYTICS_PRAGMAS["cache_size"])),
+    "mmap_size": int(os.environ.get("ANALYTICS_MMAP_SIZE", ANALYTICS_PRAGMAS["mmap_size"])),
+}
+app.config["ANALYTICS_SNAPSHOT_PATH"] = os.environ.get("ANALYTICS_SNAPSHOT_PATH", "")
+app.config["ANALYTICS_SNAPSHOT_INTERVAL"] = float(os.environ.get("ANALYTICS_SNAPSHOT_INTERVAL", 300))
+app.config["TREND_DAYS"] = int(os.environ.get("TREND_DAYS", 30))
+app.config["DUPLICATE_THRESHOLD"] = float(os.environ.get("DUPLICATE_THRESHOLD", 0.5))
+app.config["REBALANCE_BATCH_SIZE"] = int(os.environ.get("REBALANCE_BATCH_SIZE", 200))
+app.config["WRITE_BATCHING"] = os.environ.get("WRITE_BATCHING", "1") not in ("0", "false", "off", "")
+app.config["WRITE_BATCH_DELAY_MS"] = float(os.environ.get("WRITE_BATCH_DELAY_MS", 2))
+app.config["WRITE_BATCH_MAX"] = int(os.environ.get("WRITE_BATCH_MAX", 64))
+app.config["WRITE_BATCH_TIMEOUT"] = float(os.environ.get("WRITE_BATCH_TIMEOUT", 30))
+# The batch writer commits for many requests at once, so it can afford to
+# wait for the fsync that makes each acknowledgement durable
+app.config["WRITE_BATCH_SYNCHRONOUS"] = os.environ.get("WRITE_BATCH_SYNCHRONOUS", "FULL")
+app.config["ASSET_MAX_AGE"] = int(os.environ.get("ASSET_MAX_AGE", 365 * 24 * 3600))
+# Rebuild bundles on the next page render after a CSS or JS edit
+app.config["ASSET_AUTO_BUILD"] = os.environ.get("ASSET_AUTO_BUILD", "1" if app.debug else "0") not in ("0", "false", "off", "")
 
 os.makedirs(os.path.join(BASE_DIR, "database"), exist_ok=True)
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 GOV_DEPARTMENTS = ["Water Supply", "Sanitation", "Electricity", "Public Works"]
+COMPLAINT_STATUSES = ["Pending", "In Progress", "Resolved"]
+COMPLAINT_PRIORITIES = ["High", "Medium", "Low"]
 DEFAULT_ADMIN_EMAIL = "admin@civicfix.com"
 DEFAULT_ADMIN_MOBILE = "9999999999"
 DEPARTMENT_BY_ISSUE_TYPE = {
@@ -31,64 +126,138 @@ DEPARTMENT_BY_ISSUE_TYPE = {
     "Street Light": "Electricity",
     "Road": "Public Works"
 }
-DEPARTMENT_BY_CODE = {
-    "W": "Water Supply",
-    "S": "Sanitation",
-    "E": "Electricity",
-    "P": "Public Works"
-}
+
+upload_store = UploadStore(UPLOAD_FOLDER)
+response_cache = ResponseCache(
+    max_entries=app.config["CACHE_MAX_ENTRIES"],
+    max_bytes=app.config["CACHE_MAX_BYTES"],
+    ttl=app.config["CACHE_TTL"],
+)
+
+asset_pipeline = AssetPipeline(os.path.join(BASE_DIR, "static"))
+
+@app.template_global()
+def upload_url(filename, rendition=None):
+    return url_for("static", filename="uploads/" + upload_store.url_path(filename, rendition))
+
+@app.template_global()
+def asset_url(name):
+    """URL of the current build of a bundle in assets.BUNDLES"""
+    if app.config["ASSET_AUTO_BUILD"]:
+        asset_pipeline.ensure_built()
+    return url_for("hashed_asset", filename=asset_pipeline.filename(name))
+
+@app.template_filter("hours")
+def format_hours(hours):
+    if hours is None:
+        return "–"
+    return f"{hours:.1f} h" if hours < 48 else f"{hours / 24:.1f} d"
 
 # ================= DATABASE =================
-def get_db():
-    return sqlite3.connect(DB_PATH)
+db_pool = ConnectionPool(
+    DB_PATH, app.config["DB_POOL_SIZE"], app.config["DB_PRAGMAS"],
+    on_connect=lambda conn: attach_archive(conn, ARCHIVE_PATH, app.config["DB_PRAGMAS"])
+)
 
-def init_db():
+def get_db():
+    """Return the request's pooled connection, checked out on first use"""
+    if "db" not in g:
+        g.db = db_pool.acquire()
+        if "sql" not in g:
+            g.sql = SQLRecorder(app.config["SLOW_QUERY_MS"] / 1000, log_slow_query, db_pool.trace)
+        g.sql.attach(g.db)
+    return g.db
+
+# Reporting queries only: read-only, so they never take a write lock
+analytics_pool = AnalyticsPool(
+    DB_PATH, app.config["ANALYTICS_SNAPSHOT_PATH"] or None,
+    app.config["ANALYTICS_POOL_SIZE"], app.config["ANALYTICS_PRAGMAS"],
+    on_connect=lambda conn: attach_archive(conn, ARCHIVE_PATH, read_only=True)
+)
+
+def get_analytics_db():
+    """Return the request's read-only reporting connection, checked out on first use"""
+    if "analytics_db" not in g:
+        g.analytics_db = analytics_pool.acquire()
+        if "sql" not in g:
+            g.sql = SQLRecorder(app.config["SLOW_QUERY_MS"] / 1000, log_slow_query, db_pool.trace)
+        g.sql.attach(g.analytics_db)
+    return g.analytics_db
+
+# The single connection the write batcher commits on
+write_pool = ConnectionPool(
+    DB_PATH, 1, {**app.config["DB_PRAGMAS"], "synchronous": app.config["WRITE_BATCH_SYNCHRONOUS"]},
+    on_connect=lambda conn: attach_archive(conn, ARCHIVE_PATH, app.config["DB_PRAGMAS"])
+)
+
+def record_write_batch(size, failed, wait, seconds):
+    metrics.observe("civicfix_write_batch_size", size, COUNT_BUCKETS)
+    metrics.observe("civicfix_write_batch_wait_seconds", wait)
+    metrics.observe("civicfix_write_batch_commit_seconds", seconds)
+    if failed:
+        metrics.inc("civicfix_write_batch_failures_total", failed)
+
+# Started by the first write in each worker
+write_batcher = WriteBatcher(
+    write_pool, app.config["WRITE_BATCH_DELAY_MS"] / 1000, app.config["WRITE_BATCH_MAX"],
+    on_batch=record_write_batch, timeout=app.config["WRITE_BATCH_TIMEOUT"]
+)
+
+def write(operation):
+    """Run ``operation(cur)`` in a committed write transaction and return its result
+
+    With WRITE_BATCHING on, the operation joins the next group commit on the
+    batcher's thread, so it must only touch the cursor it is given and
+    values it closes over, never ``g``, ``session`` or ``request``.
+    """
+    if app.config["WRITE_BATCHING"]:
+        # The request's recorder follows its statements onto the writer's connection
+        if "sql" not in g:
+            g.sql = SQLRecorder(app.config["SLOW_QUERY_MS"] / 1000, log_slow_query, db_pool.trace)
+        return write_batcher.submit(operation, g.sql)
     db = get_db()
     cur = db.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        result = operation(cur)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+@app.errorhandler(WriterUnavailable)
+def writer_unavailable(error):
+    app.logger.error("Batched write failed: %s", error)
+    response = make_response("The service is busy. Please try again in a moment.", 503)
+    response.headers["Retry-After"] = "5"
+    return response
+
+@app.teardown_appcontext
+def release_db(exception):
+    for name, pool in (("db", db_pool), ("analytics_db", analytics_pool)):
+        db = g.pop(name, None)
+        if db is not None:
+            g.sql.detach(db)
+            pool.release(db)
+
+job_queue = JobQueue(
+    db_pool,
+    workers=int(os.environ.get("JOB_WORKERS", 2)),
+    executor=os.environ.get("JOB_EXECUTOR", "thread"),
+)
+
+@app.before_request
+def start_job_dispatcher():
+    job_queue.start()
+
+# Started by the first /events subscriber in each worker
+event_broker = EventBroker(db_pool)
 
-    # USERS
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT UNIQUE,
-        mobile TEXT,
-        password TEXT,
-        role TEXT,
-        gov_id TEXT,
-        status TEXT,
-        aadhaar TEXT,
-        dob TEXT,
-        gender TEXT,
-        address TEXT,
-        department TEXT
-    )
-    """)
-
-    # Backward-compatible migration for older databases
-    cur.execute("PRAGMA table_info(users)")
-    user_columns = [column[1] for column in cur.fetchall()]
-    if "department" not in user_columns:
-        cur.execute("ALTER TABLE users ADD COLUMN department TEXT")
-    if "mobile" not in user_columns:
-        cur.execute("ALTER TABLE users ADD COLUMN mobile TEXT")
-
-    # COMPLAINTS
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS complaints (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT,
-        description TEXT,
-        location TEXT,
-        department TEXT,
-        citizen_id INTEGER,
-        priority TEXT,
-        status TEXT,
-        image TEXT,
-        assigned_to INTEGER,
-        date TEXT
-    )
-    """)
+def init_db():
+    db = db_pool.acquire()
+    run_migrations(db)
+    cur = db.cursor()
 
     # DEFAULT ADMIN
     cur.execute("SELECT id, email, mobile FROM users WHERE role='admin' LIMIT 1")
@@ -104,25 +273,485 @@ def init_db():
             cur.execute("UPDATE users SET mobile=? WHERE id=?", (DEFAULT_ADMIN_MOBILE, admin_id))
 
     db.commit()
-    db.close()
 
+    # ARCHIVE: opt-in, since archived complaints leave listings and counters
+    if app.config["ARCHIVE_AFTER_DAYS"] > 0:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(ACTIVE_JOB_SQL, ("archive_complaints",))
+        if not cur.fetchone():
+            job_queue.enqueue(cur, "archive_complaints")
+        db.commit()
 
-# ================= HELPER FUNCTIONS =================
-def is_profile_complete(user_id):
-    """Check if citizen profile is complete"""
-    db = get_db()
+    # ANALYTICS SNAPSHOT: the first copy is made here, refreshes by job
+    snapshot_path = app.config["ANALYTICS_SNAPSHOT_PATH"]
+    if snapshot_path:
+        # IMMEDIATE so workers booting together start a single refresh chain
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(ACTIVE_JOB_SQL, ("analytics_snapshot",))
+        if not cur.fetchone():
+            job_queue.enqueue(cur, "analytics_snapshot", delay=app.config["ANALYTICS_SNAPSHOT_INTERVAL"])
+        db.commit()
+        if not os.path.exists(snapshot_path):
+            take_snapshot(db, snapshot_path)
+    db_pool.release(db)
+
+@app.cli.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations."""
+    db = db_pool.acquire()
+    applied = run_migrations(db)
+    print(f"Schema at version {schema_version(db)}; applied {applied or 'nothing'}")
+    db_pool.release(db)
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Bundle, fingerprint and precompress the CSS and JS into static/dist."""
+    manifest = asset_pipeline.build()
+    for name, built in manifest["bundles"].items():
+        sizes = "  ".join(
+            f"{encoding} {built[f'{encoding}_bytes']:,}"
+            for encoding in ("gzip", "br") if f"{encoding}_bytes" in built
+        )
+        print(f"{name:15} {built['file']:28} {built['source_bytes']:>7,} -> {built['bytes']:>7,} bytes  {sizes}")
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command():
+    """Fail if any route query still scans a whole table."""
+    db = db_pool.acquire()
+    findings = check_query_plans(db)
+    db_pool.release(db)
+
+    failures = 0
+    for route, sql, detail, allowed in findings:
+        if allowed:
+            print(f"ALLOW {route}: {detail} ({allowed})")
+        else:
+            failures += 1
+            print(f"FAIL  {route}: {detail}\n      {sql}")
+
+    if failures:
+        raise SystemExit(f"{failures} route queries scan a whole table")
+    print("All route queries use indexes")
+
+@app.cli.command("run-jobs")
+def run_jobs_command():
+    """Run every due background job in this process, then exit."""
+    job_queue.requeue_expired()
+    print(f"Ran {job_queue.run_until_idle()} jobs")
+
+@app.cli.command("backfill-areas")
+def backfill_areas_command():
+    """Map every complaint without an area to its canonical area now."""
+    db = db_pool.acquire()
     cur = db.cursor()
-    cur.execute("""
-    SELECT aadhaar, dob, gender, address
-    FROM users WHERE id=?
-    """, (user_id,))
-    user = cur.fetchone()
-    
-    if not user:
-        return False
-    
-    # Check if all required fields are filled
-    return all([user[0], user[1], user[2], user[3]])
+    total = 0
+    while updated := backfill_batch(cur):
+        db.commit()
+        total += updated
+        print(f"Mapped {total} complaints")
+    db_pool.release(db)
+    print("All complaints have an area")
+
+@app.cli.command("index-duplicates")
+def index_duplicates_command():
+    """Add every complaint without a signature to the duplicate index now."""
+    db = db_pool.acquire()
+    cur = db.cursor()
+    total = 0
+    while indexed := index_batch(cur):
+        db.commit()
+        total += indexed
+        print(f"Indexed {total} complaints")
+    db_pool.release(db)
+    print("All complaints are in the duplicate index")
+
+@app.cli.command("archive-complaints")
+@click.option("--days", type=int, default=None, help="Archive resolved complaints filed more than this many days ago.")
+def archive_complaints_command(days):
+    """Move old resolved complaints into the archive database now."""
+    days = app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    if days <= 0:
+        raise SystemExit("Archiving is off; set ARCHIVE_AFTER_DAYS or pass --days")
+    db = db_pool.acquire()
+    cutoff = archive_cutoff(days)
+    total = 0
+    while moved := archive_batch(db, cutoff, app.config["ARCHIVE_BATCH_SIZE"]):
+        total += moved
+        print(f"Archived {total} complaints")
+    stats = archive_stats(db.cursor())
+    db_pool.release(db)
+    print(f"Archive holds {stats['archived']} complaints filed {stats['oldest_date']} to {stats['newest_date']}")
+
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Recompute the daily complaint rollups from complaint_events."""
+    db = db_pool.acquire()
+    rebuild_rollups(db)
+    db_pool.release(db)
+    print("Rollups rebuilt")
+
+@app.cli.command("rebalance-assignments")
+def rebalance_assignments_command():
+    """Recount officer loads, assign orphaned complaints and even out each department."""
+    db = db_pool.acquire()
+    cur = db.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    recount_loads(cur)
+    total = 0
+    while changes := rebalance_departments(cur, app.config["REBALANCE_BATCH_SIZE"]):
+        db.commit()
+        total += changes
+        print(f"Reassigned {total} complaints")
+        cur.execute("BEGIN IMMEDIATE")
+    db.commit()
+    db_pool.release(db)
+    print("Officer loads are balanced")
+
+@app.cli.command("analytics-snapshot")
+def analytics_snapshot_command():
+    """Refresh the analytics snapshot from the live database now."""
+    path = app.config["ANALYTICS_SNAPSHOT_PATH"]
+    if not path:
+        raise SystemExit("Set ANALYTICS_SNAPSHOT_PATH to use a snapshot")
+    db = db_pool.acquire()
+    try:
+        size, elapsed = take_snapshot(db, path)
+    finally:
+        db_pool.release(db)
+    print(f"Wrote {size / 1048576:.1f} MiB to {path} in {elapsed:.2f}s")
+
+@app.cli.command("verify-counters")
+def verify_counters_command():
+    """Compare stat_counters with a full recount and report drift."""
+    db = db_pool.acquire()
+    drift = verify_counters(db)
+    db_pool.release(db)
+
+    for dimension, value, stored, actual in drift:
+        print(f"DRIFT {dimension}={value!r}: stored {stored}, actual {actual}")
+    if drift:
+        raise SystemExit(f"{len(drift)} counters drifted; run `flask rebuild-counters`")
+    print("All counters match")
+
+@app.cli.command("rebuild-counters")
+def rebuild_counters_command():
+    """Recount stat_counters from the complaints and users tables."""
+    db = db_pool.acquire()
+    rebuild_counters(db)
+    db_pool.release(db)
+    print("Counters rebuilt")
+
+def print_import_report(report):
+    for line_number, reason in report.rejected[:20]:
+        print(f"REJECT line {line_number}: {reason}")
+    if len(report.rejected) > 20:
+        print(f"... and {len(report.rejected) - 20} more rejected")
+    print(
+        f"Read {report.read}, inserted {report.inserted}, rejected {len(report.rejected)} "
+        f"in {report.elapsed:.1f}s ({report.rows_per_second:.0f} rows/s)"
+    )
+
+def print_import_progress(report):
+    print(f"  {report.inserted} inserted, {report.read} read, {report.rows_per_second:.0f} rows/s")
+
+@app.cli.command("import-complaints")
+@click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Default: from the file extension.")
+@click.option("--batch-size", default=1000, show_default=True)
+def import_complaints_command(source, fmt, batch_size):
+    """Stream complaints from a CSV or JSONL file ("-" for stdin)."""
+    db = db_pool.acquire()
+    insert_sql = f"""
+    INSERT INTO complaints ({", ".join(COMPLAINT_IMPORT_COLUMNS)})
+    VALUES ({", ".join("?" * len(COMPLAINT_IMPORT_COLUMNS))})
+    """
+    try:
+        report = bulk_insert(
+            db, read_records(source, detect_format(source.name, fmt)),
+            lambda record: complaint_row(
+                record, DEPARTMENT_BY_ISSUE_TYPE, GOV_DEPARTMENTS, COMPLAINT_STATUSES, COMPLAINT_PRIORITIES,
+                lambda user_id: db.execute("SELECT 1 FROM users WHERE id=?", (user_id,)).fetchone() is not None
+            ),
+            insert_sql, batch_size, print_import_progress
+        )
+        if report.inserted:
+            # Areas, duplicate signatures and officer assignments are worked
+            # out off the import path, like for complaints that predate them
+            job_queue.enqueue(db.cursor(), "backfill_areas")
+            job_queue.enqueue(db.cursor(), "index_duplicates")
+            job_queue.enqueue(db.cursor(), "rebalance_assignments")
+            db.commit()
+    finally:
+        db_pool.release(db)
+    print_import_report(report)
+    if report.inserted:
+        print("Queued backfill_areas, index_duplicates and rebalance_assignments; run `flask run-jobs` to process them now")
+
+@app.cli.command("import-users")
+@click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Default: from the file extension.")
+@click.option("--batch-size", default=1000, show_default=True)
+def import_users_command(source, fmt, batch_size):
+    """Stream citizens and officers from a CSV or JSONL file; existing emails are skipped."""
+    db = db_pool.acquire()
+    insert_sql = f"""
+    INSERT INTO users ({", ".join(USER_IMPORT_COLUMNS)})
+    VALUES ({", ".join("?" * len(USER_IMPORT_COLUMNS))})
+    ON CONFLICT(email) DO NOTHING
+    """
+    try:
+        report = bulk_insert(
+            db, read_records(source, detect_format(source.name, fmt)),
+            lambda record: user_row(record, GOV_DEPARTMENTS),
+            insert_sql, batch_size, print_import_progress
+        )
+    finally:
+        db_pool.release(db)
+    print_import_report(report)
+
+@app.cli.command("export-complaints")
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Default: stdout.")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default="csv", show_default=True)
+@click.option("--status")
+@click.option("--priority")
+@click.option("--department")
+@click.option("--area", type=int, help="City, ward or area id.")
+@click.option("--q", "search", help="Full-text search terms.")
+@click.option("--include-archived", is_flag=True, help="Also export complaints moved to the archive.")
+def export_complaints_command(output, fmt, status, priority, department, area, search, include_archived):
+    """Stream complaints matching the admin issue filters as CSV or JSONL."""
+    db = db_pool.acquire()
+    cur = db.cursor()
+    try:
+        area_column, area_value, _ = (area_filter(cur, area) if area else None) or (None, None, None)
+        if area and not area_column:
+            raise SystemExit(f"No area with id {area}")
+        query, params = complaint_export_query(
+            COMPLAINT_EXPORT_COLUMNS,
+            ((area_column, area_value), ("status", status), ("priority", priority), ("department", department)),
+            search, include_archived
+        )
+        for chunk in iter_export(cur, COMPLAINT_EXPORT_COLUMNS, query, params, fmt):
+            output.write(chunk)
+    finally:
+        db_pool.release(db)
+
+@app.cli.command("export-users")
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Default: stdout.")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default="csv", show_default=True)
+@click.option("--role", type=click.Choice(["citizen", "government", "admin"]))
+def export_users_command(output, fmt, role):
+    """Stream users (without passwords or Aadhaar numbers) as CSV or JSONL."""
+    db = db_pool.acquire()
+    query, params = user_export_query(role)
+    try:
+        for chunk in iter_export(db.cursor(), USER_EXPORT_COLUMNS, query, params, fmt):
+            output.write(chunk)
+    finally:
+        db_pool.release(db)
+
+@app.cli.command("generate-data")
+@click.option("--complaints", default=10000, show_default=True)
+@click.option("--citizens", default=1000, show_default=True)
+@click.option("--officers", default=5, show_default=True, help="Officers per department.")
+@click.option("--seed", default=42, show_default=True)
+@click.option("--batch-size", default=5000, show_default=True)
+def generate_data_command(complaints, citizens, officers, seed, batch_size):
+    """Add a reproducible synthetic dataset to the database at DATABASE_PATH."""
+    db = db_pool.acquire()
+    started = time.perf_counter()
+    try:
+        generate(
+            db, complaints, citizens, officers, seed, batch_size,
+            on_batch=lambda done, rate: print(f"  {done} complaints, {rate:.0f} rows/s")
+        )
+        job_queue.enqueue(db.cursor(), "index_duplicates")
+        # The generated complaints go to officers like submitted ones
+        job_queue.enqueue(db.cursor(), "rebalance_assignments")
+        db.commit()
+    finally:
+        db_pool.release(db)
+    print(f"Generated {citizens} citizens and {complaints} complaints in {time.perf_counter() - started:.1f}s")
+
+@app.cli.command("benchmark")
+@click.option("--requests", "count", default=100, show_default=True, help="Requests per route and client.")
+@click.option("--concurrency", default=8, show_default=True, help="Concurrent HTTP clients.")
+@click.option("--output", type=click.File("w"), default="benchmark.json", show_default=True)
+@click.option("--baseline", type=click.File("r"), help="Earlier results to compare p95 against.")
+@click.option("--no-cache", is_flag=True, help="Disable the response cache while timing.")
+def benchmark_command(count, concurrency, output, baseline, no_cache):
+    """Time every main route and save p50/p95/p99, throughput and query counts as JSON."""
+    db = db_pool.acquire()
+    credentials = {"admin": (DEFAULT_ADMIN_EMAIL, "admin123")}
+    for role in ("citizen", "government"):
+        row = db.execute("""
+        SELECT email, password FROM users
+        WHERE role=? AND status='active' AND (role != 'citizen' OR aadhaar IS NOT NULL)
+        ORDER BY id LIMIT 1
+        """, (role,)).fetchone()
+        if not row:
+            db_pool.release(db)
+            raise SystemExit(f"No active {role} account; run `flask generate-data` first")
+        credentials[role] = row
+    complaints = read_counter(db.cursor(), "complaints")
+    db_pool.release(db)
+
+    if no_cache:
+        response_cache.max_entries = 0
+    print(f"Benchmarking against {complaints} complaints")
+    results = run_benchmark(
+        app, db_pool, credentials, count, concurrency,
+        on_route=lambda name, clients: print(f"{name:22} " + "  ".join(
+            f"{client} p50 {summary['p50_ms']}ms p95 {summary['p95_ms']}ms "
+            f"{summary['queries_per_request']} queries" + (f" {summary['errors']} errors" if summary["errors"] else "")
+            for client, summary in clients.items()
+        ))
+    )
+    results["meta"].update(complaints=complaints, response_cache=not no_cache)
+    json.dump(results, output, indent=2)
+    print(f"Saved results to {output.name}")
+
+    if baseline:
+        for name, client, before, after, change in compare_benchmarks(json.load(baseline), results):
+            flag = "  REGRESSION" if change > 0.2 else ""
+            print(f"{name:22} {client:12} p95 {before}ms -> {after}ms ({change:+.0%}){flag}")
+
+@app.cli.command("benchmark-writes")
+@click.option("--requests", "count", default=400, show_default=True, help="Reports submitted per mode.")
+@click.option("--concurrency", default=16, show_default=True, help="Citizens submitting at once.")
+@click.option("--output", type=click.File("w"), default="benchmark-writes.json", show_default=True)
+def benchmark_writes_command(count, concurrency, output):
+    """Compare report submission with per-request commits against group commits."""
+    db = db_pool.acquire()
+    row = db.execute("""
+    SELECT email, password FROM users
+    WHERE role='citizen' AND status='active' AND aadhaar IS NOT NULL
+    ORDER BY id LIMIT 1
+    """).fetchone()
+    db_pool.release(db)
+    if not row:
+        raise SystemExit("No active citizen account; run `flask generate-data` first")
+
+    # Backlogged jobs (e.g. indexing after generate-data) would compete for the write lock
+    job_queue.run_until_idle()
+    print(f"Submitting {count} reports per mode from {concurrency} clients (this writes to {DB_PATH})")
+    modes = {}
+    batching = app.config["WRITE_BATCHING"]
+    try:
+        for mode, enabled in (("per_request", False), ("batched", True)):
+            app.config["WRITE_BATCHING"] = enabled
+            before = write_batcher.stats()
+            modes[mode] = run_writes(app, {"citizen": row}, count, concurrency)
+            after = write_batcher.stats()
+            if enabled:
+                batches = after["batches"] - before["batches"]
+                modes[mode]["batches"] = batches
+                modes[mode]["mean_batch"] = round((after["operations"] - before["operations"]) / batches, 2) if batches else 0.0
+            summary = modes[mode]
+            print(
+                f"{mode:12} {summary['throughput_rps']} req/s  p50 {summary['p50_ms']}ms "
+                f"p95 {summary['p95_ms']}ms p99 {summary['p99_ms']}ms"
+                + (f"  {summary['mean_batch']} per batch" if enabled else "")
+                + (f"  {summary['errors']} errors" if summary["errors"] else "")
+            )
+    finally:
+        app.config["WRITE_BATCHING"] = batching
+
+    results = {
+        "meta": {
+            "requests": count,
+            "concurrency": concurrency,
+            "per_request_synchronous": app.config["DB_PRAGMAS"]["synchronous"],
+            "batched_synchronous": app.config["WRITE_BATCH_SYNCHRONOUS"],
+            "batch_delay_ms": app.config["WRITE_BATCH_DELAY_MS"],
+            "batch_max": app.config["WRITE_BATCH_MAX"],
+        },
+        "modes": modes,
+    }
+    json.dump(results, output, indent=2)
+    print(f"Saved results to {output.name}")
+
+# ================= INSTRUMENTATION =================
+metrics = MetricsRegistry()
+metrics.describe("civicfix_http_requests_total", "counter", "Requests by route, method and status")
+metrics.describe("civicfix_http_request_duration_seconds", "histogram", "Request latency by route")
+metrics.describe("civicfix_sql_statements_per_request", "histogram", "SQL statements run per request")
+metrics.describe("civicfix_sql_seconds_per_request", "histogram", "Time SQLite spent executing per request")
+metrics.describe("civicfix_sql_slow_queries_total", "counter", "Statements slower than SLOW_QUERY_MS")
+metrics.describe("civicfix_template_render_seconds", "histogram", "Template render time by template")
+metrics.describe("civicfix_write_batch_size", "histogram", "Writes committed per group commit")
+metrics.describe("civicfix_write_batch_wait_seconds", "histogram", "Time a write queued before its batch started")
+metrics.describe("civicfix_write_batch_commit_seconds", "histogram", "Time to run and commit one batch")
+metrics.describe("civicfix_write_batch_failures_total", "counter", "Batched writes rolled back or failed")
+
+def log_slow_query(sql, seconds):
+    # Batched writes are timed on the writer thread, outside the request
+    route = (request.endpoint or "unmatched") if has_request_context() else "write_batcher"
+    metrics.inc("civicfix_sql_slow_queries_total", route=route)
+    app.logger.warning("Slow query (%.1f ms) in %s: %s", seconds * 1000, route, sql)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.setdefault("template_started", []).append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def record_template_time(sender, template, context, **extra):
+    started = g.template_started.pop()
+    metrics.observe("civicfix_template_render_seconds", time.perf_counter() - started, template=template.name)
+
+@app.after_request
+def record_request_metrics(response):
+    # Registered before compress_response, so it runs after it and the
+    # latency includes compression
+    route = request.endpoint or "unmatched"
+    metrics.inc("civicfix_http_requests_total", route=route, method=request.method, status=response.status_code)
+    if "request_started" in g:
+        metrics.observe(
+            "civicfix_http_request_duration_seconds", time.perf_counter() - g.request_started, route=route
+        )
+    if "sql" in g:
+        g.sql.close()
+        metrics.observe("civicfix_sql_statements_per_request", g.sql.statements, COUNT_BUCKETS, route=route)
+        metrics.observe("civicfix_sql_seconds_per_request", g.sql.seconds, route=route)
+    return response
+
+# ================= HELPER FUNCTIONS =================
+UserContext = namedtuple("UserContext", [
+    "id", "name", "email", "role", "status", "department",
+    "aadhaar", "dob", "gender", "address", "profile_complete"
+])
+
+def user_context(row):
+    user_id, name, email, role, status, department, gov_id, aadhaar, dob, gender, address = row
+    if role == "government":
+        department = officer_department(department, gov_id)
+    return UserContext(
+        user_id, name, email, role, status, department, aadhaar, dob, gender, address,
+        # Citizens must fill these before reporting issues
+        profile_complete=all([aadhaar, dob, gender, address])
+    )
+
+def current_user():
+    """The signed-in user's row, loaded at most once per request
+
+    Returns None for anonymous requests. A session whose user no longer
+    exists is cleared and sent to the login page.
+    """
+    if "user" not in g:
+        g.user = None
+        if "user_id" in session:
+            cur = get_db().cursor()
+            cur.execute(USER_BY_ID_SQL, (session["user_id"],))
+            row = cur.fetchone()
+            if row is None:
+                session.clear()
+                abort(redirect("/login"))
+            g.user = user_context(row)
+    return g.user
 
 def is_basic_email(email):
     normalized_email = (email or "").strip()
@@ -132,34 +761,303 @@ def is_valid_mobile(mobile):
     normalized_mobile = (mobile or "").strip()
     return bool(re.fullmatch(r"[789]\d{9}", normalized_mobile))
 
-def require_role(role):
-    if session.get("role") != role:
-        return redirect("/login")
-    return None
+def role_required(role, api=False):
+    """Only let sessions with ``role`` through; pages redirect, JSON endpoints get 401
+
+    Checks the signed session only, so views that never call current_user()
+    run no users query.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if session.get("role") != role:
+                if api:
+                    return jsonify({"ok": False, "message": "Login required"}), 401
+                return redirect("/login")
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def conditional_get(*tables, source=None, flashes=True):
+    """Answer repeat GETs with 304 while ``tables`` (or keys bumped with bump_version) are unchanged
+
+    The strong ETag covers the URL, the signed-in user, the newest complaint
+    id and the table versions, so a match is decided with two indexed
+    lookups before the view queries or renders anything. ``source`` is the
+    connection getter the view reads from (default get_db), so a view served
+    from the analytics snapshot is tagged with the snapshot's versions.
+    ``flashes=False`` marks a view whose response never shows (or clears)
+    flash messages, so pending ones do not keep it from being tagged.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages are part of the page; always render those
+            if "role" not in session or (flashes and "_flashes" in session):
+                return view(*args, **kwargs)
+
+            cur = (source or get_db)().cursor()
+            cur.execute(NEWEST_COMPLAINT_SQL)
+            max_id = cur.fetchone()[0]
+            fingerprint = repr((
+                request.full_path, session["role"], session.get("user_id"),
+                max_id, table_versions(cur, tables)
+            ))
+            etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+
+            # compress_response tags gzipped bodies as a separate representation
+            matched = next(
+                (tag for tag in (etag, etag + "-gzip") if request.if_none_match.contains(tag)), None
+            )
+            if matched:
+                response = make_response("", 304)
+                response.set_etag(matched)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "text/csv",
+    "application/json", "application/javascript", "text/javascript",
+}
+
+@app.after_request
+def compress_response(response):
+    """Gzip large text bodies for clients that accept it"""
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "gzip" not in request.accept_encodings
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < app.config["GZIP_MIN_SIZE"]:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=app.config["GZIP_LEVEL"]))
+    response.headers["Content-Encoding"] = "gzip"
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + "-gzip", weak)
+    return response
+
+def issue_filters(cur):
+    """admin_issues filters from the query string: (filters, area_id, area_name)
+
+    ``filters`` holds (column, value) equality pairs; empty values mean "any".
+    """
+    selected_area = request.args.get("area", type=int)
+    # An area id at any level (city, ward or area) filters on its own column
+    area_column, area_value, selected_area_name = (
+        (area_filter(cur, selected_area) if selected_area else None) or (None, None, None)
+    )
+    filters = (
+        (area_column, area_value),
+        ("status", request.args.get("status", "")),
+        ("priority", request.args.get("priority", "")),
+        ("department", request.args.get("department", "")),
+    )
+    return filters, selected_area if area_column else None, selected_area_name
+
+def complaint_trend(cur, dimension, value=""):
+    """Daily rollups for the last TREND_DAYS days: (days, summary)"""
+    since = date.today() - timedelta(days=app.config["TREND_DAYS"] - 1)
+    return trend(cur, dimension, value, since.isoformat())
+
+def officer_department(department, gov_id):
+    """Use explicit department if set; fallback for legacy gov_id-based users."""
+    if department:
+        return department
+    dept_code = gov_id[0] if gov_id else "W"
+    return DEPARTMENT_BY_CODE.get(dept_code, DEFAULT_DEPARTMENT)
 
 def fetch_officers(cur, status):
-    cur.execute("""
-    SELECT id, name, email, gov_id, department
-    FROM users
-    WHERE role='government' AND status=?
-    ORDER BY id DESC
-    """, (status,))
+    cur.execute(OFFICERS_SQL, (status,))
     return cur.fetchall()
 
+def fetch_feed_page(cur, before_id=None, limit=None):
+    """Keyset page of the public feed, newest first; returns (rows, next_cursor)"""
+    limit = limit or app.config["FEED_PAGE_SIZE"]
+    # Seek from the cursor on the rowid and read one extra row to know whether
+    # another page exists, so every page costs the same however large the table.
+    cur.execute(FEED_PAGE_SQL, (before_id or MAX_ROWID, limit + 1))
+    rows = cur.fetchall()
+    next_cursor = rows[limit - 1][7] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def fetch_department_page(cur, department, status=None, priority=None, before_id=None, limit=None):
+    """Keyset page of a department's complaints; returns (rows, next_cursor)
+
+    Linked duplicate reports are left out; their parent shows the count.
+    """
+    limit = limit or app.config["GOV_PAGE_SIZE"]
+    cur.execute(*department_page_query(department, status, priority, before_id, limit + 1))
+    rows = cur.fetchall()
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
 def fetch_citizens(cur):
-    cur.execute("""
-    SELECT id, name, email
-    FROM users
-    WHERE role='citizen'
-    ORDER BY id DESC
-    """)
+    cur.execute(CITIZENS_SQL)
     return cur.fetchall()
 
+def notify_status_change(cur, complaint_id, citizen_id, department, status, previous_status):
+    """Queue the notification and live event for a complaint and its linked reports"""
+    # trg_complaints_linked_status has already moved the linked reports along
+    cur.execute(LINKED_REPORTS_SQL, (complaint_id,))
+    for changed_id, changed_citizen_id in [(complaint_id, citizen_id), *cur.fetchall()]:
+        job_queue.enqueue(cur, "status_notification", {
+            "complaint_id": changed_id,
+            "citizen_id": changed_citizen_id,
+            "status": status
+        })
+        publish(cur, [citizen_channel(changed_citizen_id), department_channel(department)], "complaint_status", {
+            "id": changed_id,
+            "status": status,
+            "previous_status": previous_status
+        })
+
+# ================= BACKGROUND JOBS =================
+@job("renditions")
+def renditions_job(payload):
+    upload_store.generate_renditions(payload["filename"])
+    # Pages rendered while only the original existed now change their ETag
+    db = db_pool.acquire()
+    try:
+        bump_version(db.cursor(), "renditions")
+        db.commit()
+    finally:
+        db_pool.release(db)
+
+@job("backfill_areas")
+def backfill_areas_job(payload, batches=20):
+    # Bounded slice per run so the job stays well inside its lease;
+    # it re-enqueues itself until no complaint is left unmapped.
+    db = db_pool.acquire()
+    try:
+        cur = db.cursor()
+        for _ in range(batches):
+            updated = backfill_batch(cur)
+            db.commit()
+            if not updated:
+                return
+        job_queue.enqueue(cur, "backfill_areas")
+        db.commit()
+    finally:
+        db_pool.release(db)
+
+@job("index_duplicates")
+def index_duplicates_job(payload, batches=20):
+    # Signs complaints that arrived by import or generate-data, bounded
+    # like backfill_areas
+    db = db_pool.acquire()
+    try:
+        cur = db.cursor()
+        for _ in range(batches):
+            indexed = index_batch(cur)
+            db.commit()
+            if not indexed:
+                return
+        job_queue.enqueue(cur, "index_duplicates")
+        db.commit()
+    finally:
+        db_pool.release(db)
+
+@job("rebalance_assignments")
+def rebalance_assignments_job(payload):
+    # Runs again while it still finds work to move; each pass holds the
+    # write lock so submissions see consistent loads
+    db = db_pool.acquire()
+    try:
+        cur = db.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            changes = rebalance_departments(cur, app.config["REBALANCE_BATCH_SIZE"])
+            if changes:
+                job_queue.enqueue(cur, "rebalance_assignments")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    finally:
+        db_pool.release(db)
+
+@job("archive_complaints")
+def archive_complaints_job(payload, batches=20):
+    # Bounded like backfill_areas; runs again at once while a backlog
+    # remains, otherwise after ARCHIVE_INTERVAL
+    days = app.config["ARCHIVE_AFTER_DAYS"]
+    if days <= 0:
+        # Archiving is off: end the chain; init_db starts a new one once enabled
+        return
+    db = db_pool.acquire()
+    try:
+        delay = app.config["ARCHIVE_INTERVAL"]
+        cutoff = archive_cutoff(days)
+        for _ in range(batches):
+            if archive_batch(db, cutoff, app.config["ARCHIVE_BATCH_SIZE"]) < app.config["ARCHIVE_BATCH_SIZE"]:
+                break
+        else:
+            delay = 0
+        job_queue.enqueue(db.cursor(), "archive_complaints", delay=delay)
+        db.commit()
+    finally:
+        db_pool.release(db)
+
+@job("analytics_snapshot")
+def analytics_snapshot_job(payload):
+    path = app.config["ANALYTICS_SNAPSHOT_PATH"]
+    if not path:
+        return
+    db = db_pool.acquire()
+    try:
+        size, elapsed = take_snapshot(db, path)
+        app.logger.info("Analytics snapshot: %d bytes in %.2fs", size, elapsed)
+        job_queue.enqueue(db.cursor(), "analytics_snapshot", delay=app.config["ANALYTICS_SNAPSHOT_INTERVAL"])
+        db.commit()
+    finally:
+        db_pool.release(db)
+
+@job("status_notification")
+def status_notification_job(payload):
+    # Demo mode, like OTP delivery: log instead of sending email/SMS
+    app.logger.info(
+        "Notify citizen %s: complaint %s is now %s",
+        payload["citizen_id"], payload["complaint_id"], payload["status"]
+    )
+
 # ================= PUBLIC =================
 @app.route("/")
 def index():
     return render_template("index.html")
 
+@app.route("/assets/<filename>")
+def hashed_asset(filename):
+    # Names change with content, so browsers and CDNs may keep a copy for good
+    found = asset_pipeline.find(filename, request.accept_encodings)
+    if found is None:
+        abort(404)
+    path, encoding = found
+    response = send_file(
+        path, mimetype=mimetypes.guess_type(filename)[0], conditional=True,
+        max_age=app.config["ASSET_MAX_AGE"]
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.immutable = True
+    return response
+
 
 @app.route("/generate-otp", methods=["POST"])
 def generate_otp():
@@ -197,6 +1095,38 @@ def generate_otp():
 
 
 
+@app.route("/events")
+def live_events():
+    """Server-Sent Events for the signed-in citizen's complaints or the officer's department"""
+    role = session.get("role")
+    if role == "citizen":
+        channels = [citizen_channel(session["user_id"])]
+    elif role == "government":
+        channels = [department_channel(current_user().department)]
+    else:
+        return jsonify({"ok": False, "message": "Login required"}), 401
+
+    event_broker.start()
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    heartbeat = app.config["SSE_HEARTBEAT"]
+
+    # Not wrapped in stream_with_context: the request's pooled connection is
+    # returned before streaming starts, so idle subscribers hold no connection.
+    def stream():
+        subscription = event_broker.subscribe(channels, last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            while not subscription.overflowed:
+                event = subscription.get(heartbeat)
+                yield format_event(*event) if event else ": keep-alive\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return Response(stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 # ================= AUTH =================
 @app.route("/signup", methods=["GET", "POST"])
 def signup():
@@ -237,12 +1167,12 @@ def signup():
 
         db = get_db()
         cur = db.cursor()
-        cur.execute("SELECT id FROM users WHERE email=?", (email,))
+        cur.execute(USER_BY_EMAIL_SQL, (email,))
         if cur.fetchone():
             flash("Email already registered")
             return redirect("/signup")
 
-        cur.execute("SELECT id FROM users WHERE mobile=?", (mobile,))
+        cur.execute(USER_BY_MOBILE_SQL, (mobile,))
         if cur.fetchone():
             flash("Mobile number already registered")
             return redirect("/signup")
@@ -271,26 +1201,25 @@ def login():
 
         db = get_db()
         cur = db.cursor()
-        cur.execute("""
-        SELECT id, role, status FROM users
-        WHERE email=? AND password=?
-        """, (email, password))
-        user = cur.fetchone()
+        cur.execute(USER_BY_LOGIN_SQL, (email, password))
+        row = cur.fetchone()
 
-        if not user:
+        if not row:
             flash("Invalid credentials")
             return redirect("/login")
 
-        if user[1] == "government" and user[2] != "active":
+        user = user_context(row)
+        if user.role == "government" and user.status != "active":
             flash("Government account not approved yet")
             return redirect("/login")
 
-        user_id, role = user[0], user[1]
-        session["user_id"] = user_id
+        role = user.role
+        session["user_id"] = user.id
         session["role"] = role
+        g.user = user
 
         if role == "citizen":
-            if not is_profile_complete(user_id):
+            if not user.profile_complete:
                 flash("Please complete your profile to report issues", "info")
             return redirect("/citizen/home")
 
@@ -308,30 +1237,61 @@ def logout():
 
 # ================= CITIZEN =================
 @app.route("/citizen/home")
+@role_required("citizen")
+@conditional_get("complaints", "users", "renditions")
 def citizen_home():
-    if role_check := require_role("citizen"):
-        return role_check
+    db = get_db()
+    cur = db.cursor()
+    versions = table_versions(cur, ("complaints",))
+    issues, next_cursor = response_cache.get_or_set(
+        ("citizen", "feed", None, app.config["FEED_PAGE_SIZE"], versions),
+        lambda: fetch_feed_page(cur)
+    )
+
+    return render_template("citizen/home.html", issues=issues, next_cursor=next_cursor)
+
+@app.route("/citizen/feed")
+@role_required("citizen", api=True)
+@conditional_get("complaints", "users", "renditions", flashes=False)
+def citizen_feed():
+    before_id = request.args.get("before", type=int)
+    limit = min(request.args.get("limit", app.config["FEED_PAGE_SIZE"], type=int), 100)
+    if limit < 1:
+        return jsonify({"ok": False, "message": "limit must be positive"}), 400
 
     db = get_db()
     cur = db.cursor()
-    cur.execute("""
-    SELECT complaints.title, complaints.description, complaints.location,
-           complaints.priority, complaints.status, complaints.image, users.name
-    FROM complaints
-    JOIN users ON complaints.citizen_id = users.id
-    ORDER BY complaints.id DESC
-    """)
-    issues = cur.fetchall()
+    versions = table_versions(cur, ("complaints",))
+    issues, next_cursor = response_cache.get_or_set(
+        ("citizen", "feed", before_id, limit, versions),
+        lambda: fetch_feed_page(cur, before_id, limit)
+    )
 
-    return render_template("citizen/home.html", issues=issues)
+    return jsonify({
+        "ok": True,
+        "items": [
+            {
+                "id": row[7],
+                "title": row[0],
+                "description": row[1],
+                "location": row[2],
+                "priority": row[3],
+                "status": row[4],
+                "image": row[5],
+                "reporter": row[6],
+                "upvotes": row[8],
+            }
+            for row in issues
+        ],
+        "html": render_template("citizen/feed_cards.html", issues=issues),
+        "next_cursor": next_cursor
+    })
 
 @app.route("/citizen/report", methods=["GET", "POST"])
+@role_required("citizen")
 def citizen_report():
-    if role_check := require_role("citizen"):
-        return role_check
-    
     # Check if profile is complete before allowing issue submission
-    if not is_profile_complete(session["user_id"]):
+    if not current_user().profile_complete:
         flash("Please complete your profile before reporting issues", "info")
         return redirect("/citizen/profile/edit")
 
@@ -342,71 +1302,117 @@ def citizen_report():
         issue_type = request.form["type"]
         priority = request.form["priority"]
 
-        image_file = request.files.get("image")
-        filename = None
-
-        if image_file and image_file.filename:
-            filename = secure_filename(image_file.filename)
-            image_file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
-
         from datetime import datetime
         current_date = datetime.now().strftime("%Y-%m-%d")
-        
-        db = get_db()
-        cur = db.cursor()
-        cur.execute("""
-        INSERT INTO complaints
-        (title,description,location,department,citizen_id,priority,status,image,date)
-        VALUES (?,?,?,?,?,?,?,?,?)
-        """, (
-            title, description, location,
-            DEPARTMENT_BY_ISSUE_TYPE.get(issue_type),
-            session["user_id"], priority,
-            "Pending", filename, current_date
-        ))
-        db.commit()
+        citizen_id = session["user_id"]
+        department = DEPARTMENT_BY_ISSUE_TYPE.get(issue_type)
+        scope = duplicate_scope(department, location)
+        text_signature = signature(title, description, location)
+        threshold = app.config["DUPLICATE_THRESHOLD"]
+
+        # The photo goes to disk before the write; only its row joins the batch
+        image_file = request.files.get("image")
+        upload = upload_store.store(image_file) if image_file and image_file.filename else None
+
+        def submit_report(cur):
+            filename = None
+            if upload:
+                filename, sha256, size, duplicate_image = upload
+                upload_store.record(cur, sha256, filename, size)
+                if not duplicate_image:
+                    job_queue.enqueue(cur, "renditions", {"filename": filename})
+
+            area_id, ward_id, city_id = resolve_area(cur, location)
+
+            # The duplicate lookup runs under the write lock, so two reports
+            # submitted together cannot both become parents
+            duplicate = find_duplicate(cur, scope, text_signature, threshold) if threshold > 0 else None
+            parent_id, status = None, "Pending"
+            if duplicate:
+                parent_id = duplicate[0]
+                # A linked report starts where its parent is
+                cur.execute("SELECT status FROM complaints WHERE id=?", (parent_id,))
+                status = cur.fetchone()[0]
+            # New work goes to the officer with the lightest open load; a linked
+            # report is handled by whoever has its parent
+            assigned_to = None if parent_id else least_loaded_officer(cur, department)
+
+            cur.execute("""
+            INSERT INTO complaints
+            (title,description,location,department,citizen_id,priority,status,image,assigned_to,date,
+             area_id,ward_id,city_id,parent_id)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """, (
+                title, description, location, department,
+                citizen_id, priority,
+                status, filename, assigned_to, current_date,
+                area_id, ward_id, city_id, parent_id
+            ))
+            complaint_id = cur.lastrowid
+            index_complaint(cur, complaint_id, scope, text_signature)
+
+            created = {
+                "id": complaint_id,
+                "title": title,
+                "location": location,
+                "priority": priority,
+                "status": status,
+                "date": current_date
+            }
+            if parent_id is None:
+                publish(cur, [citizen_channel(citizen_id), department_channel(department)], "complaint_created", created)
+            else:
+                # Officers see the parent's count go up instead of a new row
+                cur.execute("SELECT upvotes FROM complaints WHERE id=?", (parent_id,))
+                upvotes = cur.fetchone()[0]
+                publish(cur, [citizen_channel(citizen_id)], "complaint_created", created)
+                publish(cur, [department_channel(department)], "complaint_linked", {
+                    "id": complaint_id,
+                    "parent_id": parent_id,
+                    "upvotes": upvotes,
+                    "status": status
+                })
+
+        try:
+            write(submit_report)
+        except WriterUnavailable:
+            # The write may yet commit, so the photo stays
+            raise
+        except Exception:
+            if upload and not upload[3]:
+                filename, sha256, _, _ = upload
+                upload_store.discard(get_db().cursor(), sha256, filename)
+            raise
+        job_queue.wake()
+        event_broker.wake()
 
         return redirect("/citizen/my-issues")
 
     return render_template("citizen/report.html")
 
 @app.route("/citizen/my-issues")
+@role_required("citizen")
+@conditional_get("complaints", "renditions")
 def citizen_my_issues():
-    if role_check := require_role("citizen"):
-        return role_check
-
     db = get_db()
     cur = db.cursor()
-    cur.execute("""
-    SELECT title, location, priority, status, image
-    FROM complaints
-    WHERE citizen_id=?
-    ORDER BY id DESC
-    """, (session["user_id"],))
+    cur.execute(MY_ISSUES_SQL, (session["user_id"],))
     issues = cur.fetchall()
 
     return render_template("citizen/my_issues.html", issues=issues)
 
 @app.route("/citizen/profile")
+@role_required("citizen")
 def citizen_profile():
-    if role_check := require_role("citizen"):
-        return role_check
-
-    db = get_db()
-    cur = db.cursor()
-    cur.execute("""
-    SELECT name,email,aadhaar,dob,gender,address
-    FROM users WHERE id=?
-    """, (session["user_id"],))
-    user = cur.fetchone()
-
-    return render_template("citizen/profile.html", user=user)
+    user = current_user()
+    return render_template(
+        "citizen/profile.html",
+        user=(user.name, user.email, user.aadhaar, user.dob, user.gender, user.address)
+    )
 
 @app.route("/citizen/profile/edit", methods=["GET", "POST"])
+@role_required("citizen")
 def citizen_profile_edit():
-    if role_check := require_role("citizen"):
-        return role_check
-    
     if request.method == "POST":
         aadhaar = request.form["aadhaar"]
         dob = request.form["dob"]
@@ -426,59 +1432,118 @@ def citizen_profile_edit():
         return redirect("/citizen/profile")
     
     # GET request - show form with current data
-    db = get_db()
-    cur = db.cursor()
-    cur.execute("""
-    SELECT name, email, aadhaar, dob, gender, address
-    FROM users WHERE id=?
-    """, (session["user_id"],))
-    user = cur.fetchone()
-    
-    return render_template("citizen/profile_edit.html", user=user)
+    user = current_user()
+    return render_template(
+        "citizen/profile_edit.html",
+        user=(user.name, user.email, user.aadhaar, user.dob, user.gender, user.address)
+    )
 
 #  ADMIN 
-@app.route("/admin/dashboard")
-def admin_dashboard():
-    if role_check := require_role("admin"):
-        return role_check
+@app.route("/admin/db-pool")
+@role_required("admin")
+def admin_db_pool():
+    return jsonify({
+        **db_pool.stats(),
+        "analytics": analytics_pool.stats(),
+        "write_batcher": {**write_batcher.stats(), "enabled": app.config["WRITE_BATCHING"]},
+    })
+
+@app.route("/metrics")
+def metrics_endpoint():
+    # Scrapers authenticate with METRICS_TOKEN; people with an admin session
+    token = app.config["METRICS_TOKEN"]
+    authorization = request.headers.get("Authorization", "")
+    if not (token and hmac.compare_digest(authorization, f"Bearer {token}")) and session.get("role") != "admin":
+        return redirect("/login")
+
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/admin/cache-stats")
+@role_required("admin")
+def admin_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route("/admin/upload-stats")
+@role_required("admin")
+def admin_upload_stats():
+    db = get_db()
+    return jsonify(upload_store.stats(db.cursor()))
+
+@app.route("/admin/jobs")
+@role_required("admin")
+def admin_jobs():
+    status_filter = request.args.get("status", "")
+    if status_filter not in JOB_STATUSES:
+        status_filter = ""
 
     db = get_db()
     cur = db.cursor()
 
-    # Get statistics
-    cur.execute("SELECT COUNT(*) FROM users WHERE role='government' AND status='active'")
-    total_officers = cur.fetchone()[0]
-    
-    cur.execute("SELECT COUNT(*) FROM users WHERE role='citizen'")
-    total_citizens = cur.fetchone()[0]
-    
-    cur.execute("SELECT COUNT(*) FROM complaints")
-    total_issues = cur.fetchone()[0]
-    
-    cur.execute("SELECT COUNT(*) FROM users WHERE role='government' AND status='pending'")
-    pending_count = cur.fetchone()[0]
+    return render_template(
+        "admin/jobs.html",
+        counts=job_counts(cur),
+        jobs=recent_jobs(cur, status_filter),
+        statuses=JOB_STATUSES,
+        selected_status=status_filter
+    )
 
-    # Get all complaints
-    cur.execute("SELECT * FROM complaints ORDER BY id DESC")
-    complaints = cur.fetchall()
+@app.route("/admin/jobs/<int:job_id>/retry", methods=["POST"])
+@role_required("admin")
+def retry_job(job_id):
+    db = get_db()
+    cur = db.cursor()
+    if job_queue.retry(cur, job_id):
+        db.commit()
+        job_queue.wake()
+        flash(f"Job #{job_id} queued again.", "success")
+    else:
+        flash("Only failed jobs can be retried.", "error")
+    return redirect("/admin/jobs?status=failed")
 
-    pending_gov = fetch_officers(cur, "pending")
-    approved_officers = fetch_officers(cur, "active")
-    citizens = fetch_citizens(cur)
+@app.route("/admin/dashboard")
+@role_required("admin")
+def admin_dashboard():
+    cur = get_analytics_db().cursor()
 
+    # Get statistics
+    total_officers = read_counter(cur, "users_by_role_status", "government/active")
+    total_citizens = read_counter(cur, "users_by_role", "citizen")
+    total_issues = read_counter(cur, "complaints")
+    pending_count = read_counter(cur, "users_by_role_status", "government/pending")
+
+    # Trend panels read the daily rollups, a row per day per department
+    trend_days, trend_summary = complaint_trend(cur, "all")
+    department_trends = [
+        (department, complaint_trend(cur, "department", department)[1])
+        for department in GOV_DEPARTMENTS
+    ]
+
+    # Tables are fetched from /admin/api/<listing> as each panel is opened
     return render_template(
         "admin/dashboard.html",
         total_officers=total_officers,
         total_citizens=total_citizens,
         total_issues=total_issues,
         pending_count=pending_count,
-        complaints=complaints,
-        pending=pending_gov,
-        approved_officers=approved_officers,
-        citizens=citizens
+        trend_days=trend_days,
+        trend_summary=trend_summary,
+        department_trends=department_trends
     )
 
+@app.route("/admin/api/<name>")
+@role_required("admin", api=True)
+@conditional_get("complaints", "users", source=get_analytics_db, flashes=False)
+def admin_listing(name):
+    if name not in LISTINGS:
+        return jsonify({"ok": False, "message": f"Unknown listing {name}"}), 404
+
+    try:
+        return jsonify(fetch_listing(get_analytics_db().cursor(), name, request.args))
+    except ListingError as error:
+        return jsonify({"ok": False, "message": str(error)}), 400
+
 @app.route("/admin/approve/<int:user_id>")
+@role_required("admin")
 def approve_government(user_id):
     db = get_db()
     cur = db.cursor()
@@ -486,22 +1551,27 @@ def approve_government(user_id):
     UPDATE users SET status='active'
     WHERE id=? AND role='government'
     """, (user_id,))
+    # The new officer takes pending work from the busiest colleagues
+    job_queue.enqueue(cur, "rebalance_assignments")
     db.commit()
+    job_queue.wake()
     return redirect("/admin/officers")
 
 @app.route("/admin/reject/<int:user_id>")
+@role_required("admin")
 def reject_government(user_id):
     db = get_db()
     cur = db.cursor()
     cur.execute("DELETE FROM users WHERE id=?", (user_id,))
+    # A removed officer's open complaints go to the rest of the department
+    job_queue.enqueue(cur, "rebalance_assignments")
     db.commit()
+    job_queue.wake()
     return redirect("/admin/officers")
 
 @app.route("/admin/officers")
+@role_required("admin")
 def admin_officers():
-    if role_check := require_role("admin"):
-        return role_check
-
     db = get_db()
     cur = db.cursor()
 
@@ -511,14 +1581,13 @@ def admin_officers():
     return render_template(
         "admin/officers.html",
         pending=pending_gov,
-        approved_officers=approved_officers
+        approved_officers=approved_officers,
+        loads=officer_loads(cur)
     )
 
 @app.route("/admin/citizens")
+@role_required("admin")
 def admin_citizens():
-    if role_check := require_role("admin"):
-        return role_check
-
     db = get_db()
     cur = db.cursor()
     
@@ -530,83 +1599,48 @@ def admin_citizens():
     )
 
 @app.route("/admin/issues")
+@role_required("admin")
+@conditional_get("complaints", source=get_analytics_db, flashes=False)
 def admin_issues():
-    if role_check := require_role("admin"):
-        return role_check
+    cur = get_analytics_db().cursor()
 
-    db = get_db()
-    cur = db.cursor()
-    
     # Get filters from query parameters
-    area_filter = request.args.get("area", "")
+    filters, selected_area, selected_area_name = issue_filters(cur)
     status_filter = request.args.get("status", "")
     priority_filter = request.args.get("priority", "")
     department_filter = request.args.get("department", "")
-    
-    # Build dynamic query based on filters
-    query = """
-    SELECT id, title, location, department, priority, status, date
-    FROM complaints
-    WHERE 1=1
-    """
-    params = []
-    
-    for column, value in (
-        ("location", area_filter),
-        ("status", status_filter),
-        ("priority", priority_filter),
-        ("department", department_filter),
-    ):
-        if value:
-            query += f" AND {column}=?"
-            params.append(value)
-    
-    query += " ORDER BY id DESC"
-    
-    cur.execute(query, params)
-    complaints = cur.fetchall()
-    
-    # Get comprehensive statistics
-    
-    # Area-wise stats
-    cur.execute("""
-    SELECT location, COUNT(*) as count
-    FROM complaints
-    GROUP BY location
-    ORDER BY count DESC
-    """)
-    area_stats = cur.fetchall()
-    
-    # Status-wise stats
-    cur.execute("""
-    SELECT status, COUNT(*) as count
-    FROM complaints
-    GROUP BY status
-    """)
-    status_stats = cur.fetchall()
-    
-    # Priority-wise stats
-    cur.execute("""
-    SELECT priority, COUNT(*) as count
-    FROM complaints
-    GROUP BY priority
-    ORDER BY 
-        CASE priority
-            WHEN 'High' THEN 1
-            WHEN 'Medium' THEN 2
-            WHEN 'Low' THEN 3
-        END
-    """)
-    priority_stats = cur.fetchall()
-    
-    # Department-wise stats
-    cur.execute("""
-    SELECT department, COUNT(*) as count
-    FROM complaints
-    GROUP BY department
-    ORDER BY count DESC
-    """)
-    department_stats = cur.fetchall()
+    search_query = request.args.get("q", "").strip()
+    include_archived = request.args.get("archived") == "1"
+    page = max(request.args.get("page", 1, type=int), 1)
+    versions = table_versions(cur, ("complaints",))
+
+    def fetch_complaints():
+        if search_query:
+            return search_complaints(
+                cur, search_query, filters, page, app.config["SEARCH_PAGE_SIZE"], include_archived
+            )
+
+        cur.execute(*issue_list_query(filters, include_archived))
+        return cur.fetchall(), False
+
+    def fetch_stats():
+        # Comprehensive statistics from the trigger-maintained counters
+        return (
+            area_tree(cur),
+            read_counter_groups(cur, "status"),
+            sorted(
+                read_counter_groups(cur, "priority"),
+                key=lambda stat: PRIORITY_ORDER.get(stat[0], len(PRIORITY_ORDER) + 1)
+            ),
+            read_counter_groups(cur, "department", order_by_count=True),
+        )
+
+    complaints, has_next = response_cache.get_or_set(
+        ("admin", "issues", filters, search_query, include_archived, page, versions), fetch_complaints
+    )
+    area_stats, status_stats, priority_stats, department_stats = response_cache.get_or_set(
+        ("admin", "issue_stats", versions), fetch_stats
+    )
 
     return render_template(
         "admin/issues.html",
@@ -615,104 +1649,245 @@ def admin_issues():
         status_stats=status_stats,
         priority_stats=priority_stats,
         department_stats=department_stats,
-        selected_area=area_filter,
+        selected_area=selected_area,
+        selected_area_name=selected_area_name,
         selected_status=status_filter,
         selected_priority=priority_filter,
-        selected_department=department_filter
+        selected_department=department_filter,
+        search_query=search_query,
+        include_archived=include_archived,
+        page=page,
+        has_next=has_next
+    )
+
+@app.route("/admin/issues/export.csv")
+@role_required("admin")
+def export_issues():
+    cur = get_analytics_db().cursor()
+    filters, _, _ = issue_filters(cur)
+    query, params = complaint_export_query(
+        COMPLAINT_EXPORT_COLUMNS, filters, request.args.get("q", "").strip(),
+        include_archived=request.args.get("archived") == "1"
+    )
+    rows = iter_export(cur, COMPLAINT_EXPORT_COLUMNS, query, params)
+
+    return Response(
+        stream_with_context(rows),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=complaints.csv"}
     )
 
 # ================= GOVERNMENT =================
 @app.route("/government/dashboard")
+@role_required("government")
+@conditional_get("complaints", "users")
 def government_dashboard():
-    if role_check := require_role("government"):
-        return role_check
-
     db = get_db()
     cur = db.cursor()
+    officer = current_user()
+    department = officer.department
 
-    # Get government officer info
-    cur.execute("""
-    SELECT name, department, gov_id FROM users
-    WHERE id=?
-    """, (session["user_id"],))
-    officer = cur.fetchone()
-
-    # Use explicit department if set; fallback for legacy gov_id-based users.
-    department = officer[1] if officer and officer[1] else None
-    if not department:
-        dept_code = officer[2][0] if officer and officer[2] else "W"
-        department = DEPARTMENT_BY_CODE.get(dept_code, "Water Supply")
-
-    # Get all complaints for this department
-    cur.execute("""
-    SELECT id, title, location, status, priority, date
-    FROM complaints
-    WHERE department=?
-    ORDER BY id DESC
-    """, (department,))
-    complaints = cur.fetchall()
-
-    # Calculate statistics
-    total = len(complaints)
-    pending = sum(1 for c in complaints if c[3] == "Pending")
-    in_progress = sum(1 for c in complaints if c[3] == "In Progress")
-    resolved = sum(1 for c in complaints if c[3] == "Resolved")
+    status_filter = request.args.get("status", "")
+    priority_filter = request.args.get("priority", "")
+    if status_filter not in COMPLAINT_STATUSES:
+        status_filter = ""
+    if priority_filter not in COMPLAINT_PRIORITIES:
+        priority_filter = ""
+    before_id = request.args.get("before", type=int)
+    search_query = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    versions = table_versions(cur, ("complaints",))
+
+    def fetch_complaints():
+        if search_query:
+            matches, has_next = search_complaints(
+                cur, search_query,
+                (("department", department), ("status", status_filter), ("priority", priority_filter)),
+                page, app.config["SEARCH_PAGE_SIZE"], include_linked=False
+            )
+            # Reorder to the dashboard's (id, title, location, status, priority, date, snippet, upvotes)
+            return [(m[0], m[1], m[2], m[5], m[4], m[6], m[7], None) for m in matches], None, has_next
+        complaints, next_cursor = fetch_department_page(
+            cur, department, status_filter, priority_filter, before_id
+        )
+        return complaints, next_cursor, False
+
+    def fetch_stats():
+        # Statistics come from the counters table, not from the listed rows
+        return (
+            read_counter(cur, "department", department),
+            read_counter(cur, "department_status", f"{department}/Pending"),
+            read_counter(cur, "department_status", f"{department}/In Progress"),
+            read_counter(cur, "department_status", f"{department}/Resolved"),
+        )
+
+    complaints, next_cursor, has_next = response_cache.get_or_set(
+        ("government", department, status_filter, priority_filter, before_id,
+         search_query, page, versions),
+        fetch_complaints
+    )
+    total, pending, in_progress, resolved = response_cache.get_or_set(
+        ("government", department, "stats", versions), fetch_stats
+    )
+    trend_days, trend_summary = complaint_trend(get_analytics_db().cursor(), "department", department)
 
     return render_template(
         "government/dashboard.html",
-        officer_name=officer[0] if officer else "Officer",
+        officer_name=officer.name or "Officer",
         department=department,
         total=total,
         pending=pending,
         in_progress=in_progress,
         resolved=resolved,
-        complaints=complaints
+        complaints=complaints,
+        next_cursor=next_cursor,
+        is_first_page=before_id is None,
+        search_query=search_query,
+        page=page,
+        has_next=has_next,
+        statuses=COMPLAINT_STATUSES,
+        priorities=COMPLAINT_PRIORITIES,
+        selected_status=status_filter,
+        selected_priority=priority_filter,
+        trend_days=trend_days,
+        trend_summary=trend_summary
     )
 
 @app.route("/government/update-status/<int:complaint_id>", methods=["POST"])
+@role_required("government")
 def update_complaint_status(complaint_id):
-    if role_check := require_role("government"):
-        return role_check
-
     new_status = (request.form.get("status") or "").strip()
-    allowed_statuses = {"Pending", "In Progress", "Resolved"}
-    if new_status not in allowed_statuses:
+    if new_status not in COMPLAINT_STATUSES:
         flash("Please select a valid complaint status.", "error")
         return redirect("/government/dashboard")
 
-    db = get_db()
-    cur = db.cursor()
-
-    cur.execute("SELECT department FROM users WHERE id=?", (session["user_id"],))
-    officer_row = cur.fetchone()
-    officer_department = officer_row[0] if officer_row else None
-
-    cur.execute("SELECT status, department FROM complaints WHERE id=?", (complaint_id,))
-    complaint_row = cur.fetchone()
-    if not complaint_row:
+    officer = current_user()
+    officer_id = officer.id
+
+    def update_status(cur):
+        cur.execute(COMPLAINT_STATUS_SQL, (complaint_id,))
+        complaint_row = cur.fetchone()
+        if not complaint_row:
+            return "missing"
+        current_status, complaint_department, citizen_id, parent_id = complaint_row
+        if complaint_department != officer.department:
+            return "forbidden"
+        if parent_id is not None:
+            # Linked reports take their parent's status (trg_complaints_linked_status)
+            return "linked"
+        if current_status == new_status:
+            return "unchanged"
+
+        cur.execute(*status_update_query((complaint_id,), new_status, officer_id))
+        notify_status_change(cur, complaint_id, citizen_id, complaint_department, new_status, current_status)
+        return "updated"
+
+    outcome = write(update_status)
+    if outcome == "missing":
         flash("Complaint not found.", "error")
         return redirect("/government/dashboard")
-
-    current_status, complaint_department = complaint_row
-    if officer_department and complaint_department != officer_department:
+    if outcome == "forbidden":
         flash("You can only update complaints assigned to your department.", "error")
         return redirect("/government/dashboard")
-
-    if current_status == new_status:
+    if outcome == "linked":
+        flash("This report is linked to another complaint and follows its status; update that complaint instead.", "error")
+        return redirect("/government/dashboard")
+    if outcome == "unchanged":
         flash("No status change detected.", "info")
         return redirect("/government/dashboard")
 
-    cur.execute("""
-    UPDATE complaints
-    SET status=?, assigned_to=?
-    WHERE id=?
-    """, (new_status, session["user_id"], complaint_id))
-    db.commit()
+    job_queue.wake()
+    event_broker.wake()
     flash(f"Complaint status updated to {new_status}.", "success")
 
     return redirect("/government/dashboard")
 
+@app.route("/government/update-status", methods=["POST"])
+@role_required("government", api=True)
+def bulk_update_status():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        raw_ids = request.form.getlist("ids")
+        new_status = request.form.get("status")
+    else:
+        raw_ids = payload.get("ids") or []
+        new_status = payload.get("status")
+
+    new_status = (new_status or "").strip()
+    if new_status not in COMPLAINT_STATUSES:
+        return jsonify({"ok": False, "message": "Please select a valid complaint status."}), 400
+    try:
+        # dict.fromkeys drops repeats but keeps the order the officer selected
+        complaint_ids = list(dict.fromkeys(int(complaint_id) for complaint_id in raw_ids))
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "message": "Complaint ids must be integers."}), 400
+    if not complaint_ids:
+        return jsonify({"ok": False, "message": "Select at least one complaint."}), 400
+    if len(complaint_ids) > app.config["BULK_UPDATE_MAX"]:
+        return jsonify({
+            "ok": False,
+            "message": f"At most {app.config['BULK_UPDATE_MAX']} complaints can be updated at once."
+        }), 400
+
+    department = current_user().department
+    officer_id = session["user_id"]
+
+    # Runs under the write lock, so nothing changes between the ownership
+    # check and the update
+    def update_statuses(cur):
+        cur.execute(*complaint_statuses_query(complaint_ids))
+        found = {row[0]: row[1:] for row in cur.fetchall()}
+
+        results, changed = [], []
+        for complaint_id in complaint_ids:
+            if complaint_id not in found:
+                results.append({"id": complaint_id, "ok": False, "message": "Complaint not found."})
+                continue
+            current_status, complaint_department, citizen_id, parent_id = found[complaint_id]
+            if complaint_department != department:
+                results.append({
+                    "id": complaint_id, "ok": False,
+                    "message": "You can only update complaints assigned to your department."
+                })
+            elif parent_id is not None:
+                # Its parent's update moves it and notifies its citizen once
+                results.append({
+                    "id": complaint_id, "ok": False,
+                    "message": "This report is linked to another complaint and follows its status; update that complaint instead."
+                })
+            elif current_status == new_status:
+                results.append({
+                    "id": complaint_id, "ok": True, "status": current_status,
+                    "message": "No status change detected."
+                })
+            else:
+                changed.append((complaint_id, current_status, citizen_id))
+                results.append({"id": complaint_id, "ok": True, "status": new_status, "updated": True})
+
+        if changed:
+            cur.execute(*status_update_query([row[0] for row in changed], new_status, officer_id))
+            for complaint_id, current_status, citizen_id in changed:
+                notify_status_change(cur, complaint_id, citizen_id, department, new_status, current_status)
+        return results, changed
+
+    results, changed = write(update_statuses)
+
+    if changed:
+        job_queue.wake()
+        event_broker.wake()
+    return jsonify({
+        "ok": True,
+        "message": f"Updated {len(changed)} of {len(complaint_ids)} complaints to {new_status}.",
+        "updated": len(changed),
+        "results": results
+    })
+
 # ================= MAIN =================
+# Every worker (and `flask` CLI run) brings the schema up to date on import;
+# already-applied migrations are skipped after one PRAGMA read. Asset bundles
+# are only rebuilt when their sources differ from the last build.
+init_db()
+asset_pipeline.ensure_built()
+
 if __name__ == "__main__":
-    init_db()
     app.run(debug=True)
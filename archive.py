@@ -0,0 +1,179 @@
+"""Cold storage for old resolved complaints in an ATTACHed SQLite database.
+
+Every pooled connection attaches the archive file as ``archive`` and gets a
+TEMP view, ``all_complaints``, over the hot and archived rows. Listings and
+stat counters read only the hot ``complaints`` table; admin search and
+export opt in to the view. Rows move in batches: copied into the archive in
+one transaction, then deleted from the hot table in a second, so a crash
+between the two leaves a complaint in both places (finished by the next
+run) rather than in neither.
+"""
+import time
+from datetime import date, timedelta
+
+from analytics import read_only_uri
+from migrations import create_complaint_search, run_migrations
+
+ARCHIVE_SCHEMA = "archive"
+
+# Copied column for column; new complaint columns must be added here and
+# to the archive table by an ARCHIVE_MIGRATIONS entry
+ARCHIVED_COLUMNS = [
+    "id", "title", "description", "location", "department", "citizen_id", "priority",
+    "status", "image", "assigned_to", "date", "area_id", "ward_id", "city_id",
+    "parent_id", "upvotes",
+]
+
+
+def create_archive_tables(cur):
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.complaints (
+        id INTEGER PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        location TEXT,
+        department TEXT,
+        citizen_id INTEGER,
+        priority TEXT,
+        status TEXT,
+        image TEXT,
+        assigned_to INTEGER,
+        date TEXT,
+        area_id INTEGER,
+        ward_id INTEGER,
+        city_id INTEGER,
+        archived_at REAL NOT NULL
+    )
+    """)
+    # The admin issue filters and export, as on the hot table
+    for name, columns in (
+        ("department_id", "department, id DESC"),
+        ("citizen_id", "citizen_id, id DESC"),
+        ("status_id", "status, id DESC"),
+        ("priority_id", "priority, id DESC"),
+        ("area_id", "area_id, id DESC"),
+        ("ward_id", "ward_id, id DESC"),
+        ("city_id", "city_id, id DESC"),
+    ):
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_complaints_{name} ON complaints({columns})"
+        )
+
+
+def install_archive_search(cur):
+    create_complaint_search(cur, ARCHIVE_SCHEMA)
+
+
+def add_archived_duplicate_links(cur):
+    cur.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.complaints ADD COLUMN parent_id INTEGER")
+    cur.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.complaints ADD COLUMN upvotes INTEGER NOT NULL DEFAULT 0")
+
+
+# Append only, like migrations.MIGRATIONS; tracked in archive.user_version
+ARCHIVE_MIGRATIONS = [
+    (1, "archived complaints", create_archive_tables),
+    (2, "archived complaint search", install_archive_search),
+    (3, "archived duplicate links", add_archived_duplicate_links),
+]
+
+
+def attach_archive(conn, path, pragmas=None, read_only=False):
+    """ATTACH the archive to a new connection and create the all_complaints view
+
+    ``read_only`` connections (opened with ``uri=True``) attach it with
+    ``mode=ro`` and leave migrations to the read/write pool.
+    """
+    if read_only:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (read_only_uri(path),))
+    else:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+        for name in ("journal_mode", "synchronous"):
+            if pragmas and name in pragmas:
+                conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.{name}={pragmas[name]}")
+        run_migrations(conn, ARCHIVE_MIGRATIONS, ARCHIVE_SCHEMA)
+
+    columns = ", ".join(ARCHIVED_COLUMNS)
+    conn.execute(f"""
+    CREATE TEMP VIEW IF NOT EXISTS all_complaints AS
+    SELECT {columns}, NULL AS archived_at FROM main.complaints
+    UNION ALL
+    SELECT {columns}, archived_at FROM {ARCHIVE_SCHEMA}.complaints
+    """)
+
+
+ARCHIVE_CANDIDATES_SQL = """
+SELECT id FROM complaints
+WHERE status='Resolved' AND date < ?
+ORDER BY date, id
+LIMIT ?
+"""
+
+
+def moved_delete_query(ids):
+    """DELETE for the hot rows among ``ids`` that already have their archive copy"""
+    placeholders = ",".join("?" * len(ids))
+    return f"""
+    DELETE FROM main.complaints
+    WHERE id IN ({placeholders}) AND status='Resolved'
+    AND id IN (SELECT id FROM {ARCHIVE_SCHEMA}.complaints WHERE id IN ({placeholders}))
+    """, (*ids, *ids)
+
+
+def archive_cutoff(days, today=None):
+    """Complaints filed before this ISO date are old enough to archive"""
+    return ((today or date.today()) - timedelta(days=days)).isoformat()
+
+
+def archive_batch(db, cutoff, batch_size=500):
+    """Move one batch of resolved complaints filed before ``cutoff``; returns how many moved"""
+    cur = db.cursor()
+    cur.execute(ARCHIVE_CANDIDATES_SQL, (cutoff, batch_size))
+    ids = [row[0] for row in cur.fetchall()]
+    if not ids:
+        return 0
+
+    columns = ", ".join(ARCHIVED_COLUMNS)
+    placeholders = ",".join("?" * len(ids))
+
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        # OR REPLACE completes a move interrupted after this step
+        cur.execute(f"""
+        INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.complaints ({columns}, archived_at)
+        SELECT {columns}, ? FROM main.complaints
+        WHERE id IN ({placeholders}) AND status='Resolved'
+        """, (time.time(), *ids))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        cur.execute(*moved_delete_query(ids))
+        moved = cur.rowcount
+        # Reopened between the two steps: the hot row wins
+        cur.execute(f"""
+        DELETE FROM {ARCHIVE_SCHEMA}.complaints
+        WHERE id IN ({placeholders})
+        AND id IN (SELECT id FROM main.complaints WHERE id IN ({placeholders}))
+        """, (*ids, *ids))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return moved
+
+
+def archive_stats(cur):
+    cur.execute(f"""
+    SELECT COUNT(*), MIN(date), MAX(date), MAX(archived_at)
+    FROM {ARCHIVE_SCHEMA}.complaints
+    """)
+    count, oldest, newest, last_archived = cur.fetchone()
+    return {
+        "archived": count,
+        "oldest_date": oldest,
+        "newest_date": newest,
+        "last_archived_at": last_archived,
+    }
@@ -0,0 +1,186 @@
+"""Canonical city -> ward -> area keys for free-text complaint locations.
+
+``normalize_location`` maps spellings such as "Paldi Cross Road, Ahmedabad"
+and "paldi, ahmedabad" to the same area. ``resolve_area`` stores each
+distinct area once in the ``areas`` table and returns the integer ids that
+complaints are filtered and counted by.
+"""
+import re
+
+# city -> ward (municipal zone) -> known area names
+GAZETTEER = {
+    "Ahmedabad": {
+        "Central": ["Shahpur", "Dariyapur", "Jamalpur", "Khadia", "Kalupur"],
+        "East": ["Nikol", "Vastral", "Odhav", "Ramol", "Amraiwadi"],
+        "North": ["Naroda", "Saraspur", "Bapunagar", "Thakkarbapa Nagar"],
+        "South": ["Maninagar", "Isanpur", "Vatva", "Lambha", "Behrampura"],
+        "West": ["Paldi", "Naranpura", "Navrangpura", "Vasna", "Sabarmati", "Chandkheda", "Ellisbridge"],
+        "North West": ["Gota", "Bodakdev", "Thaltej", "Ghatlodia", "Vastrapur"],
+        "South West": ["Juhapura", "Satellite", "Sarkhej", "Makarba", "Vejalpur"],
+    },
+    "Gandhinagar": {
+        "Sectors": [f"Sector {number}" for number in range(1, 31)],
+    },
+    "Vadodara": {
+        "West": ["Alkapuri", "Gotri", "Akota", "Vasna Road"],
+        "East": ["Waghodia Road", "Ajwa Road"],
+    },
+}
+
+CITY_ALIASES = {
+    "amdavad": "Ahmedabad",
+    "ahmadabad": "Ahmedabad",
+    "baroda": "Vadodara",
+}
+
+UNASSIGNED_WARD = "Unassigned"
+UNKNOWN_CITY = "Unknown"
+
+# Words that qualify a place rather than name it ("Paldi Cross Road")
+_QUALIFIERS = {
+    "area", "cross", "main", "char", "rasta", "circle", "chowk",
+    "east", "west", "north", "south", "near", "opp", "society", "gam", "village",
+}
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def _words(text):
+    return _WORDS.findall((text or "").lower())
+
+
+def _slug(*parts):
+    return "/".join("-".join(_words(part)) for part in parts)
+
+
+def _known_areas():
+    known = {}
+    for city, wards in GAZETTEER.items():
+        entries = known.setdefault(city, [])
+        for ward, names in wards.items():
+            entries.extend((tuple(_words(name)), ward, name) for name in names)
+        # Longest names first so "Vasna Road" wins over "Vasna"
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+    return known
+
+
+_KNOWN_AREAS = _known_areas()
+_CITY_BY_WORD = {city.lower(): city for city in GAZETTEER}
+_CITY_BY_WORD.update(CITY_ALIASES)
+
+
+def _contains(words, phrase):
+    size = len(phrase)
+    return any(tuple(words[i:i + size]) == phrase for i in range(len(words) - size + 1))
+
+
+def normalize_location(location):
+    """Return canonical (city, ward, area) names for a free-text location"""
+    segments = [segment for segment in (location or "").split(",") if _words(segment)]
+
+    city = None
+    for segment in reversed(segments):
+        words = _words(segment)
+        city = next((_CITY_BY_WORD[word] for word in words if word in _CITY_BY_WORD), None)
+        if city:
+            break
+
+    place_words = _words(" ".join(segments))
+    for candidate_city in ([city] if city else list(_KNOWN_AREAS)):
+        for phrase, ward, name in _KNOWN_AREAS.get(candidate_city, ()):
+            if _contains(place_words, phrase):
+                return candidate_city, ward, name
+
+    # Unknown area: first segment minus qualifiers, title-cased
+    first = [word for word in _words(segments[0] if segments else "") if word not in _QUALIFIERS]
+    if city and first == [city.lower()]:
+        first = []
+    area = " ".join(first).title() or UNKNOWN_CITY
+    return city or UNKNOWN_CITY, UNASSIGNED_WARD, area
+
+
+def area_key(location):
+    """The ``areas.key`` a location resolves to, without touching the database"""
+    return _slug(*normalize_location(location))
+
+
+AREA_BY_KEY_SQL = "SELECT id FROM areas WHERE key=?"
+UNMAPPED_COMPLAINTS_SQL = """
+SELECT id, location FROM complaints
+WHERE area_id IS NULL
+LIMIT ?
+"""
+AREA_TREE_SQL = """
+SELECT areas.id, areas.level, areas.name, areas.parent_id, stat_counters.count
+FROM stat_counters
+JOIN areas ON areas.id = CAST(stat_counters.value AS INTEGER)
+WHERE stat_counters.dimension IN ('city_id', 'ward_id', 'area_id')
+  AND stat_counters.count > 0
+"""
+
+
+def _node_id(cur, level, name, parent_id, key):
+    cur.execute(AREA_BY_KEY_SQL, (key,))
+    row = cur.fetchone()
+    if row:
+        return row[0]
+    cur.execute("""
+    INSERT INTO areas (level, name, parent_id, key) VALUES (?,?,?,?)
+    """, (level, name, parent_id, key))
+    return cur.lastrowid
+
+
+def resolve_area(cur, location):
+    """(area_id, ward_id, city_id) for a location, creating area rows as needed"""
+    city, ward, area = normalize_location(location)
+    city_id = _node_id(cur, "city", city, None, _slug(city))
+    ward_id = _node_id(cur, "ward", ward, city_id, _slug(city, ward))
+    area_id = _node_id(cur, "area", area, ward_id, _slug(city, ward, area))
+    return area_id, ward_id, city_id
+
+
+def backfill_batch(cur, batch_size=500):
+    """Map one batch of complaints with no area; returns how many were updated"""
+    cur.execute(UNMAPPED_COMPLAINTS_SQL, (batch_size,))
+    rows = cur.fetchall()
+    for complaint_id, location in rows:
+        cur.execute("""
+        UPDATE complaints SET area_id=?, ward_id=?, city_id=? WHERE id=?
+        """, (*resolve_area(cur, location), complaint_id))
+    return len(rows)
+
+
+AREA_LEVEL_COLUMNS = {"city": "city_id", "ward": "ward_id", "area": "area_id"}
+
+
+def area_filter(cur, area_id):
+    """(column, id, name) filtering complaints to an area node at any level, or None"""
+    cur.execute("SELECT level, name FROM areas WHERE id=?", (area_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return AREA_LEVEL_COLUMNS[row[0]], area_id, row[1]
+
+
+def area_tree(cur):
+    """Counted areas as nested city -> ward -> area rows for stat panels and filters
+
+    Reads only the stat_counters rows for the three area dimensions, so the
+    cost follows the number of areas, not complaints.
+    """
+    cur.execute(AREA_TREE_SQL)
+    nodes = {row[0]: {"id": row[0], "level": row[1], "name": row[2], "parent_id": row[3],
+                      "count": row[4], "children": []}
+             for row in cur.fetchall()}
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"])
+        (parent["children"] if parent else roots).append(node)
+
+    def by_count(items):
+        items.sort(key=lambda item: (-item["count"], item["name"]))
+        for item in items:
+            by_count(item["children"])
+        return items
+
+    return by_count(roots)
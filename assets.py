@@ -0,0 +1,180 @@
+"""Fingerprinted, precompressed CSS and JS bundles.
+
+The stylesheets and scripts in ``static/`` are concatenated per page role,
+minified, and written to ``static/dist`` under a name that includes a hash
+of their content (``citizen.3f9a1c2b7d4e.js``), next to ``.gz`` and ``.br``
+copies compressed once at build time. ``manifest.json`` maps each bundle
+name to its current file. Since a file's name changes whenever its content
+does, it can be cached for a year without revalidation; a new build simply
+links pages to new names. Files from earlier builds are left in place, so
+pages rendered before a deploy still load.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from files import write_atomic
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; clients fall back to gzip
+    brotli = None
+
+# Bundle name -> source files under static/, in load order. Every page of a
+# role loads the same bundles, so one download serves the whole session.
+BUNDLES = {
+    "public.css": ["css/core.css", "css/style.css"],
+    "government.css": ["css/core.css", "css/government.css"],
+    "admin.css": ["css/core.css", "css/admin.css"],
+    "auth.js": ["js/main.js", "js/auth-validation.js", "js/signup.js"],
+    "citizen.js": ["js/ui-enhancements.js", "js/feed.js"],
+    "government.js": ["js/main.js", "js/government-dashboard.js"],
+    "admin.js": ["js/main.js", "js/admin-dashboard.js"],
+    # Opens an event stream, so only pages with live rows load it
+    "live.js": ["js/live-updates.js"],
+}
+MANIFEST_NAME = "manifest.json"
+# (Content-Encoding, suffix) in order of preference when quality ties
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+_CSS_SKIP = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.S)
+
+
+def minify_css(text):
+    """Drop comments and collapse whitespace outside strings"""
+    strings = []
+
+    def keep(match):
+        if not match.group(1):
+            return " "
+        strings.append(match.group(1))
+        return f"\0{len(strings) - 1}\0"
+
+    text = re.sub(r"\s+", " ", _CSS_SKIP.sub(keep, text))
+    text = re.sub(r" ?([{};,>]) ?", r"\1", text)
+    text = text.replace(": ", ":").replace(";}", "}")
+    return re.sub("\0(\\d+)\0", lambda match: strings[int(match.group(1))], text).strip()
+
+
+def minify_js(text):
+    """Drop indentation, blank lines and whole-line comments
+
+    Line breaks are kept, so automatic semicolon insertion behaves exactly as
+    in the source. The scripts are small and served compressed; a full
+    minifier would save little more and need a parser.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+class AssetPipeline:
+    def __init__(self, static_folder, output="dist", bundles=BUNDLES):
+        self.static_folder = static_folder
+        self.output_folder = os.path.join(static_folder, output)
+        self.bundles = bundles
+        self._manifest = None
+        self._manifest_mtime = None
+
+    def source_digest(self):
+        """Hash of every source file, to tell whether the last build is current"""
+        digest = hashlib.sha256()
+        for name, sources in sorted(self.bundles.items()):
+            digest.update(name.encode())
+            for source in sources:
+                with open(os.path.join(self.static_folder, source), "rb") as handle:
+                    digest.update(handle.read())
+        return digest.hexdigest()
+
+    def bundle(self, name):
+        """Concatenated, minified content of one bundle"""
+        minify = minify_css if name.endswith(".css") else minify_js
+        parts = []
+        for source in self.bundles[name]:
+            with open(os.path.join(self.static_folder, source), encoding="utf-8") as handle:
+                parts.append(minify(handle.read()))
+        # A script that ends without a semicolon must not run into the next one
+        return ("\n" if name.endswith(".css") else "\n;\n").join(parts).encode()
+
+    def build(self):
+        """Write every bundle with its compressed copies and a new manifest; returns it"""
+        os.makedirs(self.output_folder, exist_ok=True)
+        files = {}
+        for name, sources in self.bundles.items():
+            content = self.bundle(name)
+            stem, ext = os.path.splitext(name)
+            filename = f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+            path = os.path.join(self.output_folder, filename)
+            # mtime=0 keeps the .gz byte-identical across builds
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(content, quality=11)
+            # Compressed copies first: a worker serves them once the plain file exists
+            for encoding, suffix in ENCODINGS:
+                if encoding in compressed and not os.path.exists(path + suffix):
+                    write_atomic(path + suffix, compressed[encoding], prefix=".asset-")
+            if not os.path.exists(path):
+                write_atomic(path, content, prefix=".asset-")
+            files[name] = {
+                "file": filename,
+                "sources": sources,
+                "source_bytes": sum(os.path.getsize(os.path.join(self.static_folder, s)) for s in sources),
+                "bytes": len(content),
+                **{f"{encoding}_bytes": len(data) for encoding, data in compressed.items()},
+            }
+
+        manifest = {"source_digest": self.source_digest(), "bundles": files}
+        write_atomic(
+            os.path.join(self.output_folder, MANIFEST_NAME), json.dumps(manifest, indent=2).encode(), prefix=".asset-"
+        )
+        self._manifest = manifest
+        self._manifest_mtime = None
+        return manifest
+
+    def manifest(self):
+        """The manifest on disk, re-read when another process rebuilds it"""
+        path = os.path.join(self.output_folder, MANIFEST_NAME)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            with open(path, encoding="utf-8") as handle:
+                self._manifest = json.load(handle)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def ensure_built(self):
+        """Build unless the manifest on disk matches the current sources"""
+        manifest = self.manifest()
+        if manifest is None or manifest.get("source_digest") != self.source_digest():
+            self.build()
+
+    def filename(self, name):
+        """Hashed filename for a bundle; KeyError for an unknown bundle"""
+        manifest = self.manifest()
+        if manifest is None:
+            self.build()
+            manifest = self._manifest
+        return manifest["bundles"][name]["file"]
+
+    def find(self, filename, accept_encodings):
+        """(path, content_encoding) of the best variant of a built file, or None
+
+        ``accept_encodings`` is werkzeug's parsed Accept-Encoding header.
+        Content encoding is None when the uncompressed file is served.
+        """
+        # Only built files: no subdirectories, the manifest or half-written temporaries
+        if os.path.basename(filename) != filename or filename == MANIFEST_NAME or filename.startswith("."):
+            return None
+        path = os.path.join(self.output_folder, filename)
+        if not os.path.isfile(path):
+            return None
+        candidates = [
+            (accept_encodings.quality(encoding), -rank, encoding, path + suffix)
+            for rank, (encoding, suffix) in enumerate(ENCODINGS)
+            if os.path.isfile(path + suffix)
+        ]
+        quality, _, encoding, variant = max(candidates, default=(0, 0, None, path))
+        return (variant, encoding) if quality > 0 else (path, None)
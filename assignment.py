@@ -0,0 +1,214 @@
+"""Least-loaded assignment of complaints to the active officers of a department.
+
+``officer_load`` holds one row per active officer with their open complaint
+count and a priority-weighted load. Triggers on ``complaints`` and ``users``
+keep it current on every assignment, status or priority change and on every
+approval or removal, in the writer's transaction, and the
+(department, load) index keeps the least-loaded officer one index seek
+away. Linked duplicate reports ride on their parent and carry no load.
+"""
+
+# Open complaints weigh by priority; resolved ones weigh nothing. The load
+# triggers keep the weights of their migration (migrations.ASSIGNMENT_V14)
+# until a new one reinstalls them.
+PRIORITY_WEIGHTS = {"High": 3, "Medium": 2, "Low": 1}
+
+# Legacy officers without a department are placed by their gov_id prefix
+DEPARTMENT_BY_CODE = {
+    "W": "Water Supply",
+    "S": "Sanitation",
+    "E": "Electricity",
+    "P": "Public Works",
+}
+DEFAULT_DEPARTMENT = "Water Supply"
+
+
+def _weight(alias, weights=PRIORITY_WEIGHTS):
+    cases = " ".join(f"WHEN '{priority}' THEN {weight}" for priority, weight in weights.items())
+    return f"CASE {alias}.priority {cases} ELSE {min(weights.values())} END"
+
+
+def _is_open(alias):
+    return f"({alias}.status IS NOT 'Resolved' AND {alias}.parent_id IS NULL)"
+
+
+def _department(alias, departments=DEPARTMENT_BY_CODE, default_department=DEFAULT_DEPARTMENT):
+    cases = " ".join(f"WHEN '{code}' THEN '{name}'" for code, name in departments.items())
+    return (
+        f"COALESCE(NULLIF({alias}.department, ''), "
+        f"CASE substr({alias}.gov_id, 1, 1) {cases} ELSE '{default_department}' END)"
+    )
+
+
+def _load_row(alias, weights, departments, default_department):
+    """(officer_id, department, open_count, load) for an officer row"""
+    return f"""
+    {alias}.id, {_department(alias, departments, default_department)},
+    (SELECT COUNT(*) FROM complaints c WHERE c.assigned_to = {alias}.id AND {_is_open("c")}),
+    (SELECT COALESCE(SUM({_weight("c", weights)}), 0) FROM complaints c WHERE c.assigned_to = {alias}.id AND {_is_open("c")})
+    """
+
+
+def _adjust(alias, sign, weights):
+    return f"""
+    UPDATE officer_load
+    SET open_count = open_count {sign} 1, load = load {sign} {_weight(alias, weights)}
+    WHERE officer_id = {alias}.assigned_to AND {_is_open(alias)};"""
+
+
+def install_assignment_triggers(cur, weights=PRIORITY_WEIGHTS, departments=DEPARTMENT_BY_CODE,
+                                default_department=DEFAULT_DEPARTMENT):
+    """(Re)create the officer_load triggers for these priority weights and department codes
+
+    A migration passes the rules it shipped with, so replaying it on a new
+    database weighs complaints as it did then.
+    """
+    load_row = _load_row("NEW", weights, departments, default_department)
+    for name in (
+        "complaints_load_insert", "complaints_load_update", "complaints_load_delete",
+        "users_load_insert", "users_load_update", "users_load_delete",
+    ):
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{name}")
+
+    cur.execute(f"""
+    CREATE TRIGGER trg_complaints_load_insert AFTER INSERT ON complaints
+    WHEN NEW.assigned_to IS NOT NULL
+    BEGIN
+    {_adjust("NEW", "+", weights)}
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER trg_complaints_load_update AFTER UPDATE OF assigned_to, status, priority, parent_id ON complaints
+    WHEN OLD.assigned_to IS NOT NEW.assigned_to OR OLD.status IS NOT NEW.status
+      OR OLD.priority IS NOT NEW.priority OR OLD.parent_id IS NOT NEW.parent_id
+    BEGIN
+    {_adjust("OLD", "-", weights)}
+    {_adjust("NEW", "+", weights)}
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER trg_complaints_load_delete AFTER DELETE ON complaints
+    BEGIN
+    {_adjust("OLD", "-", weights)}
+    END
+    """)
+
+    cur.execute(f"""
+    CREATE TRIGGER trg_users_load_insert AFTER INSERT ON users
+    WHEN NEW.role = 'government' AND NEW.status = 'active'
+    BEGIN
+        INSERT OR REPLACE INTO officer_load (officer_id, department, open_count, load)
+        SELECT {load_row};
+    END
+    """)
+    # Approval, suspension or a department change re-files the officer
+    cur.execute(f"""
+    CREATE TRIGGER trg_users_load_update AFTER UPDATE OF role, status, department, gov_id ON users
+    BEGIN
+        DELETE FROM officer_load WHERE officer_id = OLD.id;
+        INSERT INTO officer_load (officer_id, department, open_count, load)
+        SELECT {load_row}
+        WHERE NEW.role = 'government' AND NEW.status = 'active';
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER trg_users_load_delete AFTER DELETE ON users
+    BEGIN
+        DELETE FROM officer_load WHERE officer_id = OLD.id;
+    END
+    """)
+
+
+def recount_loads(cur, weights=PRIORITY_WEIGHTS, departments=DEPARTMENT_BY_CODE,
+                  default_department=DEFAULT_DEPARTMENT):
+    cur.execute("DELETE FROM officer_load")
+    cur.execute(f"""
+    INSERT INTO officer_load (officer_id, department, open_count, load)
+    SELECT {_load_row("u", weights, departments, default_department)}
+    FROM users u
+    WHERE u.role = 'government' AND u.status = 'active'
+    """)
+
+
+LIGHTEST_OFFICER_SQL = """
+SELECT officer_id, load FROM officer_load WHERE department=?
+ORDER BY load, open_count, officer_id LIMIT 1
+"""
+HEAVIEST_OFFICER_SQL = """
+SELECT officer_id, load FROM officer_load WHERE department=?
+ORDER BY load DESC, open_count DESC, officer_id DESC LIMIT 1
+"""
+# The newest pending complaint of an officer lighter than the given weight
+MOVABLE_COMPLAINT_SQL = f"""
+SELECT id FROM complaints c
+WHERE c.assigned_to=? AND c.status='Pending' AND c.parent_id IS NULL AND {_weight("c")} < ?
+ORDER BY c.id DESC
+LIMIT 1
+"""
+
+
+def least_loaded_officer(cur, department):
+    """Id of the active officer in ``department`` with the lightest load, or None"""
+    cur.execute(LIGHTEST_OFFICER_SQL, (department,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def officer_loads(cur):
+    """{officer_id: (open_count, load)} for every active officer"""
+    cur.execute("SELECT officer_id, open_count, load FROM officer_load")
+    return {officer_id: (open_count, load) for officer_id, open_count, load in cur.fetchall()}
+
+
+def assign_orphans(cur, department, batch_size=500):
+    """Assign open complaints with no active officer; returns how many were assigned"""
+    cur.execute("""
+    SELECT id FROM complaints
+    WHERE department=? AND status != 'Resolved' AND parent_id IS NULL
+    AND (assigned_to IS NULL OR assigned_to NOT IN (SELECT officer_id FROM officer_load))
+    ORDER BY id
+    LIMIT ?
+    """, (department, batch_size))
+    assigned = 0
+    for (complaint_id,) in cur.fetchall():
+        officer_id = least_loaded_officer(cur, department)
+        if officer_id is None:
+            break
+        cur.execute("UPDATE complaints SET assigned_to=? WHERE id=?", (officer_id, complaint_id))
+        assigned += 1
+    return assigned
+
+
+def rebalance(cur, department, max_moves=500):
+    """Move pending complaints from the heaviest to the lightest officer; returns moves made
+
+    A complaint moves only when it narrows the gap between the two, so the
+    loop stops once no move would help. Work already in progress stays with
+    whoever started it.
+    """
+    moves = 0
+    while moves < max_moves:
+        cur.execute(LIGHTEST_OFFICER_SQL, (department,))
+        lightest = cur.fetchone()
+        cur.execute(HEAVIEST_OFFICER_SQL, (department,))
+        heaviest = cur.fetchone()
+        if not lightest or lightest[0] == heaviest[0]:
+            break
+
+        cur.execute(MOVABLE_COMPLAINT_SQL, (heaviest[0], heaviest[1] - lightest[1]))
+        row = cur.fetchone()
+        if not row:
+            break
+        cur.execute("UPDATE complaints SET assigned_to=? WHERE id=?", (lightest[0], row[0]))
+        moves += 1
+    return moves
+
+
+def rebalance_departments(cur, max_moves=500):
+    """Assign orphaned complaints and rebalance every staffed department; returns changes made"""
+    cur.execute("SELECT DISTINCT department FROM officer_load")
+    changes = 0
+    for (department,) in cur.fetchall():
+        changes += assign_orphans(cur, department, max_moves)
+        changes += rebalance(cur, department, max_moves)
+    return changes
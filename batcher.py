@@ -0,0 +1,154 @@
+"""Group commit for the writes request handlers make.
+
+Instead of each request committing on its own connection, handlers hand a
+write operation to the process's ``WriteBatcher``. One writer thread
+collects operations for up to ``max_delay`` seconds (or ``max_batch`` of
+them), runs them in a single ``BEGIN IMMEDIATE`` transaction and commits
+once, so a surge of reports costs one lock acquisition and one fsync per
+batch rather than per request. Each operation runs inside its own SAVEPOINT,
+so one that raises is rolled back alone and the rest of the batch still
+commits. ``submit`` returns only after the batch's COMMIT has returned.
+"""
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future, TimeoutError
+
+
+class WriterUnavailable(Exception):
+    """The writer did not commit a submitted write in time"""
+
+
+class WriteBatcher:
+    def __init__(self, pool, max_delay=0.002, max_batch=64, on_batch=None, timeout=30):
+        self.pool = pool
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        # Longest submit() waits for its batch before giving up
+        self.timeout = timeout
+        # on_batch(size, failed, wait_seconds, commit_seconds) after every commit
+        self.on_batch = on_batch
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._pid = None
+        self._thread = None
+        self._stats = {"batches": 0, "operations": 0, "failed": 0, "largest_batch": 0}
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # First call in this process (or after a fork): a fresh queue
+                self._pid = os.getpid()
+                self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._write_forever, name="write-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, operation, recorder=None):
+        """Run ``operation(cur)`` in the next batch; returns its result once committed
+
+        ``recorder`` (a metrics.SQLRecorder) is attached to the writer's
+        connection while this operation runs, so its statements count
+        towards the submitting request.
+
+        Exceptions raised by the operation, or by the batch's COMMIT, are
+        re-raised here. WriterUnavailable is raised if the batch has not
+        committed within ``timeout`` seconds.
+        """
+        self.start()
+        future = Future()
+        self._queue.put((operation, recorder, future, time.perf_counter()))
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            # A write still queued is dropped; one already running may yet commit
+            future.cancel()
+            raise WriterUnavailable(f"write not committed within {self.timeout}s") from None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_batch"] = round(stats["operations"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["max_delay_ms"] = self.max_delay * 1000
+        stats["max_batch"] = self.max_batch
+        return stats
+
+    def _write_forever(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.perf_counter(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            except Exception:
+                traceback.print_exc()
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        outcomes = []
+        db = None
+        try:
+            db = self.pool.acquire()
+            cur = db.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            for operation, recorder, future, _ in batch:
+                # False when submit() gave up waiting before the write started
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if recorder:
+                    recorder.attach(db)
+                try:
+                    cur.execute("SAVEPOINT batched_write")
+                    try:
+                        result = operation(cur)
+                    except Exception as error:
+                        cur.execute("ROLLBACK TO batched_write")
+                        outcomes.append((future, None, error))
+                    else:
+                        outcomes.append((future, result, None))
+                    cur.execute("RELEASE batched_write")
+                finally:
+                    if recorder:
+                        recorder.close()
+                        db.set_trace_callback(self.pool.trace)
+                        db.set_progress_handler(None, 0)
+            db.commit()
+        except Exception as error:
+            # Nothing in the batch was written (or no connection could be
+            # had): every waiting request sees the failure
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            self._record(len(batch), len(batch), batch, started)
+            return
+        finally:
+            # Rolls back whatever a failed batch left open
+            if db is not None:
+                self.pool.release(db)
+
+        failed = 0
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                future.set_exception(error)
+        self._record(len(batch), failed, batch, started)
+
+    def _record(self, size, failed, batch, started):
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["operations"] += size
+            self._stats["failed"] += failed
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], size)
+        if self.on_batch:
+            # How long the oldest operation queued before its batch started
+            wait = started - min(queued for _, _, _, queued in batch)
+            self.on_batch(size, failed, wait, time.perf_counter() - started)
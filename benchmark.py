@@ -0,0 +1,271 @@
+"""Route latency benchmarks through the Flask test client and local HTTP.
+
+Each route is timed on its own: first sequentially through the test client,
+which measures the view, queries and template with no network in between,
+then (GET routes only) from concurrent HTTP clients against a threaded
+local server. Results are plain JSON so runs from different commits can be
+diffed with ``compare``.
+"""
+import http.cookiejar
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from areas import GAZETTEER
+
+# (name, role, method, path, form, expected status). Roles are signed in
+# with the accounts passed to run_benchmark; None means anonymous.
+ROUTES = [
+    ("index", None, "GET", "/", None, 200),
+    ("login", None, "POST", "/login", "credentials", 302),
+    ("citizen_home", "citizen", "GET", "/citizen/home", None, 200),
+    ("citizen_feed", "citizen", "GET", "/citizen/feed", None, 200),
+    ("citizen_my_issues", "citizen", "GET", "/citizen/my-issues", None, 200),
+    ("citizen_report", "citizen", "POST", "/citizen/report", {
+        "title": "Benchmark Pothole", "description": "Synthetic benchmark report.",
+        "location": "Paldi Cross Road, Ahmedabad", "type": "Road", "priority": "Medium",
+    }, 302),
+    ("admin_dashboard", "admin", "GET", "/admin/dashboard", None, 200),
+    ("admin_listing", "admin", "GET", "/admin/api/complaints?sort=-id&page=3", None, 200),
+    ("admin_issues", "admin", "GET", "/admin/issues?status=Pending&department=Sanitation", None, 200),
+    ("admin_issues_search", "admin", "GET", "/admin/issues?q=water+leakage", None, 200),
+    ("government_dashboard", "government", "GET", "/government/dashboard", None, 200),
+    ("government_search", "government", "GET", "/government/dashboard?q=light", None, 200),
+]
+
+# A surge is many distinct reports across the city, not one report repeated:
+# identical text in one area would all link as duplicates of the first
+SURGE_LOCATIONS = [
+    f"{name}, {city}" for city, wards in GAZETTEER.items() for names in wards.values() for name in names
+]
+SURGE_ISSUE_TYPES = ["Garbage", "Water", "Street Light", "Road"]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class QueryCounter:
+    """sqlite3 trace callback counting every statement executed"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, statement):
+        with self._lock:
+            self.count += 1
+
+
+def summarize(samples, elapsed, queries, errors):
+    ordered = sorted(samples)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else 0.0
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "queries_per_request": round(queries / len(samples), 1) if samples else 0.0,
+    }
+
+
+def _form(form, credentials):
+    if form == "credentials":
+        email, password = credentials["citizen"]
+        return {"email": email, "password": password}
+    return form
+
+
+def run_test_client(app, counter, route, credentials, count):
+    name, role, method, path, form, expected = route
+    client = app.test_client()
+    if role:
+        email, password = credentials[role]
+        client.post("/login", data={"email": email, "password": password})
+
+    form = _form(form, credentials)
+    # One untimed request warms templates and the page cache
+    client.open(path, method=method, data=form)
+
+    samples, errors = [], 0
+    queries_before = counter.count
+    started = time.perf_counter()
+    for _ in range(count):
+        request_started = time.perf_counter()
+        response = client.open(path, method=method, data=form)
+        samples.append(time.perf_counter() - request_started)
+        if response.status_code != expected:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return summarize(samples, elapsed, counter.count - queries_before, errors)
+
+
+def _http_session(base_url, role, credentials):
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+    )
+    if role:
+        email, password = credentials[role]
+        data = urllib.parse.urlencode({"email": email, "password": password}).encode()
+        opener.open(base_url + "/login", data).read()
+    return opener
+
+
+def run_http(base_url, counter, route, credentials, count, concurrency):
+    name, role, method, path, form, expected = route
+    openers = [_http_session(base_url, role, credentials) for _ in range(concurrency)]
+    samples, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(opener, requests):
+        for _ in range(requests):
+            request = urllib.request.Request(base_url + path, headers={"Accept-Encoding": "gzip"})
+            request_started = time.perf_counter()
+            try:
+                with opener.open(request) as response:
+                    response.read()
+                    ok = response.status == expected
+            except OSError:
+                ok = False
+            elapsed = time.perf_counter() - request_started
+            with lock:
+                samples.append(elapsed)
+                errors[0] += not ok
+
+    shares = [count // concurrency + (i < count % concurrency) for i in range(concurrency)]
+    queries_before = counter.count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for opener, share in zip(openers, shares):
+            executor.submit(worker, opener, share)
+    elapsed = time.perf_counter() - started
+    return summarize(samples, elapsed, counter.count - queries_before, errors[0])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(app, pool, credentials, count=100, concurrency=8, routes=ROUTES, on_route=None):
+    """Time every route in ``routes``; returns a JSON-ready results dict
+
+    ``credentials`` maps role -> (email, password) for signed-in routes.
+    Routes that write (login, citizen_report) really write, so run this
+    against a generated database rather than production data.
+    """
+    counter = QueryCounter()
+    previous_trace = pool.trace
+    pool.trace = counter
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {}
+    try:
+        for route in routes:
+            name, role, method = route[:3]
+            results[name] = {"test_client": run_test_client(app, counter, route, credentials, count)}
+            if method == "GET":
+                results[name]["http"] = run_http(base_url, counter, route, credentials, count, concurrency)
+            if on_route:
+                on_route(name, results[name])
+    finally:
+        server.shutdown()
+        pool.trace = previous_trace
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "requests_per_route": count,
+            "concurrency": concurrency,
+        },
+        "routes": results,
+    }
+
+
+def run_writes(app, credentials, count=200, concurrency=16, route="citizen_report"):
+    """Time ``route`` from ``concurrency`` signed-in test clients posting at once
+
+    Unlike run_test_client, requests overlap, so this measures how commits
+    behave under a submission surge. Every request writes.
+    """
+    name, role, method, path, form, expected = next(r for r in ROUTES if r[0] == route)
+    email, password = credentials[role]
+    clients = []
+    for _ in range(concurrency):
+        client = app.test_client()
+        client.post("/login", data={"email": email, "password": password})
+        clients.append(client)
+
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    # All clients start together, like a surge
+    barrier = threading.Barrier(concurrency)
+
+    def worker(client, requests):
+        barrier.wait()
+        for _ in range(requests):
+            data = dict(
+                form,
+                title=f"{form['title']} {uuid.uuid4().hex[:8]}",
+                description=uuid.uuid4().hex * 3,
+                location=random.choice(SURGE_LOCATIONS),
+                type=random.choice(SURGE_ISSUE_TYPES),
+            )
+            request_started = time.perf_counter()
+            try:
+                ok = client.open(path, method=method, data=data).status_code == expected
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - request_started
+            with lock:
+                samples.append(elapsed)
+                errors[0] += not ok
+
+    shares = [count // concurrency + (i < count % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for client, share in zip(clients, shares):
+            executor.submit(worker, client, share)
+    elapsed = time.perf_counter() - started
+    summary = summarize(samples, elapsed, 0, errors[0])
+    del summary["queries_per_request"]
+    return summary
+
+
+def compare(baseline, current, metric="p95_ms"):
+    """Yield (route, client, before, after, change) for routes in both runs"""
+    for name, clients in current["routes"].items():
+        for client, summary in clients.items():
+            before = baseline.get("routes", {}).get(name, {}).get(client, {}).get(metric)
+            if before is None:
+                continue
+            after = summary[metric]
+            yield name, client, before, after, (after - before) / before if before else 0.0
@@ -0,0 +1,247 @@
+"""Streaming CSV/JSONL import and export for complaints and users.
+
+Imports read one record at a time and insert in ``executemany`` batches, one
+transaction per batch, so memory stays flat however large the file is.
+Exports walk a cursor with ``fetchmany`` and yield encoded chunks, which the
+CLI writes to a file and the admin endpoint streams to the browser.
+"""
+import csv
+import io
+import json
+import time
+from datetime import date
+
+from search import to_match_query
+
+COMPLAINT_IMPORT_COLUMNS = [
+    "title", "description", "location", "department", "citizen_id",
+    "priority", "status", "image", "date",
+]
+COMPLAINT_EXPORT_COLUMNS = [
+    "id", "title", "description", "location", "department", "citizen_id",
+    "priority", "status", "image", "date", "assigned_to",
+]
+USER_IMPORT_COLUMNS = [
+    "name", "email", "mobile", "password", "role", "gov_id", "status",
+    "department", "aadhaar", "dob", "gender", "address",
+]
+# Passwords and Aadhaar numbers never leave the database
+USER_EXPORT_COLUMNS = ["id", "name", "email", "mobile", "role", "gov_id", "status", "department"]
+IMPORTABLE_ROLES = ["citizen", "government"]
+
+EXPORT_CHUNK_ROWS = 500
+
+
+class RecordError(ValueError):
+    pass
+
+
+def detect_format(filename, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if filename.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _json_record(line):
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as error:
+        return RecordError(f"invalid JSON ({error.msg} at character {error.pos + 1})")
+    if not isinstance(record, dict):
+        return RecordError("line is not a JSON object")
+    return record
+
+
+def read_records(stream, fmt):
+    """Yield (line_number, dict) pairs from a CSV or JSONL text stream
+
+    A JSONL line that is not a JSON object yields a RecordError in place of
+    the dict, so ``bulk_insert`` rejects it like any other bad record.
+    """
+    if fmt == "jsonl":
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                yield line_number, _json_record(line)
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def _text(record, key):
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def complaint_row(record, routing, departments, statuses, priorities, citizen_exists=None):
+    """Validate one complaint record and return its insert tuple
+
+    ``department`` may be given directly or derived from ``issue_type``
+    through ``routing`` (DEPARTMENT_BY_ISSUE_TYPE). ``citizen_exists(id)``,
+    when given, rejects complaints filed by a user that does not exist.
+    """
+    title = _text(record, "title")
+    location = _text(record, "location")
+    if not title or not location:
+        raise RecordError("title and location are required")
+
+    department = _text(record, "department") or routing.get(_text(record, "issue_type"))
+    if department not in departments:
+        raise RecordError(f"unknown department {department!r}")
+
+    priority = _text(record, "priority") or "Medium"
+    if priority not in priorities:
+        raise RecordError(f"unknown priority {priority!r}")
+    status = _text(record, "status") or "Pending"
+    if status not in statuses:
+        raise RecordError(f"unknown status {status!r}")
+
+    citizen_id = _text(record, "citizen_id")
+    try:
+        citizen_id = int(citizen_id) if citizen_id else None
+    except ValueError:
+        raise RecordError(f"citizen_id {citizen_id!r} is not an integer")
+    if citizen_id is not None and citizen_exists and not citizen_exists(citizen_id):
+        raise RecordError(f"no user with citizen_id {citizen_id}")
+
+    complaint_date = _text(record, "date") or date.today().isoformat()
+    try:
+        date.fromisoformat(complaint_date)
+    except ValueError:
+        raise RecordError(f"date {complaint_date!r} is not YYYY-MM-DD")
+
+    return (
+        title, _text(record, "description"), location, department, citizen_id,
+        priority, status, _text(record, "image"), complaint_date,
+    )
+
+
+def user_row(record, departments):
+    name = _text(record, "name")
+    email = (_text(record, "email") or "").lower()
+    if not name or "@" not in email or "." not in email:
+        raise RecordError("name and a valid email are required")
+
+    role = _text(record, "role") or "citizen"
+    if role not in IMPORTABLE_ROLES:
+        raise RecordError(f"role must be one of {', '.join(IMPORTABLE_ROLES)}")
+
+    department = _text(record, "department")
+    if role == "government" and department not in departments:
+        raise RecordError(f"unknown department {department!r}")
+
+    status = _text(record, "status") or ("pending" if role == "government" else "active")
+    values = {**{column: _text(record, column) for column in USER_IMPORT_COLUMNS},
+              "name": name, "email": email, "role": role, "status": status, "department": department}
+    return tuple(values[column] for column in USER_IMPORT_COLUMNS)
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.rejected = []  # (line_number, reason)
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def bulk_insert(db, records, to_row, insert_sql, batch_size=1000, on_batch=None):
+    """Validate and insert records in batched transactions; returns an ImportReport
+
+    ``to_row`` turns a record into an insert tuple or raises RecordError.
+    Rows skipped by the insert itself (duplicates under ``ON CONFLICT DO
+    NOTHING``) count as read but not inserted.
+    """
+    report = ImportReport()
+    batch = []
+
+    def flush():
+        cur = db.cursor()
+        cur.execute("BEGIN")
+        try:
+            cur.executemany(insert_sql, batch)
+            report.inserted += cur.rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        batch.clear()
+        if on_batch:
+            on_batch(report)
+
+    for line_number, record in records:
+        report.read += 1
+        try:
+            if isinstance(record, RecordError):
+                raise record
+            batch.append(to_row(record))
+        except RecordError as error:
+            report.rejected.append((line_number, str(error)))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def complaint_export_query(columns, filters=(), search=None, include_archived=False):
+    """SELECT for complaints matching (column, value) filters and optional text, newest first
+
+    ``include_archived`` adds the same SELECT over the archive database, each
+    side matched against its own full-text index.
+    """
+    match = to_match_query(search) if search else None
+    branches, params = [], []
+    for schema in ("main", "archive") if include_archived else ("main",):
+        branch = f"SELECT {', '.join(columns)} FROM {schema}.complaints WHERE 1=1"
+        for column, value in filters:
+            if value:
+                branch += f" AND {column}=?"
+                params.append(value)
+        if match:
+            branch += f" AND id IN (SELECT rowid FROM {schema}.complaints_fts WHERE complaints_fts MATCH ?)"
+            params.append(match)
+        branches.append(branch)
+    return " UNION ALL ".join(branches) + " ORDER BY id DESC", params
+
+
+def user_export_query(role=None):
+    """SELECT for the exported user columns, optionally of one role"""
+    query = f"SELECT {', '.join(USER_EXPORT_COLUMNS)} FROM users"
+    params = []
+    if role:
+        query += " WHERE role=?"
+        params.append(role)
+    return query + " ORDER BY id", params
+
+
+def iter_export(cur, columns, query, params, fmt="csv"):
+    """Yield the result of ``query`` as CSV or JSONL text, a chunk of rows at a time"""
+    cur.execute(query, params)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(columns)
+
+    while rows := cur.fetchmany(EXPORT_CHUNK_ROWS):
+        for row in rows:
+            if fmt == "jsonl":
+                buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+            else:
+                writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,131 @@
+"""In-process LRU cache for query results, invalidated by table versions.
+
+Triggers bump a per-table counter in ``table_versions`` on every insert,
+update and delete, so a write from any route, worker or CLI command changes
+the version inside its own transaction. Callers put the versions they read
+into the cache key: after a write commits, every worker computes a new key
+and the old entries simply age out of the LRU.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+VERSIONED_TABLES = ("complaints", "users")
+
+
+def install_table_versions(cur, tables=VERSIONED_TABLES):
+    """Create table_versions and the triggers that bump it on writes to ``tables``"""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS table_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """)
+    for table in tables:
+        cur.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+            """)
+
+
+def bump_version(cur, name):
+    """Advance the version of ``name`` for a change no trigger sees
+
+    Used for state outside the database that pages depend on, such as image
+    renditions appearing on disk; the row is created on first use.
+    """
+    cur.execute("""
+    INSERT INTO table_versions (name, version) VALUES (?, 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1
+    """, (name,))
+
+
+def table_versions_query(tables):
+    placeholders = ",".join("?" * len(tables))
+    return f"SELECT name, version FROM table_versions WHERE name IN ({placeholders})", tuple(tables)
+
+
+def table_versions(cur, tables=VERSIONED_TABLES):
+    """Current versions of ``tables`` as a tuple, for use in cache keys
+
+    Read the versions before the data they guard: a write landing in between
+    then stores fresh data under the old key, never stale data under the new.
+    """
+    cur.execute(*table_versions_query(tables))
+    versions = dict(cur.fetchall())
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def approximate_size(value):
+    """Rough in-memory size of a cached value in bytes"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            approximate_size(key) + approximate_size(item) for key, item in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class ResponseCache:
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, ttl=60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get_or_set(self, key, compute, ttl=None):
+        """Cached value for ``key``, calling ``compute()`` on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[2]
+                self._remove(key)
+                self._stats["expired"] += 1
+            self._stats["misses"] += 1
+
+        # Computed outside the lock; concurrent misses on one key may both run
+        value = compute()
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (now + (self.ttl if ttl is None else ttl), size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return value
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(entries=len(self._entries), bytes=self._bytes,
+                         max_entries=self.max_entries, max_bytes=self.max_bytes, ttl=self.ttl)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
@@ -0,0 +1,185 @@
+"""Aggregate counters kept in stat_counters by SQLite triggers.
+
+Each dimension maps to the SQL expression (over a row of its table) whose
+value is counted. Triggers keep one row per (dimension, value) current on
+every INSERT/UPDATE/DELETE, so stat panels read O(groups) rows instead of
+running GROUP BY over the whole table.
+"""
+import re
+
+# The dimensions the latest counters migration installed. Changing them
+# takes a new migration that passes the new set to install_counters.
+COUNTED_TABLES = {
+    "complaints": {
+        "complaints": "''",
+        "city_id": "city_id",
+        "ward_id": "ward_id",
+        "area_id": "area_id",
+        "status": "status",
+        "priority": "priority",
+        "department": "department",
+        "department_status": "COALESCE(department, '') || '/' || COALESCE(status, '')",
+    },
+    "users": {
+        "users_by_role": "role",
+        "users_by_role_status": "COALESCE(role, '') || '/' || COALESCE(status, '')",
+    },
+}
+
+PRIORITY_ORDER = {"High": 1, "Medium": 2, "Low": 3}
+
+_IDENTIFIER = re.compile(r"\b(?!COALESCE\b)([a-z_]+)\b")
+
+
+def _columns(expression):
+    return set(_IDENTIFIER.findall(expression))
+
+
+def _row_expression(expression, alias):
+    qualified = _IDENTIFIER.sub(alias + r".\1", expression)
+    return f"COALESCE({qualified}, '')"
+
+
+def _increment(dimension, expression, alias, delta):
+    value = _row_expression(expression, alias)
+    return (
+        f"INSERT INTO stat_counters (dimension, value, count) "
+        f"VALUES ('{dimension}', {value}, {delta}) "
+        f"ON CONFLICT(dimension, value) DO UPDATE SET count = count + ({delta});"
+    )
+
+
+def _installable(cur, counted=COUNTED_TABLES):
+    """``counted`` minus dimensions over columns a migration has yet to add"""
+    installable = {}
+    for table, dimensions in counted.items():
+        cur.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cur.fetchall()}
+        installable[table] = {
+            dimension: expression for dimension, expression in dimensions.items()
+            if _columns(expression) <= existing
+        }
+    return installable
+
+
+def install_counters(cur, counted=COUNTED_TABLES):
+    """(Re)create stat_counters triggers for the dimensions in ``counted`` and recount
+
+    Migrations pass the set they shipped with, so replaying an old one
+    installs what it did then.
+    """
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS stat_counters (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value)
+    ) WITHOUT ROWID
+    """)
+
+    for table, dimensions in _installable(cur, counted).items():
+        columns = sorted(set().union(*(_columns(expr) for expr in dimensions.values())))
+        inserts = "\n".join(_increment(dim, expr, "NEW", 1) for dim, expr in dimensions.items())
+        deletes = "\n".join(_increment(dim, expr, "OLD", -1) for dim, expr in dimensions.items())
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+
+        for event in ("insert", "update", "delete"):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_{table}_counters_{event}")
+
+        cur.execute(f"""
+        CREATE TRIGGER trg_{table}_counters_insert AFTER INSERT ON {table}
+        BEGIN
+        {inserts}
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER trg_{table}_counters_delete AFTER DELETE ON {table}
+        BEGIN
+        {deletes}
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER trg_{table}_counters_update AFTER UPDATE OF {", ".join(columns)} ON {table}
+        WHEN {changed}
+        BEGIN
+        {deletes}
+        {inserts}
+        END
+        """)
+
+    recount(cur, counted)
+
+
+def _actual_counts_sql(table, dimension, expression):
+    return f"""
+    SELECT '{dimension}', CAST(COALESCE({expression}, '') AS TEXT), COUNT(*)
+    FROM {table}
+    GROUP BY 2
+    """
+
+
+def recount(cur, counted=COUNTED_TABLES):
+    cur.execute("DELETE FROM stat_counters")
+    for table, dimensions in _installable(cur, counted).items():
+        for dimension, expression in dimensions.items():
+            cur.execute(
+                "INSERT INTO stat_counters (dimension, value, count) "
+                + _actual_counts_sql(table, dimension, expression)
+            )
+    # Keep the grand totals present even on an empty table
+    cur.execute("INSERT OR IGNORE INTO stat_counters (dimension, value, count) VALUES ('complaints', '', 0)")
+
+
+def rebuild_counters(db):
+    cur = db.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        recount(cur)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def verify_counters(db):
+    """Return (dimension, value, stored, actual) for every drifted counter"""
+    cur = db.cursor()
+    actual = {}
+    for table, dimensions in _installable(cur).items():
+        for dimension, expression in dimensions.items():
+            cur.execute(_actual_counts_sql(table, dimension, expression))
+            for dim, value, count in cur.fetchall():
+                actual[(dim, value)] = count
+
+    cur.execute("SELECT dimension, value, count FROM stat_counters")
+    stored = {(dim, value): count for dim, value, count in cur.fetchall()}
+
+    drift = []
+    for key in sorted(set(actual) | set(stored)):
+        if stored.get(key, 0) != actual.get(key, 0):
+            drift.append((*key, stored.get(key, 0), actual.get(key, 0)))
+    return drift
+
+
+COUNTER_SQL = "SELECT count FROM stat_counters WHERE dimension=? AND value=?"
+COUNTER_GROUPS_SQL = """
+SELECT NULLIF(value, ''), count
+FROM stat_counters
+WHERE dimension=? AND count > 0
+ORDER BY value
+"""
+
+
+def read_counter(cur, dimension, value=""):
+    cur.execute(COUNTER_SQL, (dimension, value))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def read_counter_groups(cur, dimension, order_by_count=False):
+    """[(value, count)] for a dimension; '' is returned as None like GROUP BY NULL"""
+    cur.execute(COUNTER_GROUPS_SQL, (dimension,))
+    groups = cur.fetchall()
+    if order_by_count:
+        groups.sort(key=lambda group: group[1], reverse=True)
+    return groups
@@ -0,0 +1,148 @@
+"""Reproducible synthetic citizens, officers and complaints at any scale.
+
+Rows follow the shapes in ``dummy_data.sql``: gazetteer locations written
+the way residents type them, department-specific titles, and the same
+status and priority vocabulary. The same seed always produces the same data.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from areas import GAZETTEER, resolve_area
+
+FIRST_NAMES = [
+    "Rahul", "Neha", "Amit", "Karan", "Pooja", "Sunita", "Anil", "Maya", "Priya", "Vikram",
+    "Riya", "Arjun", "Kavya", "Harsh", "Isha", "Manoj", "Divya", "Yash", "Sneha", "Nikhil",
+]
+LAST_NAMES = [
+    "Patel", "Sharma", "Verma", "Shah", "Mehta", "Joshi", "Desai", "Trivedi", "Pandya", "Rao",
+]
+GENDERS = ["Male", "Female"]
+
+# department -> (title, description) pairs in the style of dummy_data.sql
+ISSUES = {
+    "Sanitation": [
+        ("Garbage Overflow Near Society", "Garbage bins are overflowing for the last {days} days causing foul smell."),
+        ("Irregular Garbage Collection", "Garbage collection vehicle does not come regularly."),
+        ("Dead Animal on Road", "A dead animal has not been removed for {days} days."),
+        ("Open Dumping Near Park", "People are dumping waste in the open plot next to the park."),
+    ],
+    "Electricity": [
+        ("Street Light Not Working", "Street light outside my house is not working at night."),
+        ("Street Light Flickering", "Light keeps flickering and turns off."),
+        ("Exposed Electric Wires", "Loose wires are hanging from the pole near the school."),
+    ],
+    "Water Supply": [
+        ("Water Leakage on Road", "Continuous water leakage damaging the road surface."),
+        ("Water Supply Disruption", "No water supply since morning."),
+        ("Contaminated Tap Water", "Tap water has been muddy for {days} days."),
+        ("Low Water Pressure", "Water pressure is too low to reach the first floor."),
+    ],
+    "Public Works": [
+        ("Potholes After Rain", "Large potholes causing traffic jams and accidents."),
+        ("Broken Drainage Cover", "Open drainage cover is dangerous for pedestrians."),
+        ("Damaged Footpath", "Footpath tiles are broken and people are tripping."),
+        ("Fallen Tree Blocking Road", "A tree fell during the storm and blocks one lane."),
+    ],
+}
+LOCATION_SUFFIXES = ["", " Cross Road", " Main Road", " Area", " Circle", " Char Rasta"]
+
+# Weights roughly matching a live backlog: most complaints are old and closed
+STATUS_WEIGHTS = {"Pending": 3, "In Progress": 2, "Resolved": 5}
+PRIORITY_WEIGHTS = {"High": 3, "Medium": 5, "Low": 2}
+
+
+def _locations():
+    places = []
+    for city, wards in GAZETTEER.items():
+        for names in wards.values():
+            places.extend((name, city) for name in names)
+    return places
+
+
+def _person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate_users(db, rng, citizens, officers_per_department, departments):
+    """Insert citizens with complete profiles plus active officers; returns citizen ids"""
+    places = _locations()
+    cur = db.cursor()
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+    offset = cur.fetchone()[0]
+
+    rows = []
+    for n in range(citizens):
+        area, city = rng.choice(places)
+        birthday = date(1960, 1, 1) + timedelta(days=rng.randrange(16000))
+        rows.append((
+            _person(rng), f"citizen{offset + n}@example.com", f"9{offset + n:09d}", "1234",
+            "citizen", None, "active", None,
+            f"{rng.randrange(1000, 9999)}-{rng.randrange(1000, 9999)}-{rng.randrange(1000, 9999)}",
+            birthday.isoformat(), rng.choice(GENDERS), f"{area}, {city}",
+        ))
+    for department in departments:
+        for n in range(officers_per_department):
+            code = department[0]
+            rows.append((
+                _person(rng), f"officer.{code.lower()}{offset + n}@gov.example.com", None, "1234",
+                "government", f"{code}-{offset + n}", "active", department,
+                None, None, None, None,
+            ))
+
+    cur.executemany("""
+    INSERT INTO users (name,email,mobile,password,role,gov_id,status,department,aadhaar,dob,gender,address)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+    """, rows)
+    db.commit()
+
+    cur.execute("SELECT id FROM users WHERE role='citizen' AND id > ? ORDER BY id", (offset,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def generate_complaints(db, rng, count, citizen_ids, batch_size=5000, start=date(2022, 1, 1), on_batch=None):
+    """Insert ``count`` complaints in batches with areas resolved up front"""
+    places = _locations()
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+    departments = list(ISSUES)
+    span_days = max((date.today() - start).days, 1)
+    area_ids = {}
+
+    cur = db.cursor()
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < count:
+        rows = []
+        for _ in range(min(batch_size, count - inserted)):
+            department = rng.choice(departments)
+            title, description = rng.choice(ISSUES[department])
+            area, city = rng.choice(places)
+            location = f"{area}{rng.choice(LOCATION_SUFFIXES)}, {city}"
+            if location not in area_ids:
+                area_ids[location] = resolve_area(cur, location)
+            status = rng.choices(statuses, status_weights)[0]
+            rows.append((
+                title, description.format(days=rng.randrange(2, 10)), location, department,
+                rng.choice(citizen_ids), rng.choices(priorities, priority_weights)[0], status,
+                None, (start + timedelta(days=rng.randrange(span_days))).isoformat(),
+                *area_ids[location],
+            ))
+        cur.executemany("""
+        INSERT INTO complaints
+        (title,description,location,department,citizen_id,priority,status,image,date,area_id,ward_id,city_id)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+        """, rows)
+        db.commit()
+        inserted += len(rows)
+        if on_batch:
+            on_batch(inserted, inserted / (time.perf_counter() - started))
+    return inserted
+
+
+def generate(db, complaints, citizens, officers_per_department=5, seed=42, batch_size=5000, on_batch=None):
+    """Populate ``db`` with a reproducible dataset; returns citizen ids"""
+    rng = random.Random(seed)
+    citizen_ids = generate_users(db, rng, citizens, officers_per_department, list(ISSUES))
+    generate_complaints(db, rng, complaints, citizen_ids, batch_size, on_batch=on_batch)
+    return citizen_ids
@@ -0,0 +1,104 @@
+"""Per-worker SQLite connection pool used behind app.get_db()."""
+import os
+import queue
+import sqlite3
+import threading
+
+DEFAULT_PRAGMAS = {
+    # journal_mode must be applied first: it is persistent in the file and
+    # lets readers proceed while a writer holds the lock.
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,
+    "mmap_size": 134217728,
+    "busy_timeout": 5000,
+}
+
+
+class ConnectionPool:
+    def __init__(self, path, size=8, pragmas=None, on_connect=None, uri=False):
+        self.path = path
+        self.uri = uri
+        self.size = size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        # Called with each new connection after the pragmas, e.g. to ATTACH
+        self.on_connect = on_connect
+        # Optional sqlite3 trace callback applied to every connection handed out
+        self.trace = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # A forked gunicorn worker must never reuse the parent's handles.
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "released": 0,
+            "discarded": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, uri=self.uri)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                conn = self._idle.get_nowait()
+                self._stats["reused"] += 1
+            except queue.Empty:
+                conn = None
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._stats["in_use"] -= 1
+                raise
+            with self._lock:
+                self._stats["created"] += 1
+        conn.set_trace_callback(self.trace)
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            self._stats["in_use"] -= 1
+            try:
+                self._idle.put_nowait(conn)
+                self._stats["released"] += 1
+                return
+            except queue.Full:
+                self._stats["discarded"] += 1
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(pid=self._pid, size=self.size, idle=self._idle.qsize())
+        # A steady stream of discards means the pool is smaller than the
+        # number of concurrent requests this worker serves.
+        return stats
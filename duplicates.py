@@ -0,0 +1,126 @@
+"""Near-duplicate complaint detection with MinHash signatures and LSH bands.
+
+Each complaint's title, description and location are cut into character
+shingles and summarised by a MinHash signature, whose matching positions
+estimate the Jaccard similarity of two shingle sets. The signature is split
+into bands; complaints sharing any band bucket within the same department
+and area are candidates, so a lookup reads a handful of index entries rather
+than comparing against every open complaint. Buckets live in SQLite next to
+the complaints, so every worker sees a report as soon as it commits and the
+lookup can run inside the submitting transaction.
+"""
+import hashlib
+import random
+import struct
+
+from areas import area_key
+
+NUM_PERMUTATIONS = 64
+BANDS = 32  # of NUM_PERMUTATIONS // BANDS rows each
+SHINGLE_SIZE = 4
+
+# Fixed seed: signatures are persisted and must compare across processes
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+_SIGNATURE = struct.Struct(f"<{NUM_PERMUTATIONS}Q")
+_ROWS = NUM_PERMUTATIONS // BANDS
+
+
+def _hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def shingles(title, description, location):
+    words = " ".join(
+        "".join(char for char in part.lower() if char.isalnum() or char.isspace())
+        for part in (title or "", description or "", location or "")
+    ).split()
+    text = " ".join(words)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(title, description, location):
+    """MinHash signature of a complaint's text, as a tuple of NUM_PERMUTATIONS ints"""
+    hashes = [_hash(shingle.encode()) for shingle in shingles(title, description, location)]
+    if not hashes:
+        return (_MERSENNE_PRIME,) * NUM_PERMUTATIONS
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of the two signatures' shingle sets"""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERMUTATIONS
+
+
+def band_buckets(sig):
+    buckets = []
+    for band in range(BANDS):
+        # The band number is hashed in so equal rows in different bands do not collide
+        rows = struct.pack(f"<{_ROWS + 1}Q", band, *sig[band * _ROWS:(band + 1) * _ROWS])
+        # Signed so the bucket fits an SQLite INTEGER
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def duplicate_scope(department, location):
+    """Complaints are only compared within one department and area"""
+    return f"{department or ''}|{area_key(location)}"
+
+
+def index_complaint(cur, complaint_id, scope, sig):
+    cur.execute("""
+    INSERT OR REPLACE INTO complaint_signatures (complaint_id, signature) VALUES (?,?)
+    """, (complaint_id, _SIGNATURE.pack(*sig)))
+    cur.executemany("""
+    INSERT OR IGNORE INTO complaint_lsh_buckets (scope, bucket, complaint_id) VALUES (?,?,?)
+    """, [(scope, bucket, complaint_id) for bucket in band_buckets(sig)])
+
+
+def candidates_query(scope, buckets):
+    """SELECT for open complaints in ``scope`` sharing a band bucket with a signature"""
+    return f"""
+    SELECT DISTINCT s.complaint_id, s.signature, COALESCE(c.parent_id, c.id)
+    FROM complaint_lsh_buckets b
+    JOIN complaint_signatures s ON s.complaint_id = b.complaint_id
+    JOIN complaints c ON c.id = b.complaint_id
+    WHERE b.scope=? AND b.bucket IN ({",".join("?" * len(buckets))})
+    AND c.status != 'Resolved'
+    """, (scope, *buckets)
+
+
+def find_duplicate(cur, scope, sig, threshold):
+    """(parent_id, similarity) of the closest open complaint in ``scope``, or None
+
+    A match that is itself a linked report resolves to its parent.
+    """
+    cur.execute(*candidates_query(scope, band_buckets(sig)))
+
+    best = None
+    for _, stored, parent_id in cur.fetchall():
+        score = similarity(sig, _SIGNATURE.unpack(stored))
+        if score >= threshold and (best is None or score > best[1]):
+            best = (parent_id, score)
+    return best
+
+
+def index_batch(cur, batch_size=500):
+    """Index one batch of complaints inserted without a signature; returns how many"""
+    cur.execute("""
+    SELECT id, title, description, location, department FROM complaints c
+    WHERE NOT EXISTS (SELECT 1 FROM complaint_signatures s WHERE s.complaint_id = c.id)
+    LIMIT ?
+    """, (batch_size,))
+    rows = cur.fetchall()
+    for complaint_id, title, description, location, department in rows:
+        index_complaint(
+            cur, complaint_id, duplicate_scope(department, location),
+            signature(title, description, location)
+        )
+    return len(rows)
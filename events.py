@@ -0,0 +1,181 @@
+"""Complaint change events pushed to browsers over Server-Sent Events.
+
+Routes ``publish`` into the ``events`` outbox inside their own transaction,
+so an event exists exactly when its write commits. One broker thread per
+worker polls the outbox and fans new rows out to in-memory subscriber
+queues; SSE responses only wait on their queue. Under a gevent worker each
+waiting response is a greenlet rather than a thread, so thousands of idle
+subscribers cost a queue each.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+
+
+POLL_SQL = """
+SELECT id, channel, kind, payload FROM events
+WHERE id > ?
+ORDER BY id
+LIMIT ?
+"""
+PRUNE_SQL = "DELETE FROM events WHERE created_at < ?"
+
+
+def replay_query(channels, after_id, until_id, limit):
+    """SELECT for the events on ``channels`` a reconnecting subscriber missed"""
+    placeholders = ",".join("?" * len(channels))
+    return f"""
+    SELECT id, kind, payload FROM events
+    WHERE channel IN ({placeholders}) AND id > ? AND id <= ?
+    ORDER BY id
+    LIMIT ?
+    """, (*channels, after_id, until_id, limit)
+
+
+def citizen_channel(citizen_id):
+    return f"citizen:{citizen_id}"
+
+
+def department_channel(department):
+    return f"department:{department}"
+
+
+def publish(cur, channels, kind, payload):
+    """Insert an event for each channel on the caller's cursor; delivered after commit"""
+    now = time.time()
+    data = json.dumps(payload)
+    cur.executemany("""
+    INSERT INTO events (channel, kind, payload, created_at) VALUES (?,?,?,?)
+    """, [(channel, kind, data, now) for channel in channels])
+
+
+def format_event(event_id, kind, payload):
+    return f"id: {event_id}\nevent: {kind}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    def __init__(self, channels, max_pending):
+        self.channels = channels
+        self.queue = queue.Queue(max_pending)
+        # Set when the subscriber fell too far behind; the stream ends and
+        # the browser reconnects with Last-Event-ID to catch up from the table
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next (id, kind, payload) event, or None after ``timeout`` seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    def __init__(self, pool, poll_interval=0.5, batch_size=500, max_pending=100, keep_seconds=3600):
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._subscribers = {}  # channel -> set of Subscription
+        self._pid = None
+        self._last_id = 0
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # First call in this process (or after a fork): fresh state and thread
+            self._pid = os.getpid()
+            self._subscribers = {}
+            db = self.pool.acquire()
+            try:
+                self._last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+            finally:
+                self.pool.release(db)
+            threading.Thread(target=self._poll_forever, name="event-broker", daemon=True).start()
+
+    def wake(self):
+        """Tell this worker's broker an event was committed"""
+        self._wakeup.set()
+
+    def subscribe(self, channels, last_event_id=None):
+        """Register for ``channels``, first replaying anything after ``last_event_id``"""
+        subscription = Subscription(tuple(channels), self.max_pending)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+            replay_until = self._last_id
+
+        if last_event_id is not None and last_event_id < replay_until:
+            db = self.pool.acquire()
+            try:
+                rows = db.execute(*replay_query(
+                    subscription.channels, last_event_id, replay_until, self.max_pending
+                )).fetchall()
+            finally:
+                self.pool.release(db)
+            for row in rows:
+                subscription.deliver(row)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscribers.values())) if self._subscribers else 0
+
+    def _poll_forever(self):
+        last_prune = 0
+        while True:
+            try:
+                if time.time() - last_prune > self.keep_seconds / 4:
+                    self.prune()
+                    last_prune = time.time()
+                if self._poll() == self.batch_size:
+                    continue
+            except Exception:
+                traceback.print_exc()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _poll(self):
+        db = self.pool.acquire()
+        try:
+            rows = db.execute(POLL_SQL, (self._last_id, self.batch_size)).fetchall()
+        finally:
+            self.pool.release(db)
+
+        with self._lock:
+            for event_id, channel, kind, payload in rows:
+                for subscription in self._subscribers.get(channel, ()):
+                    subscription.deliver((event_id, kind, payload))
+            if rows:
+                self._last_id = rows[-1][0]
+        return len(rows)
+
+    def prune(self):
+        db = self.pool.acquire()
+        try:
+            cur = db.execute(PRUNE_SQL, (time.time() - self.keep_seconds,))
+            db.commit()
+            return cur.rowcount
+        finally:
+            self.pool.release(db)
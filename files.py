@@ -0,0 +1,33 @@
+"""Atomic file writes with the permissions a plain open() would give.
+
+Files are written under a temporary name beside their destination and
+renamed over it, so readers (another worker, the web server) never see a
+partial file. ``tempfile.mkstemp`` creates files readable by their owner
+only; ``move_into_place`` widens them to the usual 0666 minus the process
+umask before the rename, so a server running as another user can read them.
+"""
+import os
+import tempfile
+
+# The process umask, read once: os.umask can only be read by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def move_into_place(tmp_path, path):
+    """Give a finished temporary file the default mode and rename it to ``path``"""
+    os.chmod(tmp_path, 0o666 & ~UMASK)
+    os.replace(tmp_path, path)
+
+
+def write_atomic(path, data, prefix=".tmp-"):
+    """Write ``data`` (bytes) to ``path`` through a temporary file in the same directory"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=prefix)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        move_into_place(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,243 @@
+"""Append-only complaint status history and the daily rollups it feeds.
+
+Triggers on ``complaints`` append a ``complaint_events`` row for every new
+complaint and every status change, inside the writer's own transaction, so
+no code path (report form, bulk update, import) can skip the log. A trigger
+on the log then folds each event into ``complaint_rollups`` (daily opened /
+resolved / reopened counts per dimension) and ``resolution_histogram``
+(resolution times in fixed buckets), so trend panels read one row per day
+instead of scanning complaints. Medians and p90s are estimated from the
+buckets, like the latency histograms in ``metrics``.
+
+The department, area and priority of an event are copied from the complaint
+when it happens; areas resolved later by the backfill job are not restated.
+"""
+from datetime import date, timedelta
+
+# dimension -> complaint_events column it is grouped by; "all" is one total.
+# The triggers use the set their migration froze (migrations.ROLLUPS_V12);
+# changing either of these takes a new one.
+ROLLUP_DIMENSIONS = {
+    "all": None,
+    "department": "department",
+    "area_id": "area_id",
+    "priority": "priority",
+}
+
+# Upper bounds, in hours, of the resolution time buckets; one more bucket
+# holds everything slower
+RESOLUTION_BUCKETS = (1, 4, 12, 24, 48, 72, 120, 168, 336, 720, 1440)
+
+# Unix time in SQL, with sub-second precision
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def _unixtime(expression):
+    return f"((julianday({expression}, 'utc') - 2440587.5) * 86400.0)"
+
+
+def _value(column, alias):
+    return f"CAST(COALESCE({alias}.{column}, '') AS TEXT)" if column else "''"
+
+
+def _event_day(alias):
+    return f"date({alias}.created_at, 'unixepoch', 'localtime')"
+
+
+def _bucket(seconds, buckets):
+    cases = " ".join(
+        f"WHEN {seconds} <= {hours * 3600} THEN {index}"
+        for index, hours in enumerate(buckets)
+    )
+    return f"CASE {cases} ELSE {len(buckets)} END"
+
+
+def install_history_triggers(cur, dimensions=ROLLUP_DIMENSIONS, buckets=RESOLUTION_BUCKETS):
+    """(Re)create the history triggers, rolling events up by ``dimensions`` into ``buckets``
+
+    Migrations pass the dimensions and bucket bounds of their day, so a
+    replay rolls up the way it did then.
+    """
+    for name in ("complaints_history_insert", "complaints_history_update", "complaint_events_rollup"):
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{name}")
+
+    # Back-dated rows (imports, generated data) are logged on their own day
+    cur.execute(f"""
+    CREATE TRIGGER trg_complaints_history_insert AFTER INSERT ON complaints
+    BEGIN
+        INSERT INTO complaint_events
+        (complaint_id, kind, to_status, department, area_id, priority, actor_id, created_at)
+        VALUES (
+            NEW.id, 'created', NEW.status, NEW.department, NEW.area_id, NEW.priority, NEW.citizen_id,
+            CASE WHEN NEW.date < date('now', 'localtime') THEN {_unixtime("NEW.date")} ELSE {_NOW} END
+        );
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER trg_complaints_history_update AFTER UPDATE OF status ON complaints
+    WHEN OLD.status IS NOT NEW.status
+    BEGIN
+        INSERT INTO complaint_events
+        (complaint_id, kind, from_status, to_status, department, area_id, priority, actor_id,
+         resolution_seconds, created_at)
+        VALUES (
+            NEW.id, 'status', OLD.status, NEW.status, NEW.department, NEW.area_id, NEW.priority,
+            NEW.assigned_to,
+            CASE WHEN NEW.status = 'Resolved' THEN {_NOW} - (
+                SELECT created_at FROM complaint_events
+                WHERE complaint_id = NEW.id AND kind = 'created'
+                LIMIT 1
+            ) END,
+            {_NOW}
+        );
+    END
+    """)
+
+    statements = []
+    for dimension, column in dimensions.items():
+        value = _value(column, "NEW")
+        day = _event_day("NEW")
+        statements.append(f"""
+        INSERT INTO complaint_rollups (day, dimension, value, opened, resolved, reopened, resolution_seconds)
+        VALUES (
+            {day}, '{dimension}', {value},
+            NEW.kind = 'created',
+            NEW.resolution_seconds IS NOT NULL,
+            COALESCE(NEW.from_status = 'Resolved', 0),
+            COALESCE(NEW.resolution_seconds, 0)
+        )
+        ON CONFLICT (dimension, value, day) DO UPDATE SET
+            opened = opened + excluded.opened,
+            resolved = resolved + excluded.resolved,
+            reopened = reopened + excluded.reopened,
+            resolution_seconds = resolution_seconds + excluded.resolution_seconds;
+        INSERT INTO resolution_histogram (day, dimension, value, bucket, count)
+        SELECT {day}, '{dimension}', {value}, {_bucket("NEW.resolution_seconds", buckets)}, 1
+        WHERE NEW.resolution_seconds IS NOT NULL
+        ON CONFLICT (dimension, value, day, bucket) DO UPDATE SET count = count + 1;""")
+    cur.execute(f"""
+    CREATE TRIGGER trg_complaint_events_rollup AFTER INSERT ON complaint_events
+    BEGIN
+    {"".join(statements)}
+    END
+    """)
+
+
+def recount_rollups(cur, dimensions=ROLLUP_DIMENSIONS, buckets=RESOLUTION_BUCKETS):
+    """Recompute every rollup row from complaint_events"""
+    cur.execute("DELETE FROM complaint_rollups")
+    cur.execute("DELETE FROM resolution_histogram")
+    for dimension, column in dimensions.items():
+        value = _value(column, "e")
+        day = _event_day("e")
+        cur.execute(f"""
+        INSERT INTO complaint_rollups (day, dimension, value, opened, resolved, reopened, resolution_seconds)
+        SELECT {day}, '{dimension}', {value},
+               SUM(kind = 'created'),
+               SUM(resolution_seconds IS NOT NULL),
+               SUM(COALESCE(from_status = 'Resolved', 0)),
+               COALESCE(SUM(resolution_seconds), 0)
+        FROM complaint_events e
+        GROUP BY 1, 3
+        """)
+        cur.execute(f"""
+        INSERT INTO resolution_histogram (day, dimension, value, bucket, count)
+        SELECT {day}, '{dimension}', {value}, {_bucket("resolution_seconds", buckets)}, COUNT(*)
+        FROM complaint_events e
+        WHERE resolution_seconds IS NOT NULL
+        GROUP BY 1, 3, 4
+        """)
+
+
+def rebuild_rollups(db):
+    cur = db.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        recount_rollups(cur)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def histogram_quantile(counts, quantile):
+    """Estimated resolution hours at ``quantile`` from per-bucket counts, or None"""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = quantile * total
+    bounds = (0, *RESOLUTION_BUCKETS)
+    cumulative = 0
+    for index, count in enumerate(counts):
+        cumulative += count
+        if count and cumulative >= rank:
+            if index == len(RESOLUTION_BUCKETS):
+                # Slower than the last bound; report the bound
+                return float(RESOLUTION_BUCKETS[-1])
+            # Interpolate within the bucket, as Prometheus does
+            lower, upper = bounds[index], bounds[index + 1]
+            return lower + (upper - lower) * (rank - cumulative + count) / count
+    return None
+
+
+ROLLUPS_SQL = """
+SELECT day, opened, resolved, reopened, resolution_seconds
+FROM complaint_rollups
+WHERE dimension=? AND value=? AND day BETWEEN ? AND ?
+"""
+HISTOGRAM_SQL = """
+SELECT day, bucket, count
+FROM resolution_histogram
+WHERE dimension=? AND value=? AND day BETWEEN ? AND ?
+"""
+
+
+def trend(cur, dimension, value, since, until=None):
+    """Daily rollups for one dimension value from ``since`` to ``until`` (ISO dates)
+
+    Returns (days, summary). Every day in the window is present, quiet ones
+    with zero counts; each is a dict of opened, resolved and reopened counts
+    plus median_hours / p90_hours. ``summary`` aggregates the whole window.
+    """
+    until = until or date.today().isoformat()
+    cur.execute(ROLLUPS_SQL, (dimension, value, since, until))
+    rollups = {row[0]: row[1:] for row in cur.fetchall()}
+
+    buckets = {}
+    cur.execute(HISTOGRAM_SQL, (dimension, value, since, until))
+    for day, bucket, count in cur.fetchall():
+        buckets.setdefault(day, [0] * (len(RESOLUTION_BUCKETS) + 1))[bucket] += count
+
+    days = []
+    totals = [0] * (len(RESOLUTION_BUCKETS) + 1)
+    opened = resolved = reopened = 0
+    seconds = 0.0
+    day = date.fromisoformat(since)
+    while day.isoformat() <= until:
+        key = day.isoformat()
+        day_opened, day_resolved, day_reopened, day_seconds = rollups.get(key, (0, 0, 0, 0.0))
+        day_buckets = buckets.get(key, [])
+        days.append({
+            "day": key,
+            "opened": day_opened,
+            "resolved": day_resolved,
+            "reopened": day_reopened,
+            "median_hours": histogram_quantile(day_buckets, 0.5),
+            "p90_hours": histogram_quantile(day_buckets, 0.9),
+        })
+        opened += day_opened
+        resolved += day_resolved
+        reopened += day_reopened
+        seconds += day_seconds
+        for bucket, count in enumerate(day_buckets):
+            totals[bucket] += count
+        day += timedelta(days=1)
+
+    return days, {
+        "opened": opened,
+        "resolved": resolved,
+        "reopened": reopened,
+        "mean_hours": seconds / resolved / 3600 if resolved else None,
+        "median_hours": histogram_quantile(totals, 0.5),
+        "p90_hours": histogram_quantile(totals, 0.9),
+    }
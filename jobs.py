@@ -0,0 +1,231 @@
+"""Background jobs persisted in the SQLite `jobs` table.
+
+Routes enqueue inside their own transaction, so a job exists exactly when
+the write that produced it commits. Each worker process runs one dispatcher
+thread that claims due jobs and hands them to a thread or process pool;
+failures are retried with exponential backoff. Jobs left `running` by a
+worker that died are requeued once their lease expires, so handlers must
+be safe to run twice.
+"""
+import json
+import os
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+
+# kind -> (handler, max_attempts). Module level so process-pool children
+# forked from a worker see the same registrations.
+HANDLERS = {}
+
+# Takes the oldest due job, so a worker never picks one another has claimed
+CLAIM_SQL = """
+UPDATE jobs
+SET status='running', attempts=attempts+1, locked_by=?, updated_at=?
+WHERE id = (
+    SELECT id FROM jobs
+    WHERE status='queued' AND run_after<=?
+    ORDER BY run_after, id
+    LIMIT 1
+)
+RETURNING id, kind, payload, attempts, max_attempts
+"""
+
+
+def job(kind, max_attempts=5):
+    """Register a handler taking the decoded JSON payload"""
+    def register(handler):
+        HANDLERS[kind] = (handler, max_attempts)
+        return handler
+    return register
+
+
+def run_handler(kind, payload):
+    handler, _ = HANDLERS[kind]
+    handler(payload)
+
+
+class JobQueue:
+    def __init__(self, pool, workers=2, executor="thread", poll_interval=1.0,
+                 lease_seconds=300, backoff_base=2.0, backoff_max=3600, keep_done_seconds=7 * 86400):
+        self.pool = pool
+        self.workers = workers
+        self.executor = executor
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.keep_done_seconds = keep_done_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def enqueue(self, cur, kind, payload=None, delay=0):
+        """Insert a job on the caller's cursor; it runs once that transaction commits"""
+        if kind not in HANDLERS:
+            raise KeyError(f"No job handler registered for {kind!r}")
+        now = time.time()
+        cur.execute("""
+        INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+        VALUES (?,?,'queued',0,?,?,?,?)
+        """, (kind, json.dumps(payload or {}), HANDLERS[kind][1], now + delay, now, now))
+        return cur.lastrowid
+
+    def wake(self):
+        """Tell this worker's dispatcher a job was committed"""
+        self._wakeup.set()
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # First call in this process (or after a fork): new pool, new thread
+            self._pid = os.getpid()
+            self._slots = threading.BoundedSemaphore(self.workers)
+            if self.executor == "process":
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="jobs")
+            threading.Thread(target=self._dispatch_forever, name="job-dispatcher", daemon=True).start()
+
+    def run_until_idle(self):
+        """Run due jobs inline until none are left (CLI workers and maintenance)"""
+        ran = 0
+        while (claimed := self._claim()) is not None:
+            try:
+                run_handler(claimed[1], json.loads(claimed[2]))
+                error = None
+            except Exception:
+                error = traceback.format_exc()
+            self._finish(claimed, error)
+            ran += 1
+        return ran
+
+    def _dispatch_forever(self):
+        last_maintenance = 0
+        while True:
+            if time.time() - last_maintenance > self.lease_seconds / 2:
+                try:
+                    self.requeue_expired()
+                    self.prune_done()
+                except Exception:
+                    traceback.print_exc()
+                last_maintenance = time.time()
+
+            self._slots.acquire()
+            try:
+                claimed = self._claim()
+            except Exception:
+                claimed = None
+                traceback.print_exc()
+
+            if claimed is None:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            future = self._executor.submit(run_handler, claimed[1], json.loads(claimed[2]))
+            future.add_done_callback(lambda done, claimed=claimed: self._on_done(claimed, done))
+
+    def _on_done(self, claimed, future):
+        try:
+            exception = future.exception()
+            error = None
+            if exception is not None:
+                error = "".join(traceback.format_exception(exception))
+            self._finish(claimed, error)
+        finally:
+            self._slots.release()
+
+    def _claim(self):
+        db = self.pool.acquire()
+        try:
+            now = time.time()
+            row = db.execute(CLAIM_SQL, (os.getpid(), now, now)).fetchone()
+            db.commit()
+            return row
+        finally:
+            self.pool.release(db)
+
+    def _finish(self, claimed, error):
+        job_id, _, _, attempts, max_attempts = claimed
+        now = time.time()
+        db = self.pool.acquire()
+        try:
+            if error is None:
+                db.execute("""
+                UPDATE jobs SET status='done', last_error=NULL, locked_by=NULL, updated_at=?
+                WHERE id=?
+                """, (now, job_id))
+            elif attempts >= max_attempts:
+                db.execute("""
+                UPDATE jobs SET status='failed', last_error=?, locked_by=NULL, updated_at=?
+                WHERE id=?
+                """, (error, now, job_id))
+            else:
+                delay = min(self.backoff_base ** attempts, self.backoff_max) + random.uniform(0, 1)
+                db.execute("""
+                UPDATE jobs SET status='queued', last_error=?, locked_by=NULL, run_after=?, updated_at=?
+                WHERE id=?
+                """, (error, now + delay, now, job_id))
+            db.commit()
+        finally:
+            self.pool.release(db)
+
+    def requeue_expired(self):
+        """Requeue jobs claimed longer ago than the lease; their worker likely died"""
+        db = self.pool.acquire()
+        try:
+            cutoff = time.time() - self.lease_seconds
+            cur = db.execute("""
+            UPDATE jobs SET status='queued', locked_by=NULL
+            WHERE status='running' AND updated_at < ?
+            """, (cutoff,))
+            db.commit()
+            return cur.rowcount
+        finally:
+            self.pool.release(db)
+
+    def prune_done(self):
+        db = self.pool.acquire()
+        try:
+            cur = db.execute("""
+            DELETE FROM jobs WHERE status='done' AND updated_at < ?
+            """, (time.time() - self.keep_done_seconds,))
+            db.commit()
+            return cur.rowcount
+        finally:
+            self.pool.release(db)
+
+    def retry(self, cur, job_id):
+        cur.execute("""
+        UPDATE jobs SET status='queued', attempts=0, run_after=?, updated_at=?
+        WHERE id=? AND status='failed'
+        """, (time.time(), time.time(), job_id))
+        return cur.rowcount
+
+
+def job_counts(cur):
+    cur.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+    counts = dict.fromkeys(JOB_STATUSES, 0)
+    counts.update(cur.fetchall())
+    return counts
+
+
+def recent_jobs(cur, status=None, limit=50):
+    query = """
+    SELECT id, kind, status, attempts, max_attempts, run_after, updated_at, last_error
+    FROM jobs
+    """
+    params = []
+    if status:
+        query += " WHERE status=?"
+        params.append(status)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    cur.execute(query, params)
+    return cur.fetchall()
@@ -0,0 +1,111 @@
+"""Paginated, projected, sortable JSON listings for the admin dashboard panels."""
+from search import to_match_query
+
+# name -> table, fixed WHERE, selectable fields, default fields, optional
+# equality filters taken from the query string, and how `q` searches.
+LISTINGS = {
+    "complaints": {
+        "table": "complaints",
+        # Linked duplicate reports are counted on their parent's upvotes
+        "where": "parent_id IS NULL",
+        "fields": [
+            "id", "title", "location", "department", "priority", "status", "date", "citizen_id", "assigned_to",
+            "upvotes",
+        ],
+        "default_fields": ["id", "title", "department", "priority", "status", "date", "upvotes"],
+        "filters": ["status", "priority", "department"],
+        "search": "fts",
+    },
+    "officers": {
+        "table": "users",
+        "where": "role='government'",
+        "fields": ["id", "name", "email", "mobile", "gov_id", "department", "status"],
+        "default_fields": ["id", "name", "email", "gov_id", "department"],
+        "filters": ["status", "department"],
+        "search": "like",
+    },
+    "citizens": {
+        "table": "users",
+        "where": "role='citizen'",
+        "fields": ["id", "name", "email", "mobile", "status"],
+        "default_fields": ["id", "name", "email"],
+        "filters": [],
+        "search": "like",
+    },
+}
+
+MAX_PER_PAGE = 100
+
+
+class ListingError(ValueError):
+    pass
+
+
+def parse_fields(spec, raw):
+    if not raw:
+        return list(spec["default_fields"])
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in spec["fields"]]
+    if unknown:
+        raise ListingError(f"Unknown fields: {', '.join(unknown)}")
+    # Always include the id so rows can be linked and acted on
+    return fields if "id" in fields else ["id"] + fields
+
+
+def parse_sort(spec, raw):
+    raw = raw or "-id"
+    column = raw.lstrip("-")
+    if column not in spec["fields"]:
+        raise ListingError(f"Cannot sort by {column}")
+    direction = "DESC" if raw.startswith("-") else "ASC"
+    # id as a tiebreaker keeps pages stable when the sort column repeats
+    return f"{column} {direction}" + ("" if column == "id" else f", id {direction}")
+
+
+def listing_query(spec, fields, order_by, args, page, per_page):
+    """SELECT for one page of a listing, plus one row to detect a next page
+
+    ``args`` supplies the filter values and the ``q`` search text.
+    """
+    query = f"SELECT {', '.join(fields)} FROM {spec['table']} WHERE {spec['where']}"
+    params = []
+
+    for column in spec["filters"]:
+        value = args.get(column)
+        if value:
+            query += f" AND {column}=?"
+            params.append(value)
+
+    search = (args.get("q") or "").strip()
+    if search and spec["search"] == "fts":
+        match = to_match_query(search)
+        if match:
+            query += " AND id IN (SELECT rowid FROM complaints_fts WHERE complaints_fts MATCH ?)"
+            params.append(match)
+    elif search:
+        query += " AND (name LIKE ? OR email LIKE ?)"
+        params += [f"%{search}%", f"%{search}%"]
+
+    query += f" ORDER BY {order_by} LIMIT ? OFFSET ?"
+    params += [per_page + 1, (page - 1) * per_page]
+    return query, params
+
+
+def fetch_listing(cur, name, args):
+    """Run one page of a listing from request args; returns a JSON-ready dict"""
+    spec = LISTINGS[name]
+    fields = parse_fields(spec, args.get("fields"))
+    order_by = parse_sort(spec, args.get("sort"))
+    page = max(args.get("page", 1, type=int), 1)
+    per_page = min(max(args.get("per_page", 25, type=int), 1), MAX_PER_PAGE)
+
+    cur.execute(*listing_query(spec, fields, order_by, args, page, per_page))
+    rows = cur.fetchall()
+    return {
+        "ok": True,
+        "fields": fields,
+        "items": [dict(zip(fields, row)) for row in rows[:per_page]],
+        "page": page,
+        "per_page": per_page,
+        "has_next": len(rows) > per_page,
+    }
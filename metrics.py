@@ -0,0 +1,162 @@
+"""Request, SQL and template timings exposed in Prometheus text format.
+
+Metrics live in the worker process that recorded them, like the pool and
+cache stats; each gunicorn worker reports its own series.
+"""
+import bisect
+import re
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# Progress ticks mark the last moment SQLite was still executing a statement
+PROGRESS_INTERVAL = 1000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql, limit=300):
+    """Statement text with literals replaced by ?, safe to log and group by
+
+    sqlite3's trace callback receives SQL with bound values expanded, which
+    would otherwise put emails and passwords in the log.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    return sql if len(sql) <= limit else sql[:limit] + "…"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> value
+        self._help = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self):
+        """All series in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            series = {}
+            for (name, labels), value in self._counters.items():
+                series.setdefault(name, []).append((labels, value))
+            for (name, labels), histogram in self._histograms.items():
+                series.setdefault(name, []).append((labels, histogram))
+
+            for name in sorted(series):
+                kind, text = self._help.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(series[name], key=lambda item: item[0]):
+                    if isinstance(value, Histogram):
+                        cumulative = 0
+                        for bound, count in zip((*value.buckets, "+Inf"), value.counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                        lines.append(f"{name}_sum{_labels(labels)} {value.sum:.6f}")
+                        lines.append(f"{name}_count{_labels(labels)} {value.count}")
+                    else:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class SQLRecorder:
+    """Per-request statement count and SQLite execution time
+
+    Installed as a connection's trace callback (one call as each statement
+    starts) and progress handler (called every PROGRESS_INTERVAL VM steps).
+    A statement's duration runs from its trace call to the last progress
+    tick before the next statement starts or the recorder is closed, so time
+    spent in Python between statements is not charged to SQL.
+    """
+
+    def __init__(self, slow_seconds=None, on_slow=None, chained_trace=None):
+        self.slow_seconds = slow_seconds
+        self.on_slow = on_slow
+        self.chained_trace = chained_trace
+        self.statements = 0
+        self.seconds = 0.0
+        self.slow = 0
+        self._current = None
+        self._started = self._last_tick = 0.0
+
+    def attach(self, conn):
+        conn.set_trace_callback(self.on_statement)
+        conn.set_progress_handler(self.on_progress, PROGRESS_INTERVAL)
+
+    def detach(self, conn):
+        self.close()
+        conn.set_trace_callback(self.chained_trace)
+        conn.set_progress_handler(None, 0)
+
+    def on_statement(self, sql):
+        if self.chained_trace:
+            self.chained_trace(sql)
+        # Statements run by triggers are reported as "-- TRIGGER ..." and
+        # belong to the statement that fired them
+        if sql.startswith("--"):
+            return
+        self.close()
+        self.statements += 1
+        self._current = sql
+        self._started = self._last_tick = time.perf_counter()
+
+    def on_progress(self):
+        self._last_tick = time.perf_counter()
+        return 0
+
+    def close(self):
+        if self._current is None:
+            return
+        elapsed = self._last_tick - self._started
+        self.seconds += elapsed
+        if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+            self.slow += 1
+            if self.on_slow:
+                self.on_slow(normalize_sql(self._current), elapsed)
+        self._current = None
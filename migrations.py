@@ -0,0 +1,464 @@
+"""Versioned schema migrations tracked in PRAGMA user_version."""
+import time
+
+from cache import install_table_versions
+from assignment import install_assignment_triggers, recount_loads
+from counters import install_counters
+from history import install_history_triggers, recount_rollups
+
+
+def add_column_if_missing(cur, table, column, definition):
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cur.fetchall()]:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+# Counter dimensions as each counters migration shipped them; frozen so a
+# replay on a new database installs the same triggers it did then
+_USER_COUNTERS = {
+    "users_by_role": "role",
+    "users_by_role_status": "COALESCE(role, '') || '/' || COALESCE(status, '')",
+}
+COUNTERS_V3 = {
+    "complaints": {
+        "complaints": "''",
+        "location": "location",
+        "status": "status",
+        "priority": "priority",
+        "department": "department",
+    },
+    "users": _USER_COUNTERS,
+}
+COUNTERS_V4 = {
+    "complaints": {
+        **COUNTERS_V3["complaints"],
+        "department_status": "COALESCE(department, '') || '/' || COALESCE(status, '')",
+    },
+    "users": _USER_COUNTERS,
+}
+COUNTERS_V8 = {
+    "complaints": {
+        "complaints": "''",
+        "city_id": "city_id",
+        "ward_id": "ward_id",
+        "area_id": "area_id",
+        "status": "status",
+        "priority": "priority",
+        "department": "department",
+        "department_status": "COALESCE(department, '') || '/' || COALESCE(status, '')",
+    },
+    "users": _USER_COUNTERS,
+}
+
+# Likewise the inputs of the other generated triggers, as their migrations
+# shipped them
+VERSIONED_TABLES_V9 = ("complaints", "users")
+ROLLUPS_V12 = {
+    "dimensions": {
+        "all": None,
+        "department": "department",
+        "area_id": "area_id",
+        "priority": "priority",
+    },
+    "buckets": (1, 4, 12, 24, 48, 72, 120, 168, 336, 720, 1440),
+}
+ASSIGNMENT_V14 = {
+    "weights": {"High": 3, "Medium": 2, "Low": 1},
+    "departments": {
+        "W": "Water Supply",
+        "S": "Sanitation",
+        "E": "Electricity",
+        "P": "Public Works",
+    },
+    "default_department": "Water Supply",
+}
+
+
+def create_base_schema(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT UNIQUE,
+        mobile TEXT,
+        password TEXT,
+        role TEXT,
+        gov_id TEXT,
+        status TEXT,
+        aadhaar TEXT,
+        dob TEXT,
+        gender TEXT,
+        address TEXT,
+        department TEXT
+    )
+    """)
+
+    # Databases created before these columns existed
+    add_column_if_missing(cur, "users", "department", "TEXT")
+    add_column_if_missing(cur, "users", "mobile", "TEXT")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS complaints (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        description TEXT,
+        location TEXT,
+        department TEXT,
+        citizen_id INTEGER,
+        priority TEXT,
+        status TEXT,
+        image TEXT,
+        assigned_to INTEGER,
+        date TEXT
+    )
+    """)
+
+
+def create_route_indexes(cur):
+    # government_dashboard, citizen_my_issues
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_department_id ON complaints(department, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_citizen_id ON complaints(citizen_id, id DESC)")
+
+    # admin_issues equality filters, newest first
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_location_id ON complaints(location, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_status_id ON complaints(status, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_priority_id ON complaints(priority, id DESC)")
+
+    # signup duplicate check (email already has its UNIQUE autoindex),
+    # fetch_officers, fetch_citizens and the admin dashboard counts
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_mobile ON users(mobile)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_role_status_id ON users(role, status, id DESC)")
+
+
+def install_aggregate_counters(cur):
+    install_counters(cur, COUNTERS_V3)
+
+
+def add_department_listing(cur):
+    # government_dashboard status/priority filters within a department
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_department_status_id ON complaints(department, status, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_department_priority_id ON complaints(department, priority, id DESC)")
+    # Adds the department_status counter dimension
+    install_counters(cur, COUNTERS_V4)
+
+
+def create_upload_blobs(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS upload_blobs (
+        sha256 TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        refs INTEGER NOT NULL DEFAULT 1
+    )
+    """)
+
+
+def create_jobs(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 5,
+        run_after REAL NOT NULL,
+        locked_by INTEGER,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after)")
+
+
+def create_complaint_search(cur, schema="main"):
+    """Index ``schema``.complaints; the archive database gets its own copy"""
+    cur.execute(f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.complaints_fts USING fts5(
+        title, description, location,
+        content='complaints', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """)
+
+    # Trigger bodies resolve table names in the trigger's own database
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {schema}.trg_complaints_fts_insert AFTER INSERT ON complaints
+    BEGIN
+        INSERT INTO complaints_fts (rowid, title, description, location)
+        VALUES (NEW.id, NEW.title, NEW.description, NEW.location);
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {schema}.trg_complaints_fts_delete AFTER DELETE ON complaints
+    BEGIN
+        INSERT INTO complaints_fts (complaints_fts, rowid, title, description, location)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.location);
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {schema}.trg_complaints_fts_update AFTER UPDATE OF title, description, location ON complaints
+    BEGIN
+        INSERT INTO complaints_fts (complaints_fts, rowid, title, description, location)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.location);
+        INSERT INTO complaints_fts (rowid, title, description, location)
+        VALUES (NEW.id, NEW.title, NEW.description, NEW.location);
+    END
+    """)
+
+    # Persist the ranking so "ORDER BY rank" lets FTS5 stop at the top N;
+    # bm25() column weights for title, description, location
+    cur.execute(f"INSERT INTO {schema}.complaints_fts (complaints_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')")
+    cur.execute(f"INSERT INTO {schema}.complaints_fts (complaints_fts) VALUES ('rebuild')")
+
+
+def create_area_index(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS areas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        level TEXT NOT NULL,
+        name TEXT NOT NULL,
+        parent_id INTEGER,
+        key TEXT NOT NULL UNIQUE
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_areas_parent ON areas(parent_id)")
+
+    add_column_if_missing(cur, "complaints", "area_id", "INTEGER")
+    add_column_if_missing(cur, "complaints", "ward_id", "INTEGER")
+    add_column_if_missing(cur, "complaints", "city_id", "INTEGER")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_area_id ON complaints(area_id, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_ward_id ON complaints(ward_id, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_city_id ON complaints(city_id, id DESC)")
+    # Area filters replace raw location equality
+    cur.execute("DROP INDEX IF EXISTS idx_complaints_location_id")
+
+    # Counters switch from raw location strings to area ids
+    install_counters(cur, COUNTERS_V8)
+
+    # Map existing rows in the background (see the backfill_areas job)
+    now = time.time()
+    cur.execute("""
+    INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+    VALUES ('backfill_areas', '{}', 'queued', 0, 5, ?, ?, ?)
+    """, (now, now, now))
+
+
+def install_cache_versions(cur):
+    install_table_versions(cur, VERSIONED_TABLES_V9)
+
+
+def create_events_table(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """)
+    # Replay after a reconnect reads one channel from a known id
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_channel_id ON events(channel, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_created_at ON events(created_at)")
+
+
+def add_archive_candidates(cur):
+    # archive_batch picks old resolved complaints by filing date
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_status_date ON complaints(status, date)")
+
+
+def install_history(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS complaint_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        complaint_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        from_status TEXT,
+        to_status TEXT,
+        department TEXT,
+        area_id INTEGER,
+        priority TEXT,
+        actor_id INTEGER,
+        resolution_seconds REAL,
+        created_at REAL NOT NULL
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaint_events_complaint ON complaint_events(complaint_id, kind)")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS complaint_rollups (
+        day TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        opened INTEGER NOT NULL DEFAULT 0,
+        resolved INTEGER NOT NULL DEFAULT 0,
+        reopened INTEGER NOT NULL DEFAULT 0,
+        resolution_seconds REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value, day)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS resolution_histogram (
+        day TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value, day, bucket)
+    ) WITHOUT ROWID
+    """)
+
+    # Existing complaints start the log with their submission; how long the
+    # already-resolved ones took was never recorded
+    cur.execute("""
+    INSERT INTO complaint_events
+    (complaint_id, kind, to_status, department, area_id, priority, actor_id, created_at)
+    SELECT id, 'created', status, department, area_id, priority, citizen_id,
+           COALESCE(
+               ((julianday(date, 'utc') - 2440587.5) * 86400.0),
+               ((julianday('now') - 2440587.5) * 86400.0)
+           )
+    FROM complaints
+    WHERE id NOT IN (SELECT complaint_id FROM complaint_events)
+    """)
+    install_history_triggers(cur, **ROLLUPS_V12)
+    recount_rollups(cur, **ROLLUPS_V12)
+
+
+def add_duplicate_links(cur):
+    # Linked reports point at the complaint they duplicate, which counts them
+    add_column_if_missing(cur, "complaints", "parent_id", "INTEGER")
+    add_column_if_missing(cur, "complaints", "upvotes", "INTEGER NOT NULL DEFAULT 0")
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_complaints_parent_id ON complaints(parent_id)
+    WHERE parent_id IS NOT NULL
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS complaint_signatures (
+        complaint_id INTEGER PRIMARY KEY,
+        signature BLOB NOT NULL
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS complaint_lsh_buckets (
+        scope TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        complaint_id INTEGER NOT NULL,
+        PRIMARY KEY (scope, bucket, complaint_id)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaint_lsh_buckets_complaint ON complaint_lsh_buckets(complaint_id)")
+
+    for name in ("complaints_upvote", "complaints_linked_status", "complaints_signature_delete"):
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{name}")
+    cur.execute("""
+    CREATE TRIGGER trg_complaints_upvote AFTER INSERT ON complaints
+    WHEN NEW.parent_id IS NOT NULL
+    BEGIN
+        UPDATE complaints SET upvotes = upvotes + 1 WHERE id = NEW.parent_id;
+    END
+    """)
+    # Linked reports follow their parent, so each citizen sees the outcome
+    cur.execute("""
+    CREATE TRIGGER trg_complaints_linked_status AFTER UPDATE OF status ON complaints
+    WHEN OLD.status IS NOT NEW.status AND NEW.upvotes > 0
+    BEGIN
+        UPDATE complaints SET status = NEW.status
+        WHERE parent_id = NEW.id AND status IS NOT NEW.status;
+    END
+    """)
+    # Archived complaints leave the index with the hot row
+    cur.execute("""
+    CREATE TRIGGER trg_complaints_signature_delete AFTER DELETE ON complaints
+    BEGIN
+        DELETE FROM complaint_signatures WHERE complaint_id = OLD.id;
+        DELETE FROM complaint_lsh_buckets WHERE complaint_id = OLD.id;
+    END
+    """)
+
+    # Existing complaints become match targets in the background (see the
+    # index_duplicates job); they are not linked to each other retroactively
+    now = time.time()
+    cur.execute("""
+    INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+    VALUES ('index_duplicates', '{}', 'queued', 0, 5, ?, ?, ?)
+    """, (now, now, now))
+
+
+def add_officer_assignment(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS officer_load (
+        officer_id INTEGER PRIMARY KEY,
+        department TEXT NOT NULL,
+        open_count INTEGER NOT NULL DEFAULT 0,
+        load INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_officer_load_department_load
+    ON officer_load(department, load, open_count, officer_id)
+    """)
+    # Load recounts and rebalancing read one officer's open complaints
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_complaints_assigned_status ON complaints(assigned_to, status)")
+    install_assignment_triggers(cur, **ASSIGNMENT_V14)
+    recount_loads(cur, **ASSIGNMENT_V14)
+
+    # Hand existing unassigned complaints out (see the rebalance_assignments job)
+    now = time.time()
+    cur.execute("""
+    INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+    VALUES ('rebalance_assignments', '{}', 'queued', 0, 5, ?, ?, ?)
+    """, (now, now, now))
+
+
+# Append only: never edit or reorder an entry that has shipped.
+MIGRATIONS = [
+    (1, "base schema", create_base_schema),
+    (2, "route indexes", create_route_indexes),
+    (3, "aggregate counters", install_aggregate_counters),
+    (4, "department listing indexes and counters", add_department_listing),
+    (5, "content-addressed uploads", create_upload_blobs),
+    (6, "background jobs", create_jobs),
+    (7, "complaint full-text search", create_complaint_search),
+    (8, "normalized area index", create_area_index),
+    (9, "cache invalidation versions", install_cache_versions),
+    (10, "live update events outbox", create_events_table),
+    (11, "resolved complaint archival", add_archive_candidates),
+    (12, "complaint status history and daily rollups", install_history),
+    (13, "near-duplicate complaint links", add_duplicate_links),
+    (14, "least-loaded officer assignment", add_officer_assignment),
+]
+
+
+def schema_version(db, schema="main"):
+    return db.execute(f"PRAGMA {schema}.user_version").fetchone()[0]
+
+
+def run_migrations(db, migrations=MIGRATIONS, schema="main"):
+    """Apply pending migrations, one transaction each; return versions applied
+
+    ``schema`` names the attached database whose user_version tracks
+    ``migrations`` (the archive keeps its own list).
+    """
+    applied = []
+    for version, _, migrate in migrations:
+        if schema_version(db, schema) >= version:
+            continue
+
+        cur = db.cursor()
+        # IMMEDIATE so concurrently booting workers queue up here and the
+        # loser re-checks the version instead of applying it twice.
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(db, schema) < version:
+                migrate(cur)
+                cur.execute(f"PRAGMA {schema}.user_version={version}")
+                applied.append(version)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return applied
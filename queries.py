@@ -0,0 +1,108 @@
+"""SQL run by the routes in app.py, shared with the query-plan check.
+
+Fixed statements are constants; those whose shape follows the request are
+built by functions returning (sql, params).
+"""
+
+# Keyset pages start below the largest possible rowid
+MAX_ROWID = 2**63 - 1
+
+USER_COLUMNS = "id, name, email, role, status, department, gov_id, aadhaar, dob, gender, address"
+USER_BY_ID_SQL = f"SELECT {USER_COLUMNS} FROM users WHERE id=?"
+USER_BY_LOGIN_SQL = f"""
+SELECT {USER_COLUMNS} FROM users
+WHERE email=? AND password=?
+"""
+USER_BY_EMAIL_SQL = "SELECT id FROM users WHERE email=?"
+USER_BY_MOBILE_SQL = "SELECT id FROM users WHERE mobile=?"
+
+OFFICERS_SQL = """
+SELECT id, name, email, gov_id, department
+FROM users
+WHERE role='government' AND status=?
+ORDER BY id DESC
+"""
+CITIZENS_SQL = """
+SELECT id, name, email
+FROM users
+WHERE role='citizen'
+ORDER BY id DESC
+"""
+
+NEWEST_COMPLAINT_SQL = "SELECT MAX(id) FROM complaints"
+FEED_PAGE_SQL = """
+SELECT complaints.title, complaints.description, complaints.location,
+       complaints.priority, complaints.status, complaints.image, users.name,
+       complaints.id, complaints.upvotes
+FROM complaints
+JOIN users ON complaints.citizen_id = users.id
+WHERE complaints.id < ? AND complaints.parent_id IS NULL
+ORDER BY complaints.id DESC
+LIMIT ?
+"""
+MY_ISSUES_SQL = """
+SELECT title, location, priority, status, image, id, parent_id, upvotes
+FROM all_complaints
+WHERE citizen_id=?
+ORDER BY id DESC
+"""
+COMPLAINT_STATUS_SQL = "SELECT status, department, citizen_id, parent_id FROM complaints WHERE id=?"
+LINKED_REPORTS_SQL = "SELECT id, citizen_id FROM complaints WHERE parent_id=?"
+
+ACTIVE_JOB_SQL = "SELECT 1 FROM jobs WHERE kind=? AND status IN ('queued', 'running')"
+
+
+def department_page_query(department, status=None, priority=None, before_id=None, limit=50):
+    """SELECT for a keyset page of a department's complaints; ``limit`` rows at most
+
+    NULL stands in for the search snippet so both row shapes line up.
+    """
+    query = """
+    SELECT id, title, location, status, priority, date, NULL, upvotes
+    FROM complaints
+    WHERE department=? AND id < ? AND parent_id IS NULL
+    """
+    params = [department, before_id or MAX_ROWID]
+
+    for column, value in (("status", status), ("priority", priority)):
+        if value:
+            query += f" AND {column}=?"
+            params.append(value)
+
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    return query, params
+
+
+def issue_list_query(filters, include_archived=False):
+    """SELECT for the admin issue list under (column, value) equality filters"""
+    query = f"""
+    SELECT id, title, location, department, priority, status, date
+    FROM {"all_complaints" if include_archived else "complaints"}
+    WHERE 1=1
+    """
+    params = []
+
+    for column, value in filters:
+        if value:
+            query += f" AND {column}=?"
+            params.append(value)
+
+    return query + " ORDER BY id DESC", params
+
+
+def complaint_statuses_query(complaint_ids):
+    placeholders = ",".join("?" * len(complaint_ids))
+    return f"""
+    SELECT id, status, department, citizen_id, parent_id FROM complaints
+    WHERE id IN ({placeholders})
+    """, tuple(complaint_ids)
+
+
+def status_update_query(complaint_ids, status, officer_id):
+    """UPDATE to ``status``; the assignee keeps the complaint, an officer only takes unassigned ones"""
+    return f"""
+    UPDATE complaints
+    SET status=?, assigned_to=COALESCE(assigned_to, ?)
+    WHERE id IN ({",".join("?" * len(complaint_ids))})
+    """, (status, officer_id, *complaint_ids)
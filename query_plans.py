@@ -0,0 +1,158 @@
+"""EXPLAIN QUERY PLAN checks for the SQL each route runs.
+
+The statements are taken from the same constants and builders the routes
+execute, with sample parameters, and the statements triggers run are read
+from the schema, so neither can drift from what the app actually does.
+"""
+import re
+
+from archive import ARCHIVE_CANDIDATES_SQL, moved_delete_query
+from areas import AREA_BY_KEY_SQL, AREA_TREE_SQL, UNMAPPED_COMPLAINTS_SQL
+from assignment import HEAVIEST_OFFICER_SQL, LIGHTEST_OFFICER_SQL, MOVABLE_COMPLAINT_SQL
+from bulk import COMPLAINT_EXPORT_COLUMNS, complaint_export_query, user_export_query
+from cache import VERSIONED_TABLES, table_versions_query
+from counters import COUNTER_GROUPS_SQL, COUNTER_SQL
+from duplicates import candidates_query
+from events import POLL_SQL, PRUNE_SQL, replay_query
+from history import HISTOGRAM_SQL, ROLLUPS_SQL
+from jobs import CLAIM_SQL
+from listings import LISTINGS, listing_query, parse_fields, parse_sort
+from queries import (
+    ACTIVE_JOB_SQL, CITIZENS_SQL, COMPLAINT_STATUS_SQL, FEED_PAGE_SQL, LINKED_REPORTS_SQL, MAX_ROWID,
+    MY_ISSUES_SQL, NEWEST_COMPLAINT_SQL, OFFICERS_SQL, USER_BY_EMAIL_SQL, USER_BY_ID_SQL, USER_BY_LOGIN_SQL,
+    USER_BY_MOBILE_SQL, complaint_statuses_query, department_page_query, issue_list_query, status_update_query
+)
+from search import search_query
+
+MATCH = '"pothole"*'
+# One of each admin_issues equality filter
+ISSUE_FILTERS = [
+    ("city_id", 1), ("ward_id", 1), ("area_id", 1),
+    ("status", "Pending"), ("priority", "High"), ("department", "Sanitation"),
+]
+TREND = ("department", "Sanitation", "2024-01-01", "2024-01-31")
+
+
+def _listing(name, args=None):
+    spec = LISTINGS[name]
+    return listing_query(spec, parse_fields(spec, None), parse_sort(spec, None), args or {}, 1, 26)
+
+
+# (route, sql, params)
+ROUTE_QUERIES = [
+    ("signup", USER_BY_EMAIL_SQL, ("a@b.c",)),
+    ("signup", USER_BY_MOBILE_SQL, ("9999999999",)),
+    ("login", USER_BY_LOGIN_SQL, ("a@b.c", "x")),
+    ("current_user", USER_BY_ID_SQL, (1,)),
+    ("conditional_get", NEWEST_COMPLAINT_SQL, ()),
+    ("conditional_get", *table_versions_query(VERSIONED_TABLES)),
+    ("citizen_home", FEED_PAGE_SQL, (MAX_ROWID, 26)),
+    ("citizen_my_issues", MY_ISSUES_SQL, (1,)),
+    ("citizen_report", *candidates_query("Electricity|ahmedabad/west/paldi", (1, 2, 3))),
+    ("citizen_report", LIGHTEST_OFFICER_SQL, ("Electricity",)),
+    ("resolve_area", AREA_BY_KEY_SQL, ("ahmedabad/west/paldi",)),
+    ("fetch_officers", OFFICERS_SQL, ("active",)),
+    ("fetch_citizens", CITIZENS_SQL, ()),
+    ("admin_dashboard", COUNTER_SQL, ("users_by_role", "citizen")),
+    ("admin_dashboard", ROLLUPS_SQL, TREND),
+    ("admin_dashboard", HISTOGRAM_SQL, TREND),
+    ("admin_listing", *_listing("complaints", {"status": "Pending"})),
+    ("admin_listing", *_listing("complaints", {"q": "pothole"})),
+    ("admin_listing", *_listing("officers", {"status": "pending"})),
+    ("admin_listing", *_listing("citizens")),
+    *(("admin_issues", *issue_list_query([issue_filter])) for issue_filter in ISSUE_FILTERS),
+    ("admin_issues", *issue_list_query([("department", "Sanitation")], include_archived=True)),
+    ("admin_issues", *search_query(MATCH, [("status", "Resolved")], include_archived=True)),
+    ("admin_issues", AREA_TREE_SQL, ()),
+    ("admin_issues", COUNTER_GROUPS_SQL, ("status",)),
+    ("export_issues", *complaint_export_query(COMPLAINT_EXPORT_COLUMNS, [("department", "Sanitation")])),
+    ("export_issues", *complaint_export_query(COMPLAINT_EXPORT_COLUMNS, (), "pothole", include_archived=True)),
+    ("export_users", *user_export_query("government")),
+    ("government_dashboard", *department_page_query("Sanitation", limit=51)),
+    ("government_dashboard", *department_page_query("Sanitation", "Pending", "High", limit=51)),
+    ("government_dashboard", *search_query(MATCH, [("department", "Public Works")], include_linked=False)),
+    ("update_complaint_status", COMPLAINT_STATUS_SQL, (1,)),
+    ("update_complaint_status", *status_update_query((1,), "Resolved", 1)),
+    ("update_complaint_status", LINKED_REPORTS_SQL, (1,)),
+    ("bulk_update_status", *complaint_statuses_query((1, 2, 3))),
+    ("bulk_update_status", *status_update_query((1, 2), "Resolved", 1)),
+    ("live_events", *replay_query(("citizen:1",), 0, 10, 100)),
+    ("event_broker", POLL_SQL, (0, 500)),
+    ("event_broker", PRUNE_SQL, (0,)),
+    ("init_db", ACTIVE_JOB_SQL, ("analytics_snapshot",)),
+    ("job_dispatcher", CLAIM_SQL, (1, 0, 0)),
+    ("archive_complaints", ARCHIVE_CANDIDATES_SQL, ("2024-01-01", 500)),
+    ("archive_complaints", *moved_delete_query((1, 2))),
+    ("backfill_areas", UNMAPPED_COMPLAINTS_SQL, (500,)),
+    ("rebalance_assignments", HEAVIEST_OFFICER_SQL, ("Electricity",)),
+    ("rebalance_assignments", MOVABLE_COMPLAINT_SQL, (1, 3)),
+]
+
+# Whole-table reads that are still by design, as (route, sql, params, reason).
+# Only these exact statements may scan; every filtered variant above must not.
+ALLOWED_SCANS = [
+    ("admin_listing", *_listing("complaints"), "unfiltered page walks the rowid from the newest end"),
+    ("admin_issues", *issue_list_query(()), "unfiltered complaint list"),
+    ("admin_issues", *issue_list_query((), include_archived=True), "unfiltered list of both databases"),
+    ("export_issues", *complaint_export_query(COMPLAINT_EXPORT_COLUMNS),
+     "unfiltered export streams every complaint"),
+    ("export_issues", *complaint_export_query(COMPLAINT_EXPORT_COLUMNS, include_archived=True),
+     "unfiltered export streams both databases"),
+]
+
+_TRIGGER_BODY = re.compile(r"\bBEGIN\b(.*)\bEND\s*$", re.IGNORECASE | re.DOTALL)
+_ROW_REFERENCE = re.compile(r"\b(?:NEW|OLD)\.\w+", re.IGNORECASE)
+
+
+def trigger_queries(db):
+    """(trigger, sql, params) for each statement in the main database's triggers
+
+    NEW.x and OLD.x references become parameters bound to NULL.
+    """
+    queries = []
+    rows = db.execute("SELECT name, sql FROM main.sqlite_master WHERE type='trigger' ORDER BY name")
+    for name, sql in rows.fetchall():
+        body = _TRIGGER_BODY.search(sql)
+        for statement in body.group(1).split(";") if body else ():
+            if statement.strip():
+                statement, references = _ROW_REFERENCE.subn("?", statement)
+                queries.append((name, statement, (None,) * references))
+    return queries
+
+
+def explain(db, sql, params):
+    rows = db.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def is_full_scan(detail):
+    # "SCAN t" and "SCAN t USING [COVERING] INDEX i" both visit every row;
+    # "SEARCH ..." lines, temp b-trees for ORDER BY and virtual tables that
+    # answer from their own index (FTS5 MATCH) are fine.
+    if "VIRTUAL TABLE INDEX" in detail:
+        return False
+    return detail.startswith("SCAN ") and not detail.startswith("SCAN CONSTANT ROW")
+
+
+def full_scans(details):
+    """The table scans among a plan's ``details``
+
+    Reading back a view or subquery's own rows (after its CO-ROUTINE or
+    MATERIALIZE step) is not a table scan; the plan reports how each of
+    its tables was read separately.
+    """
+    subqueries = {
+        detail.split()[-1] for detail in details
+        if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))
+    }
+    return [detail for detail in details if is_full_scan(detail) and detail.split()[1] not in subqueries]
+
+
+def check_query_plans(db):
+    """Return (route, sql, detail, allowed_reason) for every scan found"""
+    queries = [(route, sql, params, None) for route, sql, params in ROUTE_QUERIES + trigger_queries(db)]
+    findings = []
+    for route, sql, params, reason in queries + ALLOWED_SCANS:
+        for detail in full_scans(explain(db, sql, params)):
+            findings.append((route, " ".join(sql.split()), detail, reason))
+    return findings
@@ -0,0 +1,77 @@
+"""FTS5 full-text search over complaint title, description and location."""
+import re
+
+from markupsafe import Markup, escape
+
+# Control characters can't occur in form input, so they are safe snippet
+# markers to swap for <mark> after the surrounding text is escaped.
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def to_match_query(text):
+    """Turn free text into an FTS5 query: every word required, last one as a prefix"""
+    terms = _TERM.findall(text or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight(snippet):
+    if snippet is None:
+        return None
+    return Markup(
+        str(escape(snippet))
+        .replace(_MARK_OPEN, "<mark>")
+        .replace(_MARK_CLOSE, "</mark>")
+    )
+
+
+def search_query(match, filters=(), page=1, per_page=50, include_archived=False, include_linked=True):
+    """SELECT for one ranked page of an FTS5 ``match``, plus one row to detect a next page"""
+    branches, params = [], []
+    for schema in ("main", "archive") if include_archived else ("main",):
+        branch = f"""
+        SELECT c.id, c.title, c.location, c.department, c.priority, c.status, c.date,
+               snippet(complaints_fts, -1, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', 16),
+               complaints_fts.rank AS score
+        FROM {schema}.complaints_fts
+        JOIN {schema}.complaints c ON c.id = complaints_fts.rowid
+        WHERE complaints_fts MATCH ?
+        """
+        params.append(match)
+        for column, value in filters:
+            if value:
+                branch += f" AND c.{column}=?"
+                params.append(value)
+        if not include_linked:
+            branch += " AND c.parent_id IS NULL"
+        branches.append(branch)
+
+    # A single index orders by its own rank; two are merged on the score
+    query = branches[0] + " ORDER BY rank" if len(branches) == 1 else (
+        " UNION ALL ".join(branches) + " ORDER BY score"
+    )
+    query += " LIMIT ? OFFSET ?"
+    params += [per_page + 1, (max(page, 1) - 1) * per_page]
+    return query, params
+
+
+def search_complaints(cur, text, filters=(), page=1, per_page=50, include_archived=False, include_linked=True):
+    """Ranked page of matches; returns (rows, has_next)
+
+    Rows are (id, title, location, department, priority, status, date, snippet)
+    and ``filters`` is a sequence of (column, value) equality filters.
+    ``include_archived`` also searches the attached archive database;
+    ``include_linked=False`` leaves out reports linked to a parent.
+    """
+    match = to_match_query(text)
+    if match is None:
+        return [], False
+
+    cur.execute(*search_query(match, filters, page, per_page, include_archived, include_linked))
+    rows = cur.fetchall()
+    results = [(*row[:7], highlight(row[7])) for row in rows[:per_page]]
+    return results, len(rows) > per_page
@@ -0,0 +1,213 @@
+// ===================================
+// LAZY-LOADED ADMIN DASHBOARD PANELS
+// ===================================
+
+var FIELD_LABELS = {
+    id: 'ID',
+    gov_id: 'Gov ID',
+    citizen_id: 'Citizen',
+    assigned_to: 'Assigned To'
+};
+
+function fieldLabel(field) {
+    if (FIELD_LABELS[field]) {
+        return FIELD_LABELS[field];
+    }
+    return field.charAt(0).toUpperCase() + field.slice(1).replace(/_/g, ' ');
+}
+
+function setupLazyPanel(panel) {
+    var body = panel.querySelector('.lazy-body');
+    var parts = panel.dataset.endpoint.split('?');
+    var state = {
+        fields: panel.dataset.fields,
+        sort: '-id',
+        page: 1,
+        q: ''
+    };
+    var base = new URLSearchParams(parts[1] || '');
+    var loaded = false;
+    var searchTimer = null;
+
+    var toolbar = document.createElement('div');
+    toolbar.className = 'lazy-toolbar';
+    if (panel.dataset.searchable) {
+        var search = document.createElement('input');
+        search.type = 'search';
+        search.placeholder = 'Search...';
+        search.addEventListener('input', function () {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(function () {
+                state.q = search.value.trim();
+                state.page = 1;
+                load();
+            }, 300);
+        });
+        toolbar.appendChild(search);
+    }
+    var content = document.createElement('div');
+    var pager = document.createElement('div');
+    pager.className = 'pager';
+    body.appendChild(toolbar);
+    body.appendChild(content);
+    body.appendChild(pager);
+
+    function buildUrl() {
+        var params = new URLSearchParams(base.toString());
+        params.set('fields', state.fields);
+        params.set('sort', state.sort);
+        params.set('page', state.page);
+        if (state.q) {
+            params.set('q', state.q);
+        }
+        return parts[0] + '?' + params.toString();
+    }
+
+    function load() {
+        content.classList.add('loading');
+        fetch(buildUrl(), {
+            headers: { 'Accept': 'application/json' },
+            credentials: 'same-origin'
+        })
+            .then(function (response) {
+                return response.json().then(function (data) {
+                    if (!response.ok) {
+                        throw new Error(data.message || 'Request failed: ' + response.status);
+                    }
+                    return data;
+                });
+            })
+            .then(render)
+            .catch(function (error) {
+                content.textContent = error.message;
+            })
+            .then(function () {
+                content.classList.remove('loading');
+            });
+    }
+
+    function render(data) {
+        content.innerHTML = '';
+        if (!data.items.length) {
+            var empty = document.createElement('p');
+            empty.className = 'empty-state';
+            empty.textContent = 'Nothing to show.';
+            content.appendChild(empty);
+        } else {
+            content.appendChild(buildTable(data));
+        }
+        renderPager(data);
+    }
+
+    function buildTable(data) {
+        var wrapper = document.createElement('div');
+        wrapper.className = 'table-container';
+        var table = document.createElement('table');
+        var headRow = table.createTHead().insertRow();
+
+        data.fields.forEach(function (field) {
+            var th = document.createElement('th');
+            th.textContent = fieldLabel(field);
+            th.className = 'sortable';
+            if (state.sort === field) {
+                th.classList.add('sorted-asc');
+            } else if (state.sort === '-' + field) {
+                th.classList.add('sorted-desc');
+            }
+            th.addEventListener('click', function () {
+                state.sort = state.sort === '-' + field ? field : '-' + field;
+                state.page = 1;
+                load();
+            });
+            headRow.appendChild(th);
+        });
+        if (panel.dataset.actions === 'approval') {
+            var actionsHead = document.createElement('th');
+            actionsHead.textContent = 'Actions';
+            headRow.appendChild(actionsHead);
+        }
+
+        var tbody = table.createTBody();
+        data.items.forEach(function (item) {
+            var row = tbody.insertRow();
+            data.fields.forEach(function (field) {
+                var value = item[field];
+                row.insertCell().textContent = value === null || value === undefined ? '' : value;
+            });
+            if (panel.dataset.actions === 'approval') {
+                row.insertCell().appendChild(approvalActions(item));
+            }
+        });
+
+        wrapper.appendChild(table);
+        return wrapper;
+    }
+
+    function approvalActions(item) {
+        var actions = document.createElement('div');
+        actions.className = 'action-buttons';
+        var approve = document.createElement('a');
+        approve.href = '/admin/approve/' + item.id;
+        approve.className = 'btn btn-primary';
+        approve.textContent = 'Approve';
+
+        var reject = document.createElement('a');
+        reject.href = '/admin/reject/' + item.id;
+        reject.className = 'btn btn-danger';
+        reject.textContent = 'Reject';
+        reject.addEventListener('click', function (event) {
+            if (!window.confirm('Are you sure you want to reject this application?')) {
+                event.preventDefault();
+            }
+        });
+
+        actions.appendChild(approve);
+        actions.appendChild(reject);
+        return actions;
+    }
+
+    function renderPager(data) {
+        pager.innerHTML = '';
+        if (data.page === 1 && !data.has_next) {
+            return;
+        }
+        if (data.page > 1) {
+            pager.appendChild(pagerButton('Previous', data.page - 1));
+        }
+        var label = document.createElement('span');
+        label.textContent = 'Page ' + data.page;
+        pager.appendChild(label);
+        if (data.has_next) {
+            pager.appendChild(pagerButton('Next', data.page + 1));
+        }
+    }
+
+    function pagerButton(text, page) {
+        var button = document.createElement('button');
+        button.type = 'button';
+        button.className = 'btn btn-secondary';
+        button.textContent = text;
+        button.addEventListener('click', function () {
+            state.page = page;
+            load();
+        });
+        return button;
+    }
+
+    function loadOnce() {
+        if (panel.open && !loaded) {
+            loaded = true;
+            load();
+        }
+    }
+
+    panel.addEventListener('toggle', loadOnce);
+    loadOnce();
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    var panels = document.querySelectorAll('.lazy-panel');
+    for (var i = 0; i < panels.length; i++) {
+        setupLazyPanel(panels[i]);
+    }
+});
@@ -0,0 +1,66 @@
+// ===================================
+// INFINITE SCROLL FOR THE COMMUNITY FEED
+// ===================================
+
+document.addEventListener('DOMContentLoaded', function () {
+    var sentinel = document.getElementById('feed-sentinel');
+    var container = document.getElementById('feed-container');
+    if (!sentinel || !container || !sentinel.dataset.nextCursor) {
+        return;
+    }
+
+    var loading = false;
+
+    function loadNextPage() {
+        var cursor = sentinel.dataset.nextCursor;
+        if (loading || !cursor) {
+            return;
+        }
+        loading = true;
+        sentinel.classList.add('loading');
+
+        fetch(sentinel.dataset.feedUrl + '?before=' + encodeURIComponent(cursor), {
+            headers: { 'Accept': 'application/json' },
+            credentials: 'same-origin'
+        })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error('Feed request failed: ' + response.status);
+                }
+                return response.json();
+            })
+            .then(function (page) {
+                container.insertAdjacentHTML('beforeend', page.html);
+                sentinel.dataset.nextCursor = page.next_cursor || '';
+                if (typeof setupImageLightbox === 'function') {
+                    setupImageLightbox();
+                }
+                if (!page.next_cursor && observer) {
+                    observer.disconnect();
+                }
+            })
+            .catch(function (error) {
+                console.error(error);
+            })
+            .then(function () {
+                loading = false;
+                sentinel.classList.remove('loading');
+            });
+    }
+
+    var observer = null;
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(function (entries) {
+            if (entries[0].isIntersecting) {
+                loadNextPage();
+            }
+        }, { rootMargin: '600px 0px' });
+        observer.observe(sentinel);
+    } else {
+        window.addEventListener('scroll', function () {
+            if (sentinel.getBoundingClientRect().top < window.innerHeight + 600) {
+                loadNextPage();
+            }
+        });
+    }
+});
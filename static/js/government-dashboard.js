@@ -27,9 +27,144 @@ function bindStatusForm(form) {
     syncButtonState();
 }
 
+// Filtering runs on the server; changing a filter reloads the first page.
+function bindFilterForm(form) {
+    if (!form) {
+        return;
+    }
+
+    var selects = form.querySelectorAll('select');
+    for (var i = 0; i < selects.length; i++) {
+        selects[i].addEventListener('change', function () {
+            form.submit();
+        });
+    }
+}
+
+// Ticking rows reveals the bulk bar; one POST changes every selected complaint.
+function bindBulkForm(form) {
+    if (!form) {
+        return;
+    }
+
+    var selectAll = document.querySelector('[data-bulk="all"]');
+    var boxes = document.querySelectorAll('[data-bulk="row"]');
+    var count = form.querySelector('.bulk-count');
+    var result = form.querySelector('.bulk-result');
+    var submitButton = form.querySelector('button[type="submit"]');
+
+    function selectedIds() {
+        var ids = [];
+        for (var i = 0; i < boxes.length; i++) {
+            if (boxes[i].checked) {
+                ids.push(parseInt(boxes[i].value, 10));
+            }
+        }
+        return ids;
+    }
+
+    function syncSelection() {
+        var selected = selectedIds().length;
+        for (var i = 0; i < boxes.length; i++) {
+            boxes[i].closest('tr').classList.toggle('is-selected', boxes[i].checked);
+        }
+        if (selectAll) {
+            selectAll.checked = selected > 0 && selected === boxes.length;
+            selectAll.indeterminate = selected > 0 && selected < boxes.length;
+        }
+        count.textContent = selected === 1 ? '1 complaint selected' : selected + ' complaints selected';
+        form.hidden = selected === 0 && !result.textContent;
+    }
+
+    function showResult(message, isError) {
+        result.textContent = message;
+        result.classList.toggle('is-error', isError);
+        form.hidden = false;
+    }
+
+    for (var i = 0; i < boxes.length; i++) {
+        boxes[i].addEventListener('change', syncSelection);
+    }
+    if (selectAll) {
+        selectAll.addEventListener('change', function () {
+            for (var i = 0; i < boxes.length; i++) {
+                boxes[i].checked = selectAll.checked;
+            }
+            syncSelection();
+        });
+    }
+    form.querySelector('[data-bulk="clear"]').addEventListener('click', function () {
+        for (var i = 0; i < boxes.length; i++) {
+            boxes[i].checked = false;
+        }
+        result.textContent = '';
+        syncSelection();
+    });
+
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        var ids = selectedIds();
+        if (!ids.length) {
+            return;
+        }
+
+        submitButton.disabled = true;
+        fetch(form.action, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+            body: JSON.stringify({ ids: ids, status: form.elements.status.value })
+        })
+            .then(function (response) {
+                return response.json();
+            })
+            .then(function (data) {
+                if (!data.ok) {
+                    showResult(data.message || 'Could not update the selected complaints.', true);
+                    return;
+                }
+
+                var failed = [];
+                for (var i = 0; i < data.results.length; i++) {
+                    var item = data.results[i];
+                    var row = document.querySelector('[data-complaint-id="' + item.id + '"]');
+                    if (!item.ok) {
+                        failed.push('#' + item.id + ': ' + item.message);
+                        continue;
+                    }
+                    if (row) {
+                        row.querySelector('[data-bulk="row"]').checked = false;
+                        // Without live updates the statistics cards go stale; reload instead
+                        if (item.updated && typeof applyStatus === 'function' && window.EventSource) {
+                            applyStatus(row, item.status);
+                        }
+                    }
+                }
+
+                if (data.updated && !window.EventSource) {
+                    window.location.reload();
+                    return;
+                }
+                showResult(data.message + (failed.length ? ' ' + failed.join(' ') : ''), failed.length > 0);
+                syncSelection();
+            })
+            .catch(function () {
+                showResult('Could not update the selected complaints. Please try again.', true);
+            })
+            .then(function () {
+                submitButton.disabled = false;
+            });
+    });
+
+    syncSelection();
+}
+
 document.addEventListener('DOMContentLoaded', function () {
     var forms = document.querySelectorAll('.status-form');
     for (var i = 0; i < forms.length; i++) {
         bindStatusForm(forms[i]);
     }
+
+    bindFilterForm(document.getElementById('complaint-filters'));
+    bindBulkForm(document.getElementById('bulk-status'));
 });
@@ -0,0 +1,95 @@
+// ===================================
+// LIVE COMPLAINT UPDATES (SERVER-SENT EVENTS)
+// ===================================
+
+function statusSlug(status) {
+    return status.toLowerCase().replace(/ /g, '-');
+}
+
+function adjustStat(key, delta) {
+    var stat = document.querySelector('[data-stat="' + key + '"]');
+    if (stat) {
+        stat.textContent = Math.max((parseInt(stat.textContent, 10) || 0) + delta, 0);
+    }
+}
+
+function applyStatus(row, status) {
+    var pill = row.querySelector('[data-live="status-pill"]');
+    if (pill) {
+        pill.className = 'status ' + statusSlug(status);
+        pill.textContent = status;
+    }
+
+    var text = row.querySelector('[data-live="status-text"]');
+    if (text) {
+        text.textContent = status;
+    }
+
+    var badge = row.querySelector('[data-live="status-badge"]');
+    if (badge) {
+        badge.className = 'status-badge status-' + statusSlug(status);
+        badge.textContent = status;
+    }
+
+    var select = row.querySelector('.status-form select[name="status"]');
+    if (select) {
+        select.dataset.currentStatus = status;
+        select.value = status;
+        select.dispatchEvent(new Event('change'));
+    }
+
+    row.classList.remove('live-changed');
+    // Restart the highlight animation
+    void row.offsetWidth;
+    row.classList.add('live-changed');
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    if (!window.EventSource) {
+        return;
+    }
+
+    var notice = document.getElementById('live-notice');
+    var newCount = 0;
+    var source = new EventSource('/events');
+
+    source.addEventListener('complaint_status', function (event) {
+        var change = JSON.parse(event.data);
+        var row = document.querySelector('[data-complaint-id="' + change.id + '"]');
+        if (row) {
+            applyStatus(row, change.status);
+        }
+        adjustStat(change.previous_status, -1);
+        adjustStat(change.status, 1);
+    });
+
+    source.addEventListener('complaint_linked', function (event) {
+        var link = JSON.parse(event.data);
+        // Counters include linked reports; the listing shows only the parent
+        adjustStat('total', 1);
+        adjustStat(link.status, 1);
+
+        var badge = document.querySelector('[data-complaint-id="' + link.parent_id + '"] [data-live="upvotes"]');
+        if (badge) {
+            badge.textContent = '+' + link.upvotes;
+            badge.hidden = false;
+        }
+    });
+
+    source.addEventListener('complaint_created', function (event) {
+        var complaint = JSON.parse(event.data);
+        if (document.querySelector('[data-complaint-id="' + complaint.id + '"]')) {
+            return;
+        }
+        adjustStat('total', 1);
+        adjustStat(complaint.status, 1);
+
+        newCount += 1;
+        if (notice) {
+            notice.querySelector('span').textContent = newCount === 1
+                ? 'New complaint: ' + complaint.title
+                : newCount + ' new complaints';
+            notice.hidden = false;
+        }
+    });
+});
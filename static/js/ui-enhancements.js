@@ -78,7 +78,7 @@ function addImageClickHandler(img) {
 
     img.dataset.lightboxBound = 'true';
     img.addEventListener('click', function () {
-        openLightbox(img.src);
+        openLightbox(img.dataset.full || img.src);
     });
 }
 
@@ -0,0 +1,150 @@
+"""Content-addressed image storage with background renditions.
+
+Uploads are streamed to disk under their SHA-256 (``ab/abcdef....jpg``),
+so identical photos are stored once. Thumbnail and medium renditions are
+generated off the request path by the `renditions` job; templates fall back
+to the original until they exist.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from werkzeug.utils import secure_filename
+
+from files import move_into_place
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; originals are served as-is
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+RENDITIONS = {
+    "thumb": 480,
+    "medium": 1280,
+}
+
+
+def content_name(digest, original_filename):
+    ext = os.path.splitext(secure_filename(original_filename or ""))[1].lower()
+    return f"{digest[:2]}/{digest}{ext}"
+
+
+def rendition_name(filename, rendition):
+    stem = os.path.splitext(filename)[0]
+    return f"renditions/{rendition}/{stem}.jpg"
+
+
+class UploadStore:
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._latency = {"generated": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def store(self, file_storage):
+        """Stream an upload to its content address, leaving ``record`` for the caller's transaction
+
+        Returns (filename, sha256, size, duplicate).
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := file_storage.stream.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            filename = content_name(digest.hexdigest(), file_storage.filename)
+            path = os.path.join(self.folder, filename)
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                move_into_place(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return filename, digest.hexdigest(), size, duplicate
+
+    def record(self, cur, sha256, filename, size):
+        cur.execute("""
+        INSERT INTO upload_blobs (sha256, filename, size, refs)
+        VALUES (?,?,?,1)
+        ON CONFLICT(sha256) DO UPDATE SET refs = refs + 1
+        """, (sha256, filename, size))
+
+    def discard(self, cur, sha256, filename):
+        """Remove a file ``store`` wrote whose ``record`` never committed
+
+        Kept if another upload of the same content has recorded it since.
+        """
+        cur.execute("SELECT 1 FROM upload_blobs WHERE sha256=?", (sha256,))
+        if cur.fetchone() is None:
+            try:
+                os.remove(os.path.join(self.folder, filename))
+            except FileNotFoundError:
+                pass
+
+    def generate_renditions(self, filename):
+        if Image is None:
+            return
+        started = time.perf_counter()
+        try:
+            with Image.open(os.path.join(self.folder, filename)) as original:
+                image = ImageOps.exif_transpose(original).convert("RGB")
+                for rendition, max_edge in RENDITIONS.items():
+                    target = os.path.join(self.folder, rendition_name(filename, rendition))
+                    if os.path.exists(target):
+                        continue
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    copy = image.copy()
+                    copy.thumbnail((max_edge, max_edge))
+                    # Write then rename so readers never see a partial file
+                    copy.save(target + ".part", "JPEG", quality=80, optimize=True, progressive=True)
+                    os.replace(target + ".part", target)
+        except Exception:
+            with self._lock:
+                self._latency["failed"] += 1
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._latency["generated"] += 1
+            self._latency["total_ms"] += elapsed_ms
+            self._latency["max_ms"] = max(self._latency["max_ms"], elapsed_ms)
+
+    def url_path(self, filename, rendition=None):
+        """Path under uploads/ to serve: the rendition once it exists, else the original"""
+        if rendition and filename:
+            candidate = rendition_name(filename, rendition)
+            if os.path.exists(os.path.join(self.folder, candidate)):
+                return candidate
+        return filename
+
+    def stats(self, cur):
+        cur.execute("""
+        SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(refs), 0),
+               COALESCE(SUM(size * (refs - 1)), 0)
+        FROM upload_blobs
+        """)
+        blobs, stored_bytes, uploads, saved_bytes = cur.fetchone()
+        with self._lock:
+            latency = dict(self._latency)
+        generated = latency["generated"]
+        return {
+            "blobs": blobs,
+            "uploads": uploads,
+            "stored_bytes": stored_bytes,
+            "bytes_saved_by_dedup": saved_bytes,
+            "renditions_enabled": Image is not None,
+            "renditions_generated": generated,
+            "renditions_failed": latency["failed"],
+            "rendition_avg_ms": round(latency["total_ms"] / generated, 1) if generated else None,
+            "rendition_max_ms": round(latency["max_ms"], 1),
+        }